@@ -0,0 +1,186 @@
+# Backend/Admission.py
+
+"""
+Priority admission for the tasks of every query.
+
+Each task waits for a slot before it runs. Waiting tasks are admitted by priority,
+then in arrival order:
+
+    system       system commands, closing apps, cancellations, exit
+    interactive  chat, search and the other automation commands
+    background   content writing (images have their own pool in ImageGeneration.py)
+
+Background work has its own slots (BACKGROUND_SLOTS) and runs detached from the
+query through runInBackground(), so a long content() generation never holds up
+the next spoken command. Queue depth and admission wait are recorded in
+Backend/Metrics.py.
+"""
+
+from contextlib import asynccontextmanager
+from collections import OrderedDict
+from .Config import env_vars
+from .Metrics import metrics
+from .Runtime import submit
+import itertools
+import asyncio
+import heapq
+import time
+
+# Tasks of all queries that may run at once (system and interactive)
+admissionSlots = int(env_vars.get("ADMISSION_SLOTS", "16"))
+
+# Background jobs (content writing, ...) that may run at once
+backgroundSlots = int(env_vars.get("BACKGROUND_SLOTS", "2"))
+
+priorities = {"system": 0, "interactive": 1, "background": 2}
+
+# Decision prefixes that jump ahead of everything else
+systemPrefixes = ("system", "close", "cancel", "exit", "profiler")
+
+# How many finished background jobs are remembered
+maxRememberedJobs = 100
+
+
+# function to decide the priority of a task-graph task; content and image tasks only
+# hand their work to runInBackground() / the image pool, so they are interactive too
+def taskPriority(kind, query):
+    if query.startswith(systemPrefixes):
+        return "system"
+    return "interactive"
+
+
+class PrioritySlots:
+    """Async semaphore that wakes waiters by priority; used on the backend loop only."""
+
+    def __init__(self, slots):
+        self.free = slots
+        self.waiters = []  # heap of (priority, sequence, future)
+        self.sequence = itertools.count()
+
+    def depth(self):
+        return sum(1 for _, _, future in self.waiters if not future.done())
+
+    async def acquire(self, priority):
+        if self.free > 0 and not self.depth():
+            self.free -= 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiters, (priorities[priority], next(self.sequence), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # Cancelled right after being admitted: hand the slot on
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        while self.waiters:
+            _, _, future = heapq.heappop(self.waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.free += 1
+
+
+class AdmissionController:
+    """Hands out foreground and background slots and records queue depth and wait time."""
+
+    def __init__(self):
+        self.foreground = None
+        self.background = None
+
+    def lane(self, priority):
+        if self.foreground is None:
+            self.foreground = PrioritySlots(admissionSlots)
+            self.background = PrioritySlots(backgroundSlots)
+        if priority == "background":
+            return "background", self.background
+        return "foreground", self.foreground
+
+    @asynccontextmanager
+    async def slot(self, priority):
+        laneName, lane = self.lane(priority)
+        start = time.perf_counter()
+        metrics.setGauge("queueDepth", lane.depth() + 1, laneName)
+        try:
+            await lane.acquire(priority)
+        finally:
+            metrics.setGauge("queueDepth", lane.depth(), laneName)
+        metrics.observe(f"admissionWait.{priority}", time.perf_counter() - start)
+        try:
+            yield
+        finally:
+            lane.release()
+
+
+admission = AdmissionController()
+
+
+class BackgroundJob:
+    """A long task running detached from the query that started it."""
+
+    ids = itertools.count(1)
+
+    def __init__(self, name):
+        self.id = f"job-{next(self.ids)}"
+        self.name = name
+        self.status = "queued"  # queued -> running -> completed / failed
+        self.stage = None
+        self.result = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+
+    def toDict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "status": self.status,
+            "result": self.result,
+            "submitted": self.submitted,
+            "started": self.started,
+            "finished": self.finished,
+        }
+
+
+backgroundJobs = OrderedDict()
+
+
+def runInBackground(name, func, *args, onEvent=None):
+    """Run func(*args) in a background slot and return its BackgroundJob straight away.
+
+    func returns the text shown when the job is done; onEvent(event, job) is called
+    with "started", "completed" and "failed".
+    """
+    job = BackgroundJob(name)
+    backgroundJobs[job.id] = job
+    while len(backgroundJobs) > maxRememberedJobs:
+        backgroundJobs.popitem(last=False)
+
+    def emit(event):
+        if onEvent is not None:
+            try:
+                onEvent(event, job)
+            except Exception as e:
+                print(f"Error in background job listener: {e}")
+
+    async def run():
+        async with admission.slot("background"):
+            job.status = "running"
+            job.started = time.time()
+            emit("started")
+            try:
+                job.result = await asyncio.to_thread(func, *args)
+                job.status = "completed"
+            except Exception as e:
+                print(f"Error in background job {name}: {e}")
+                job.result = f"Sorry, I couldn't finish '{name}'."
+                job.status = "failed"
+            job.finished = time.time()
+            metrics.observe("backgroundJob", job.finished - job.started)
+        emit(job.status)
+
+    submit(run())
+    return job
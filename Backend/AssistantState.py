@@ -0,0 +1,116 @@
+# Backend/AssistantState.py
+
+import threading
+import time
+import os
+from .Config import env_vars
+
+# Keep Frontend/Files/Mic.data and Status.data in sync for tools that still read them
+mirrorStateFiles = str(env_vars.get("MIRROR_STATE_FILES", "False")).lower() == "true"
+
+# Define the path for the mirrored state files
+temDirPath = os.path.join(os.getcwd(), "Frontend", "Files")
+
+
+class AssistantState:
+    """In-process microphone and assistant status shared by the GUI and backend threads."""
+
+    def __init__(self, mirrorFiles=False):
+        self._condition = threading.Condition()
+        self._microphone = False
+        self._status = ""
+        self._mirrorFiles = mirrorFiles
+        self._speaking = False
+        self._interrupt = threading.Event()
+        self.interruptedAt = None  # time.perf_counter() of the last barge-in
+        self.interruptReason = None
+        self.lastInterrupt = None  # (interruptedAt, reason) of the last utterance, or None
+
+    def _writeFile(self, filename, text):
+        """Mirror a state value to its legacy data file."""
+        try:
+            os.makedirs(temDirPath, exist_ok=True)
+            with open(os.path.join(temDirPath, filename), "w", encoding="utf-8") as f:
+                f.write(text)
+        except Exception as e:
+            print(f"Error mirroring {filename}: {e}")
+
+    def setMicrophone(self, active):
+        """Switch the microphone on or off and wake any thread waiting for it."""
+        with self._condition:
+            changed = self._microphone != bool(active)
+            self._microphone = bool(active)
+            self._condition.notify_all()
+
+        # Toggling the microphone while the assistant talks stops the answer
+        if changed:
+            self.interruptSpeech("microphone")
+
+        if self._mirrorFiles:
+            self._writeFile("Mic.data", "True" if active else "False")
+
+    def isMicrophoneOn(self):
+        """Return True while the microphone is switched on."""
+        with self._condition:
+            return self._microphone
+
+    def waitForMicrophone(self, timeout=None):
+        """Block until the microphone is switched on, without polling."""
+        with self._condition:
+            self._condition.wait_for(lambda: self._microphone, timeout)
+            return self._microphone
+
+    def setStatus(self, status):
+        """Update the status line shown under the assistant animation."""
+        with self._condition:
+            self._status = status
+            self._condition.notify_all()
+
+        if self._mirrorFiles:
+            self._writeFile("Status.data", status)
+
+    def getStatus(self):
+        """Return the current status line."""
+        with self._condition:
+            return self._status
+
+    def setSpeaking(self, speaking):
+        """Mark that an answer is being synthesised or played; a new one starts uninterrupted."""
+        with self._condition:
+            self._speaking = bool(speaking)
+            if speaking:
+                self._interrupt.clear()
+                self.lastInterrupt = None
+
+    def interruptSpeech(self, reason=""):
+        """Barge-in: stop the answer being spoken; returns False if nothing was playing."""
+        with self._condition:
+            if not self._speaking or self._interrupt.is_set():
+                return False
+            self.interruptedAt = time.perf_counter()
+            self.interruptReason = reason
+            self._interrupt.set()
+        return True
+
+    def isInterrupted(self):
+        return self._interrupt.is_set()
+
+    def waitForInterrupt(self, timeout=None):
+        """Sleep for up to timeout seconds, waking at once on a barge-in."""
+        return self._interrupt.wait(timeout)
+
+    def takeInterrupt(self):
+        """Clear the barge-in flag; returns (interruptedAt, reason) if one happened.
+
+        The result is also kept as lastInterrupt until the next utterance starts.
+        """
+        with self._condition:
+            if not self._interrupt.is_set():
+                return None
+            self._interrupt.clear()
+            self.lastInterrupt = (self.interruptedAt, self.interruptReason)
+            return self.lastInterrupt
+
+
+# Shared state used by Frontend/GUI.py, Main.py and the backend modules
+assistantState = AssistantState(mirrorFiles=mirrorStateFiles)
@@ -1,10 +1,8 @@
 from AppOpener import close, open as appopen
 from webbrowser import open as webopen
 from pywhatkit import search, playonyt
-from dotenv import dotenv_values
 from bs4 import BeautifulSoup
 from rich import print
-from groq import Groq
 import webbrowser
 import requests
 import threading
@@ -15,6 +13,10 @@ import subprocess
 import keyboard
 import os
 import asyncio
+from .Config import env_vars
+from .Clients import getGroqClient
+from .Tracing import traced
+from .Memory import limitMessages, contentMessages
 from .ReminderTimer import (
     set_reminder,
     set_timer,
@@ -25,10 +27,6 @@ from .ReminderTimer import (
 )
 
 
-env_vars = dotenv_values(".env")
-grokAPIKey = env_vars.get("GROQ_API_KEY")
-
-
 # define CSS classes for parsing specific elements in HTML content
 classes = [
     "zCubwf",
@@ -56,10 +54,6 @@ classes = [
 useragent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.36 Brave"
 
 
-# initialize the groq client with api key
-client = Groq(api_key=grokAPIKey)
-
-
 # predefined professional responses for user interactions
 professional_responses = {
     "Your satisfaction is my top priority; feel free to reach out if there's anything else I can help you with.",
@@ -97,7 +91,7 @@ def speak_notification(message):
 systemChatBot = [
     {
         "role": "system",
-        "content": f"Hello, I am {os.environ['USERNAME']}, You're a content writer. You have to write content like letters, emails, applications, codes, essays, notes, poems, songs  and other professional content. You are a professional content writer. You are very professional and you always write in a professional way by following the standard approach.",
+        "content": f"Hello, I am {env_vars.get('USERNAME') or os.environ.get('USERNAME', 'User')}, You're a content writer. You have to write content like letters, emails, applications, codes, essays, notes, poems, songs  and other professional content. You are a professional content writer. You are very professional and you always write in a professional way by following the standard approach.",
     }
 ]
 
@@ -119,7 +113,7 @@ def content(topic):
     def contentWriterAI(prompt):
         messages.append({"role": "user", "content": f"{prompt}"})
 
-        completion = client.chat.completions.create(
+        completion = getGroqClient().chat.completions.create(
             model="mistral-saba-24b",
             messages=systemChatBot + messages,
             max_tokens=2048,
@@ -137,6 +131,7 @@ def content(topic):
 
         answer = answer.replace("</s>", "")  # remove unwanted tokens from the response
         messages.append({"role": "assistant", "content": f"{answer}"})
+        messages[:] = limitMessages(messages, contentMessages)
         return answer
 
     topic: str = topic.replace("content ", "")
@@ -333,101 +328,95 @@ def system(command):
     return True
 
 
-# asynchronous function to translate and execute user commands
-async def translateAndExecute(command):
+# function to map a single command to the function and arguments that execute it
+def resolveCommand(command):
 
-    funcs = []  # list to store asynchronous tasks
+    if command.startswith("open "):
 
-    for command in command:
+        if "open file " in command:
+            return None
+
+        return openApp, (command.removeprefix("open "),)
 
-        if command.startswith("open "):
+    elif command.startswith("general "):
+        return None
 
-            if "open it " in command:
-                pass
+    elif command.startswith("realtime "):
+        return None
 
-            if "open file " in command:
-                pass
+    elif command.startswith("close "):
+        return closeApp, (command.removeprefix("close "),)
 
-            else:
-                fun = asyncio.to_thread(openApp, command.removeprefix("open "))
-                funcs.append(fun)
+    elif command.startswith("play "):
+        return youtubePlay, (command.removeprefix("play "),)
 
-        elif command.startswith("general "):
-            pass
+    elif command.startswith("content "):
+        return content, (command.removeprefix("content "),)
 
-        elif command.startswith("realtime "):
-            pass
+    elif command.startswith("google search "):
+        return googleSearch, (command.removeprefix("google search "),)
 
-        elif command.startswith("close "):
-            fun = asyncio.to_thread(closeApp, command.removeprefix("close "))
-            funcs.append(fun)
+    elif command.startswith("youtube search "):
+        return youtubeSearch, (command.removeprefix("youtube search "),)
 
-        elif command.startswith("play "):
-            fun = asyncio.to_thread(youtubePlay, command.removeprefix("play "))
-            funcs.append(fun)
+    elif command.startswith("system "):
+        return system, (command.removeprefix("system "),)
 
-        elif command.startswith("content "):
-            fun = asyncio.to_thread(content, command.removeprefix("content "))
-            funcs.append(fun)
+    elif command.startswith("reminder "):
+        return set_reminder, (command,)
 
-        elif command.startswith("google search "):
-            fun = asyncio.to_thread(
-                googleSearch, command.removeprefix("google search ")
-            )
-            funcs.append(fun)
+    elif command.startswith("remind me ") or "remind me " in command:
+        return set_reminder, (command,)
 
-        elif command.startswith("youtube search "):
-            fun = asyncio.to_thread(
-                youtubeSearch, command.removeprefix("youtube search ")
-            )
-            funcs.append(fun)
+    elif (
+        command.startswith("set timer ")
+        or command.startswith("timer for ")
+        or "set a timer" in command
+    ):
+        return set_timer, (command,)
 
-        elif command.startswith("system "):
-            fun = asyncio.to_thread(system, command.removeprefix("system "))
-            funcs.append(fun)
+    elif command.startswith("list reminders") or command == "show reminders":
+        return list_reminders, ()
 
-        elif command.startswith("reminder "):
-            fun = asyncio.to_thread(set_reminder, command)
-            funcs.append(fun)
+    elif command.startswith("list timers") or command == "show timers":
+        return list_timers, ()
 
-        elif command.startswith("remind me ") or "remind me " in command:
-            fun = asyncio.to_thread(set_reminder, command)
-            funcs.append(fun)
+    elif command.startswith("cancel reminder"):
+        return cancel_reminder, ()
 
-        elif (
-            command.startswith("set timer ")
-            or command.startswith("timer for ")
-            or "set a timer" in command
-        ):
-            fun = asyncio.to_thread(set_timer, command)
-            funcs.append(fun)
+    elif command.startswith("cancel timer"):
+        return cancel_timer, ()
 
-        elif command.startswith("list reminders") or command == "show reminders":
-            fun = asyncio.to_thread(list_reminders)
-            funcs.append(fun)
+    print(f"No command found for {command}")
+    return None
 
-        elif command.startswith("list timers") or command == "show timers":
-            fun = asyncio.to_thread(list_timers)
-            funcs.append(fun)
 
-        elif command.startswith("cancel reminder"):
-            fun = asyncio.to_thread(cancel_reminder)
-            funcs.append(fun)
+# function to execute a single command synchronously
+def executeCommand(command):
+    resolved = resolveCommand(command)
+    if resolved is None:
+        return None
 
-        elif command.startswith("cancel timer"):
-            fun = asyncio.to_thread(cancel_timer)
-            funcs.append(fun)
+    func, args = resolved
+    return func(*args)
+
+
+# asynchronous function to translate and execute user commands
+async def translateAndExecute(command):
+
+    funcs = []  # list to store asynchronous tasks
+
+    for command in command:
+        resolved = resolveCommand(command)
 
-        else:
-            print(f"No command found for {command}")
+        if resolved is not None:
+            func, args = resolved
+            funcs.append(asyncio.to_thread(traced(command, func), *args))
 
     results = await asyncio.gather(*funcs)  # gather results from all tasks
 
     for result in results:
-        if isinstance(result, str):
-            yield result
-        else:
-            yield result
+        yield result
 
 
 # asynchronous function to automate command execution
@@ -0,0 +1,189 @@
+# Backend/Benchmark.py
+
+"""
+Offline replay benchmark.
+
+Replays recorded user turns from the conversation journal (Data/ChatLog.jsonl) and "Name:: text" transcripts
+(Frontend/Files/Database.data) through the same steps as MainExecution in Main.py
+(decision model -> task graph -> text to speech), with every network backend and
+automation side effect replaced by the stand-ins from Backend/Standins.py.
+
+    python -m Backend.Benchmark --save Data/Baseline.json
+    python -m Backend.Benchmark --compare Data/Baseline.json
+
+Reports the end-to-end latency distribution, throughput and a per-stage breakdown.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from .Config import env_vars
+from .Metrics import metrics, percentile
+from .Conversation import readJournal, journalPath, legacyChatLogPath
+import argparse
+import random
+import json
+import time
+import os
+
+assistantName = env_vars.get("ASSISTANT_NAME", "Jarvis")
+
+# Before the first run with the journal only the old ChatLog.json exists
+defaultChatLog = journalPath if os.path.exists(journalPath) else legacyChatLogPath
+defaultTranscript = os.path.join("Frontend", "Files", "Database.data")
+
+
+def loadChatLog(path):
+    """Return the user messages of a ChatLog.jsonl journal or an old ChatLog.json file."""
+    if path.endswith(".jsonl"):
+        messages = readJournal(path)
+    else:
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                messages = json.load(file)
+        except (FileNotFoundError, ValueError):
+            return []
+    return [message["content"] for message in messages if message.get("role") == "user"]
+
+
+def loadTranscript(path):
+    """Return the user turns of a "User:: ... / Jarvis:: ..." transcript."""
+    turns = []
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            lines = file.read().splitlines()
+    except FileNotFoundError:
+        return turns
+
+    for line in lines:
+        speaker, separator, text = line.partition("::")
+        if not separator or not text.strip():
+            continue
+        if speaker.strip().lower() not in (assistantName.lower(), "jarvis", "assistant"):
+            turns.append(text.strip())
+    return turns
+
+
+def loadTurns(paths):
+    """Load user turns from .jsonl / .json chat logs and transcript files, in order."""
+    turns = []
+    for path in paths:
+        if path.endswith((".jsonl", ".json")):
+            turns += loadChatLog(path)
+        else:
+            turns += loadTranscript(path)
+    return [turn for turn in turns if turn]
+
+
+def replayTurn(query):
+    """Run one turn like MainExecution does (without the microphone) and return its latency."""
+    from .Pipeline import processQuery, getBackend
+
+    start = time.perf_counter()
+    with metrics.timeStage("turn"):
+        result = processQuery(query)
+        with metrics.timeStage("textToSpeech"):
+            getBackend("tts")(result.speech)
+    return time.perf_counter() - start
+
+
+def runBenchmark(turns, concurrency=1, repeat=1, latencyScale=1.0, jitter=None, seed=0):
+    """Replay the turns against the stand-ins and return the benchmark report."""
+    from .Pipeline import useBackends
+    from .Standins import standinBackends, configureStandins
+
+    random.seed(seed)
+    configureStandins(jitter=jitter, scale=latencyScale)
+    useBackends(**standinBackends)
+    metrics.reset()
+    metrics.export = False  # keep the stand-in numbers out of Data/Metrics.json
+
+    queue = turns * repeat
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        latencies = list(pool.map(replayTurn, queue))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "time": time.time(),
+        "turns": len(queue),
+        "concurrency": concurrency,
+        "latencyScale": latencyScale,
+        "seed": seed,
+        "elapsed": elapsed,
+        "turnsPerSecond": len(queue) / elapsed if elapsed else 0.0,
+        "latency": {
+            "mean": sum(latencies) / len(latencies) if latencies else 0.0,
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies) if latencies else 0.0,
+        },
+        "stages": metrics.summary(),
+    }
+
+
+def printReport(report, baseline=None):
+    def change(current, previous):
+        if not previous:
+            return ""
+        return f" ({(current - previous) / previous * 100:+.1f}%)"
+
+    previous = baseline or {"latency": {}, "stages": {}}
+    print(f"Turns:        {report['turns']} (concurrency {report['concurrency']})")
+    print(f"Elapsed:      {report['elapsed']:.2f} s")
+    print(
+        f"Throughput:   {report['turnsPerSecond']:.2f} turns/s"
+        + change(report["turnsPerSecond"], previous.get("turnsPerSecond"))
+    )
+    for key in ("mean", "p50", "p90", "p95", "p99", "max"):
+        value = report["latency"][key]
+        print(f"{key + ':':<13} {value * 1000:.1f} ms" + change(value, previous["latency"].get(key)))
+
+    print("")
+    print(f"{'Stage':<22} {'Count':>7} {'p50 (ms)':>10} {'p95 (ms)':>10} {'p99 (ms)':>10}  Change (p50)")
+    for stage, summary in report["stages"].items():
+        before = previous["stages"].get(stage, {}).get("p50")
+        print(
+            f"{stage:<22} {summary['count']:>7} {summary['p50'] * 1000:>10.1f} "
+            f"{summary['p95'] * 1000:>10.1f} {summary['p99'] * 1000:>10.1f} {change(summary['p50'], before)}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded turns against the offline stand-ins.")
+    parser.add_argument("sources", nargs="*", help="chat logs (.jsonl / .json) or Name:: transcripts")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=1, help="replay the turns this many times")
+    parser.add_argument("--limit", type=int, default=None, help="replay at most this many turns")
+    parser.add_argument("--stub-latency", type=float, default=1.0, help="scale the stand-in latencies")
+    parser.add_argument("--jitter", type=float, default=None, help="relative jitter, e.g. 0.2")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", default=None, help="write the report to this JSON baseline")
+    parser.add_argument("--compare", default=None, help="compare with a saved JSON baseline")
+    args = parser.parse_args()
+
+    turns = loadTurns(args.sources or [defaultChatLog, defaultTranscript])
+    if args.limit:
+        turns = turns[: args.limit]
+    if not turns:
+        parser.error("no user turns found to replay")
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+
+    report = runBenchmark(
+        turns, args.concurrency, args.repeat, args.stub_latency, args.jitter, args.seed
+    )
+    printReport(report, baseline)
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.save) or ".", exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=4)
+        print(f"\nBaseline saved to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
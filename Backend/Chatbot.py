@@ -1,21 +1,16 @@
 # Backend/Chatbot.py
 
-from groq import Groq
-from json import dump, load
 import datetime
-import os
-from dotenv import dotenv_values
-
-# Load environment variables
-env_vars = dotenv_values(".env")
+import time
+from .Config import env_vars
+from .Clients import getGroqClient
+from .Metrics import metrics
+from .Memory import limitMessages, chatContextMessages
+from .Deadline import shouldDegrade
+from .Conversation import conversation, contextMessages
 
 userName = env_vars.get("USERNAME")
 assistantName = env_vars.get("ASSISTANT_NAME")
-groqAPIKey = env_vars.get("GROQ_API_KEY")  # Fixed typo: was "grokAPIKey"
-
-# Validate required environment variables
-if not groqAPIKey:
-    raise ValueError("GROQ_API_KEY not found in environment variables. Please check your .env file.")
 
 if not userName:
     userName = "User"  # Default fallback
@@ -23,13 +18,6 @@ if not userName:
 if not assistantName:
     assistantName = "Assistant"  # Default fallback
 
-# Initialize Groq client
-try:
-    client = Groq(api_key=groqAPIKey)
-except Exception as e:
-    print(f"Error initializing Groq client: {e}")
-    exit(1)
-
 # System message
 system = f"""Hello, I am {userName}, You are a very accurate and advanced AI chatbot named {assistantName} which also has real-time up-to-date information from the internet.
 *** Do not tell time until I ask, do not talk too much, just answer the question.***
@@ -37,39 +25,6 @@ system = f"""Hello, I am {userName}, You are a very accurate and advanced AI cha
 *** Do not provide notes in the output, just answer the question and never mention your training data. ***
 """
 
-def ensure_data_directory():
-    """Ensure the Data directory exists."""
-    if not os.path.exists("Data"):
-        os.makedirs("Data")
-
-def load_chat_history():
-    """Load chat history from JSON file."""
-    ensure_data_directory()
-    chat_log_path = os.path.join("Data", "ChatLog.json")
-    
-    try:
-        with open(chat_log_path, "r", encoding="utf-8") as f:
-            return load(f)
-    except FileNotFoundError:
-        # Create empty chat log if file doesn't exist
-        with open(chat_log_path, "w", encoding="utf-8") as f:
-            dump([], f)
-        return []
-    except Exception as e:
-        print(f"Error loading chat history: {e}")
-        return []
-
-def save_chat_history(messages):
-    """Save chat history to JSON file."""
-    ensure_data_directory()
-    chat_log_path = os.path.join("Data", "ChatLog.json")
-    
-    try:
-        with open(chat_log_path, "w", encoding="utf-8") as f:
-            dump(messages, f, indent=4, ensure_ascii=False)
-    except Exception as e:
-        print(f"Error saving chat history: {e}")
-
 def realTimeInformation():
     """Get current date and time information."""
     current_date_time = datetime.datetime.now()
@@ -93,68 +48,95 @@ def answerModifier(answer):
     modified_answer = '\n'.join(non_empty_lines)
     return modified_answer.strip()
 
-def chatBot(query, max_retries=3):
+def generateAnswer(query, onToken=None):
+    """Generate an answer for the query without saving it to the chat history.
+
+    onToken, if given, is called with each streamed piece of the answer.
+    """
+    # Load current chat history and add the user message
+    messages = contextMessages()
+    messages.append({"role": "user", "content": query.strip()})
+    messages = limitMessages(messages, chatContextMessages)
+
+    # Prepare system messages
+    system_messages = [
+        {"role": "system", "content": system},
+        {"role": "system", "content": realTimeInformation()}
+    ]
+
+    # Create completion (shorter when the query's deadline is close)
+    maxTokens = 256 if shouldDegrade("shortAnswer", "chatCompletion", "ttsSynthesis") else 1024
+    start = time.perf_counter()
+    completion = getGroqClient().chat.completions.create(
+        model="llama3-70b-8192",
+        messages=system_messages + messages,
+        max_tokens=maxTokens,
+        temperature=0.7,
+        top_p=1,
+        stream=True,
+        stop=None
+    )
+
+    # Collect response
+    answer = ""
+    for chunk in completion:
+        if chunk.choices[0].delta.content:
+            if not answer:
+                metrics.observeSince("chatFirstToken", start)
+            answer += chunk.choices[0].delta.content
+            if onToken is not None:
+                onToken(chunk.choices[0].delta.content)
+
+    metrics.observeSince("chatCompletion", start)
+
+    # Clean up the answer
+    return answer.replace("</s>", "").strip()
+
+def commitAnswer(query, answer):
+    """Save a generated answer to the chat history and return it cleaned up."""
+    conversation.append({"role": "user", "content": query.strip()}, {"role": "assistant", "content": answer})
+
+    return answerModifier(answer)
+
+def chatBot(query, max_retries=3, onToken=None):
     """Send user query to the chatbot and return the AI's response."""
     
     if not query or not query.strip():
         return "Please provide a valid query."
     
+    streamed = False
+
+    def forwardToken(text):
+        nonlocal streamed
+        streamed = True
+        onToken(text)
+
     for attempt in range(max_retries):
         try:
-            # Load current chat history
-            messages = load_chat_history()
-            
-            # Add user message
-            messages.append({"role": "user", "content": query.strip()})
-            
-            # Prepare system messages
-            system_messages = [
-                {"role": "system", "content": system},
-                {"role": "system", "content": realTimeInformation()}
-            ]
-            
-            # Create completion
-            completion = client.chat.completions.create(
-                model="llama3-70b-8192",
-                messages=system_messages + messages,
-                max_tokens=1024,
-                temperature=0.7,
-                top_p=1,
-                stream=True,
-                stop=None
-            )
-            
-            # Collect response
-            answer = ""
-            for chunk in completion:
-                if chunk.choices[0].delta.content:
-                    answer += chunk.choices[0].delta.content
-            
-            # Clean up the answer
-            answer = answer.replace("</s>", "").strip()
+            answer = generateAnswer(query, forwardToken if onToken is not None else None)
             
             if not answer:
                 return "I apologize, but I couldn't generate a response. Please try again."
             
-            # Add assistant response to messages
-            messages.append({"role": "assistant", "content": answer})
-            
             # Save updated chat history
-            save_chat_history(messages)
-            
-            return answerModifier(answer)
+            return commitAnswer(query, answer)
             
         except Exception as e:
             print(f"Attempt {attempt + 1} failed: {e}")
+            metrics.count("errors", "chatCompletion")
             
             if attempt == max_retries - 1:
                 # Last attempt failed, reset chat log and return error
                 print("All attempts failed. Resetting chat history.")
-                save_chat_history([])
+                conversation.reset()
                 return f"I'm sorry, I encountered an error: {str(e)}. Please try again."
             
             # Wait a bit before retrying
-            import time
+            metrics.count("retries", "chatCompletion")
+            if streamed:
+                # onToken(None): drop the failed attempt's text, the retry streams a new answer
+                onToken(None)
+                streamed = False
             time.sleep(1)
     
     return "I'm sorry, I couldn't process your request. Please try again."
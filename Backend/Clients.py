@@ -0,0 +1,50 @@
+# Backend/Clients.py
+
+import threading
+from .Config import env_vars
+
+# API clients shared by every backend module. They are created on first use so
+# importing a module never needs an API key and all modules reuse one connection pool.
+groqClient = None
+cohereClient = None
+clientLock = threading.Lock()
+
+
+def getGroqClient():
+    """Return the shared Groq client, creating it on first use."""
+    global groqClient
+    with clientLock:
+        if groqClient is None:
+            from groq import Groq
+
+            groqAPIKey = env_vars.get("GROQ_API_KEY")
+            if not groqAPIKey:
+                raise ValueError("GROQ_API_KEY not found in environment variables. Please check your .env file.")
+            groqClient = Groq(api_key=groqAPIKey)
+        return groqClient
+
+
+def getCohereClient():
+    """Return the shared Cohere client, creating it on first use."""
+    global cohereClient
+    with clientLock:
+        if cohereClient is None:
+            import cohere
+
+            cohereAPIKey = env_vars.get("COHERE_API_KEY")
+            if not cohereAPIKey:
+                raise ValueError(
+                    "COHERE_API_KEY not found in environment variables. Please check your .env file."
+                )
+            cohereClient = cohere.Client(cohereAPIKey)
+        return cohereClient
+
+
+# The warm-up calls below open each client's TLS connection with a cheap request,
+# so the first query doesn't pay for the handshake (see Backend/Warmup.py)
+def warmGroq():
+    getGroqClient().models.list()
+
+
+def warmCohere():
+    getCohereClient().check_api_key()
@@ -0,0 +1,6 @@
+# Backend/Config.py
+
+from dotenv import dotenv_values
+
+# Environment variables from the .env file, parsed once and shared by every module
+env_vars = dotenv_values(".env")
@@ -0,0 +1,207 @@
+# Backend/Conversation.py
+
+"""
+Conversation store shared by Backend/Chatbot.py, Backend/RealtimeSearchEngine.py
+and Main.py.
+
+The conversation lives in Data/ChatLog.jsonl, a journal with one message per
+line. A turn is appended to it; the file is never rewritten on a normal turn, so
+a turn costs the same however long the log is. The messages are also kept in
+memory, so reading the newest N of them never touches the file.
+
+    conversation.append(userMessage, assistantMessage)   # one atomic append
+    conversation.last(40)                                 # the newest 40 messages
+
+Writes are serialised by one lock. Each append is a single write() to a file
+opened for appending, so a turn's messages land together; a crash can at most
+cut off the last line, which is dropped on load. With MEMORY_BUDGET the journal
+is compacted to the newest CHAT_LOG_MESSAGES once it holds twice that many (a
+temporary file swapped in with os.replace()).
+
+On first use an existing Data/ChatLog.json is migrated into the journal; the old
+file is left untouched. The loaded messages are kept in the warm-restart
+snapshot (Backend/Snapshot.py).
+"""
+
+from .Memory import limitMessages, memoryBudget, chatContextMessages, chatLogMessages
+from .Snapshot import registerSection, fileSignature
+from .Metrics import metrics
+import threading
+import json
+import time
+import os
+
+journalPath = os.path.join("Data", "ChatLog.jsonl")
+
+# The chat log written before the journal existed, migrated on first use
+legacyChatLogPath = os.path.join("Data", "ChatLog.json")
+
+# Flags for appending to the journal (binary on Windows, so no newline translation)
+appendFlags = os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0)
+
+
+def encodeMessages(messages):
+    return "".join(json.dumps(message, ensure_ascii=False) + "\n" for message in messages).encode("utf-8")
+
+
+def readJournal(path=journalPath):
+    """Return the messages of a journal file; a line cut off by a crash is skipped."""
+    messages = []
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    messages.append(json.loads(line))
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return messages
+
+
+def repairJournal(path=journalPath):
+    """Drop a last line left unfinished by a crash, so the next append starts on a new line."""
+    try:
+        with open(path, "rb+") as file:
+            size = file.seek(0, os.SEEK_END)
+            if not size:
+                return
+            file.seek(size - 1)
+            if file.read(1) == b"\n":
+                return
+            file.seek(0)
+            file.truncate(file.read().rfind(b"\n") + 1)
+    except FileNotFoundError:
+        pass
+
+
+class ConversationStore:
+    """In-memory messages of the conversation backed by an append-only journal."""
+
+    def __init__(self, path=journalPath, legacyPath=legacyChatLogPath):
+        self.path = path
+        self.legacyPath = legacyPath
+        self.messages = None  # loaded on first use
+        self.journalLines = 0
+        self.signature = None  # of the journal as this store last wrote or read it
+        self.lock = threading.Lock()
+
+    def load(self):
+        # Called with the lock held
+        if self.messages is not None:
+            return
+        start = time.perf_counter()
+        if not os.path.exists(self.path) and os.path.exists(self.legacyPath):
+            self.migrate()
+        repairJournal(self.path)
+        messages = readJournal(self.path)
+        self.journalLines = len(messages)
+        self.messages = limitMessages(messages, chatLogMessages)
+        self.signature = fileSignature(self.path)
+        metrics.observeSince("conversationLoad", start)
+
+    def migrate(self):
+        try:
+            with open(self.legacyPath, "r", encoding="utf-8") as file:
+                messages = json.load(file)
+        except (OSError, ValueError) as e:
+            print(f"Error migrating {self.legacyPath}: {e}")
+            return
+        self.rewrite(messages)
+        print(f"Migrated {len(messages)} messages from {self.legacyPath} to {self.path}")
+
+    def rewrite(self, messages):
+        # Called with the lock held; replaces the journal in one step
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temporaryPath = self.path + ".tmp"
+        with open(temporaryPath, "wb") as file:
+            file.write(encodeMessages(messages))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporaryPath, self.path)
+        self.journalLines = len(messages)
+        self.signature = fileSignature(self.path)
+
+    def append(self, *messages):
+        """Add messages (usually a user message and its answer) to the end of the conversation."""
+        data = encodeMessages(messages)
+        start = time.perf_counter()
+        with self.lock:
+            self.load()
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                descriptor = os.open(self.path, appendFlags, 0o644)
+                try:
+                    os.write(descriptor, data)
+                finally:
+                    os.close(descriptor)
+            except OSError as e:
+                print(f"Error saving chat history: {e}")
+                return
+            self.messages.extend(messages)
+            self.journalLines += len(messages)
+            self.messages = limitMessages(self.messages, chatLogMessages)
+
+            if memoryBudget and self.journalLines > 2 * chatLogMessages:
+                self.rewrite(self.messages)
+            else:
+                self.signature = fileSignature(self.path)
+        metrics.observeSince("conversationAppend", start)
+
+    def replace(self, messages):
+        """Replace the whole conversation (an empty list clears it)."""
+        with self.lock:
+            self.load()
+            messages = limitMessages(list(messages), chatLogMessages)
+            try:
+                self.rewrite(messages)
+            except OSError as e:
+                print(f"Error saving chat history: {e}")
+                return
+            self.messages = messages
+
+    def reset(self):
+        self.replace([])
+
+    def all(self):
+        """Return every kept message, oldest first."""
+        with self.lock:
+            self.load()
+            return list(self.messages)
+
+    def last(self, count):
+        """Return the newest count messages, oldest first."""
+        with self.lock:
+            self.load()
+            return self.messages[-count:] if count > 0 else []
+
+    def __len__(self):
+        with self.lock:
+            self.load()
+            return len(self.messages)
+
+    def capture(self):
+        """The loaded messages for the warm-restart snapshot, if they match the journal."""
+        with self.lock:
+            if self.messages is None or self.signature != fileSignature(self.path):
+                return None
+            return {"messages": list(self.messages), "journalLines": self.journalLines}
+
+    def restore(self, state):
+        """Reuse the messages of the warm-restart snapshot instead of reading the journal."""
+        with self.lock:
+            self.messages = state["messages"]
+            self.journalLines = state["journalLines"]
+            self.signature = fileSignature(self.path)
+
+
+conversation = ConversationStore()
+
+registerSection("conversation", conversation.capture, conversation.restore, sources=(journalPath,))
+
+
+def contextMessages():
+    """The messages sent with a chat or search request (the newest ones with the memory budget on)."""
+    if memoryBudget:
+        return conversation.last(chatContextMessages)
+    return conversation.all()
@@ -0,0 +1,106 @@
+# Backend/Deadline.py
+
+"""
+Latency budget for one query.
+
+A Deadline is opened when the spoken query is known and travels in a context
+variable, so the decision model, Google search, the Groq completions and text to
+speech (on whatever thread they run) can check how much time is left before the
+first spoken word is due. When the remaining time can't fit a stage at its usual
+latency, the stage degrades instead of overrunning:
+
+    localDecision        Backend/Router.py's rules (else a chat answer) instead of firstLayerDMM
+    fewerSearchResults   2 Google results instead of 5
+    shortAnswer          a lower max_tokens for the Groq completion
+    shortSpeech          only the first sentence is spoken
+
+Each applied degradation is recorded on the deadline and returned with the
+PipelineResult.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from .Config import env_vars
+from .Metrics import metrics
+import threading
+import time
+
+# Seconds from the end of speech recognition to the first spoken word (0 disables the budget)
+queryDeadline = float(env_vars.get("QUERY_DEADLINE", "0"))
+
+# Typical stage latencies in seconds, used until enough samples are measured
+stageEstimates = {
+    "dmm": 0.8,
+    "googleSearch": 1.0,
+    "chatFirstToken": 0.5,
+    "chatCompletion": 1.5,
+    "searchFirstToken": 0.5,
+    "searchCompletion": 1.5,
+    "ttsSynthesis": 0.6,
+}
+
+# Measured samples needed before the median replaces the estimate
+minimumSamples = 5
+
+currentDeadline = ContextVar("currentDeadline", default=None)
+
+
+def expectedSeconds(stage):
+    """Median measured latency of a stage, or its default estimate."""
+    histogram = metrics.histograms.get(stage)
+    if histogram is not None and len(histogram.samples) >= minimumSamples:
+        return histogram.summary()["p50"]
+    return stageEstimates.get(stage, 0.0)
+
+
+class Deadline:
+    """The time budget of one query and the degradations applied to meet it."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires = time.monotonic() + seconds
+        self.degradations = []
+        self.lock = threading.Lock()
+
+    def remaining(self):
+        return self.expires - time.monotonic()
+
+    def tight(self, *stages):
+        """True when the stages won't fit in the remaining time at their usual latency."""
+        return self.remaining() < sum(expectedSeconds(stage) for stage in stages)
+
+    def degrade(self, name):
+        with self.lock:
+            if name not in self.degradations:
+                self.degradations.append(name)
+        metrics.count("degradations", name)
+
+
+def getDeadline():
+    """Return the deadline of the current query, or None when there is no budget."""
+    return currentDeadline.get()
+
+
+def shouldDegrade(name, *stages):
+    """Record and return True if the current query has no time for the stages."""
+    deadline = currentDeadline.get()
+    if deadline is None or not deadline.tight(*stages):
+        return False
+    deadline.degrade(name)
+    return True
+
+
+@contextmanager
+def deadlineScope(seconds=None):
+    """Give the with-block a deadline (QUERY_DEADLINE by default) unless one is active."""
+    seconds = queryDeadline if seconds is None else seconds
+    if currentDeadline.get() is not None or seconds <= 0:
+        yield currentDeadline.get()
+        return
+
+    deadline = Deadline(seconds)
+    token = currentDeadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        currentDeadline.reset(token)
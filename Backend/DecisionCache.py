@@ -0,0 +1,163 @@
+# Backend/DecisionCache.py
+
+"""
+Persistent cache of firstLayerDMM decisions.
+
+Keys are normalised queries ("What's the time?" and "what's the time" share one
+entry); values are the task lists left after the funcs filtering. The cache is a
+size-bounded LRU. Entries expire after DECISION_CACHE_TTL seconds, or the shorter
+DECISION_CACHE_REALTIME_TTL when the decision contains a realtime task, since what
+needs fresh information changes faster than what is a command.
+
+Entries are kept in Data/DecisionCache.json, written at most every
+DECISION_CACHE_INTERVAL seconds after a change and when the process exits. The file
+records a fingerprint of the decision model's prompt, so changing the preamble,
+few-shot history or funcs list starts with an empty cache. Hits and misses are
+counted as cacheHits / cacheMisses for the "dmm" stage.
+"""
+
+from collections import OrderedDict
+from .Config import env_vars
+from .Metrics import metrics
+from .Speculation import normalizeQuery
+import threading
+import atexit
+import json
+import time
+import os
+
+decisionCacheEnabled = env_vars.get("DECISION_CACHE", "True") == "True"
+
+# Decisions kept, least recently used dropped first
+decisionCacheSize = int(env_vars.get("DECISION_CACHE_SIZE", "500"))
+
+# Seconds a decision stays valid (one week), and for decisions with a realtime task (one hour)
+decisionCacheTTL = float(env_vars.get("DECISION_CACHE_TTL", "604800"))
+realtimeCacheTTL = float(env_vars.get("DECISION_CACHE_REALTIME_TTL", "3600"))
+
+# Seconds between two writes of Data/DecisionCache.json
+decisionCacheInterval = float(env_vars.get("DECISION_CACHE_INTERVAL", "30"))
+
+decisionCachePath = os.path.join("Data", "DecisionCache.json")
+
+
+def decisionTTL(decision):
+    if any(task.startswith("realtime") for task in decision):
+        return realtimeCacheTTL
+    return decisionCacheTTL
+
+
+class DecisionCache:
+    """LRU of query -> decision list with per-entry expiry, saved to a JSON file."""
+
+    def __init__(self, fingerprint="", path=decisionCachePath, size=decisionCacheSize):
+        self.fingerprint = fingerprint
+        self.path = path
+        self.size = size
+        self.entries = OrderedDict()  # normalised query -> (expires, decision)
+        self.loaded = False
+        self.dirty = False
+        self.lastSave = 0.0
+        self.lock = threading.Lock()
+
+    def load(self):
+        # Called with the lock held, on first use
+        self.loaded = True
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"Error loading the decision cache: {e}")
+            return
+        if data.get("fingerprint") != self.fingerprint:
+            return  # the decision model's prompt changed since these were cached
+
+        now = time.time()
+        for key, expires, decision in data.get("entries", []):
+            if expires > now:
+                self.entries[key] = (expires, decision)
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def get(self, query):
+        """Return a copy of the cached decision for the query, or None."""
+        key = normalizeQuery(query)
+        with self.lock:
+            if not self.loaded:
+                self.load()
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] <= time.time():
+                del self.entries[key]
+                self.dirty = True
+                entry = None
+            if entry is not None:
+                self.entries.move_to_end(key)
+
+        if entry is None:
+            metrics.count("cacheMisses", "dmm")
+            return None
+        metrics.count("cacheHits", "dmm")
+        return list(entry[1])
+
+    def put(self, query, decision):
+        key = normalizeQuery(query)
+        with self.lock:
+            if not self.loaded:
+                self.load()
+            self.entries[key] = (time.time() + decisionTTL(decision), list(decision))
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+            self.dirty = True
+            metrics.setGauge("cacheEntries", len(self.entries), "dmm")
+        self.save()
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.loaded = True
+            self.dirty = True
+        self.save(force=True)
+
+    def save(self, force=False):
+        """Write the cache file if it changed, at most every decisionCacheInterval seconds."""
+        with self.lock:
+            now = time.monotonic()
+            if not self.dirty or (not force and now - self.lastSave < decisionCacheInterval):
+                return
+            self.lastSave = now
+            self.dirty = False
+            data = {
+                "fingerprint": self.fingerprint,
+                "entries": [[key, expires, decision] for key, (expires, decision) in self.entries.items()],
+            }
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            temporaryPath = self.path + ".tmp"
+            with open(temporaryPath, "w", encoding="utf-8") as file:
+                json.dump(data, file)
+            os.replace(temporaryPath, self.path)
+        except OSError as e:
+            print(f"Error saving the decision cache: {e}")
+
+
+# Caches made by createDecisionCache(), saved by saveDecisionCaches()
+decisionCaches = []
+
+
+def createDecisionCache(fingerprint):
+    """Return the decision cache (None when DECISION_CACHE=False), saved again at exit."""
+    if not decisionCacheEnabled:
+        return None
+    cache = DecisionCache(fingerprint)
+    decisionCaches.append(cache)
+    atexit.register(cache.save, True)
+    return cache
+
+
+def saveDecisionCaches():
+    """Write every decision cache now; for exits that skip atexit (os._exit)."""
+    for cache in decisionCaches:
+        cache.save(force=True)
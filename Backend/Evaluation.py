@@ -0,0 +1,423 @@
+# Backend/Evaluation.py
+
+"""
+Offline accuracy-vs-latency evaluation of the decision backends.
+
+The labelled query set is built from the examples in Backend/Model.py, the
+held-out set of Backend/PromptBuilder.py, the decisions logged to
+Data/DecisionLog.jsonl, and the user turns of recorded transcripts
+(Data/ChatLog.jsonl and Frontend/Files/Database.data). Transcript turns start
+with the decision model's recorded answer (or the stand-in's guess) as their
+label and "checked": false. --save-set writes the set; correct those labels by
+hand, set "checked": true and load it again with --set. Unchecked turns are not
+scored.
+
+The queries are scored in two splits. "held-out" holds the queries that neither
+the intent classifier was trained on nor the decision cache was filled from
+(anything outside the example bank and the decision log); only this split shows
+whether a local backend can be trusted. "seen" holds the rest.
+
+Every available backend classifies every query:
+
+    router            Backend/Router.py
+    classifier        Backend/IntentClassifier.py (needs NumPy and a trained model)
+    cache             the decision cache of firstLayerDMM (Data/DecisionCache.json)
+    dmm (replay)      firstLayerDMM itself, fed the recorded Cohere responses of
+                      Data/DMMResponses.jsonl by a replaying client, at their
+                      recorded latency
+    local chain       router -> classifier -> cache -> dmm, as processQuery tries them
+
+The dmm column runs the real parsing and funcs filtering of Backend/Model.py.
+Its responses are recorded once with --record-dmm, which needs COHERE_API_KEY.
+Record them again after changing the prompt. Everything else runs offline.
+
+    python -m Backend.Evaluation --record-dmm
+    python -m Backend.Evaluation [--set Data/DecisionEvalSet.jsonl] [--latency-scale 0.1]
+"""
+
+from collections import Counter
+from contextlib import contextmanager
+from types import SimpleNamespace
+from .Speculation import normalizeQuery
+from .Metrics import metrics, percentile
+import argparse
+import json
+import time
+import os
+
+decisionLogPath = os.path.join("Data", "DecisionLog.jsonl")
+defaultEvalSet = os.path.join("Data", "DecisionEvalSet.jsonl")
+defaultResponses = os.path.join("Data", "DMMResponses.jsonl")
+
+# Characters per replayed text-generation event, about one token
+replayChunk = 4
+
+
+def splitDecision(text):
+    """Turn a decision string such as "open chrome, realtime who is he." into a task list."""
+    return [part.strip().rstrip(".").strip() for part in text.split(",") if part.strip()]
+
+
+def normaliseDecision(decision):
+    return [" ".join(task.lower().rstrip(".").split()) for task in decision]
+
+
+def taskCategory(task, funcs):
+    matches = [func for func in funcs if task.lower().startswith(func)]
+    return max(matches, key=len) if matches else "unknown"
+
+
+def loadDecisionLog(path=decisionLogPath):
+    entries = []
+    if not os.path.exists(path):
+        return entries
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            entries.append((entry["query"], entry["decision"]))
+    return entries
+
+
+def trainingQueries():
+    """Normalised queries the intent classifier trains on and the decision cache is filled from."""
+    from .Model import exampleBank
+    from .PromptBuilder import turnsToPairs
+
+    queries = {normalizeQuery(query) for query, _ in turnsToPairs(exampleBank)}
+    queries.update(normalizeQuery(query) for query, _ in loadDecisionLog())
+    return queries
+
+
+def labelEntry(query, decision, source, checked=True):
+    return {"query": query, "decision": list(decision), "source": source, "checked": checked}
+
+
+def buildEvalSet(transcripts=(), label=None):
+    """Labelled entries, one per normalised query.
+
+    Transcript turns that none of the other sources label get label(turn) and
+    "checked": false.
+    """
+    from .Model import exampleBank
+    from .PromptBuilder import heldOutExamples, turnsToPairs
+    from .Benchmark import loadTurns
+
+    entries = {}
+    for query, decision in turnsToPairs(exampleBank):
+        entries.setdefault(normalizeQuery(query), labelEntry(query, splitDecision(decision), "examples"))
+    for query, decision in heldOutExamples:
+        entries.setdefault(normalizeQuery(query), labelEntry(query, decision, "heldOut"))
+    for query, decision in loadDecisionLog():
+        entries.setdefault(normalizeQuery(query), labelEntry(query, decision, "decisionLog"))
+
+    for turn in loadTurns(list(transcripts)):
+        key = normalizeQuery(turn)
+        if key and key not in entries and label is not None:
+            entries[key] = labelEntry(turn, label(turn), "transcript", checked=False)
+    return list(entries.values())
+
+
+def loadEvalSet(path):
+    entries = []
+    with open(path, "r", encoding="utf-8") as file:
+        for line in filter(str.strip, file):
+            entry = json.loads(line)
+            entries.append(
+                labelEntry(entry["query"], entry["decision"], entry.get("source", "set"), entry.get("checked", True))
+            )
+    return entries
+
+
+def saveEvalSet(entries, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        for entry in entries:
+            file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def loadResponses(path=defaultResponses):
+    """Recorded decision model responses as {normalised query: {"response", "seconds"}}."""
+    responses = {}
+    if not os.path.exists(path):
+        return responses
+    with open(path, "r", encoding="utf-8") as file:
+        for line in filter(str.strip, file):
+            entry = json.loads(line)
+            responses[normalizeQuery(entry["query"])] = entry
+    return responses
+
+
+class ReplayCohereClient:
+    """Stands in for the Cohere client, streaming the recorded response of each query."""
+
+    def __init__(self, responses, latencyScale=1.0):
+        self.responses = responses
+        self.latencyScale = latencyScale
+
+    def chat_stream(self, message, **kwargs):
+        recorded = self.responses.get(normalizeQuery(message))
+        if recorded is None:
+            raise LookupError(f"no recorded response for {message!r}")
+        text = recorded["response"]
+        pieces = [text[index : index + replayChunk] for index in range(0, len(text), replayChunk)] or [""]
+        delay = recorded["seconds"] * self.latencyScale / len(pieces)
+        for piece in pieces:
+            time.sleep(delay)
+            yield SimpleNamespace(event_type="text-generation", text=piece)
+
+
+class RecordingCohereClient:
+    """Passes requests on to the real Cohere client and keeps each streamed response."""
+
+    def __init__(self, client):
+        self.client = client
+        self.responses = []
+
+    def chat_stream(self, message, **kwargs):
+        start = time.perf_counter()
+        text = ""
+        for event in self.client.chat_stream(message=message, **kwargs):
+            if event.event_type == "text-generation":
+                text += event.text
+            yield event
+        self.responses.append({"query": message, "response": text, "seconds": time.perf_counter() - start})
+
+
+@contextmanager
+def decisionModelClient(client):
+    """Send firstLayerDMM's requests to client, with the decision cache and log switched off."""
+    from . import Clients, Model, IntentClassifier
+
+    saved = Clients.cohereClient, Model.decisionCache, IntentClassifier.decisionLogEnabled
+    Clients.cohereClient, Model.decisionCache, IntentClassifier.decisionLogEnabled = client, None, False
+    try:
+        yield
+    finally:
+        Clients.cohereClient, Model.decisionCache, IntentClassifier.decisionLogEnabled = saved
+
+
+def recordResponses(queries, path=defaultResponses):
+    """Run the queries through firstLayerDMM with the real Cohere client and save its responses.
+
+    Call it outside decisionModelClient(), which replaces the shared Cohere client.
+    """
+    from .Clients import getCohereClient
+    from .Model import firstLayerDMM
+
+    client = getCohereClient()
+    if isinstance(client, (ReplayCohereClient, RecordingCohereClient)):
+        raise RuntimeError("recordResponses() needs the real Cohere client, not a replaying one")
+    recorder = RecordingCohereClient(client)
+    with decisionModelClient(recorder):
+        for query in queries:
+            firstLayerDMM(query)
+
+    # Newer recordings replace older ones of the same query
+    responses = loadResponses(path)
+    responses.update((normalizeQuery(entry["query"]), entry) for entry in recorder.responses)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        for entry in responses.values():
+            file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    return len(recorder.responses)
+
+
+def evaluationBackends(responses):
+    """Name -> function(query) returning a decision list, or None when it doesn't answer.
+
+    Call it before decisionModelClient(), which switches the decision cache off.
+    """
+    from .Router import routeDecision
+    from .IntentClassifier import getClassifier, classifyIntent
+    from .Model import decisionCache, firstLayerDMM
+
+    backends = {"router": routeDecision}
+    if getClassifier() is not None:
+        backends["classifier"] = classifyIntent
+    if decisionCache is not None:
+        backends["cache"] = decisionCache.get
+
+    if responses:
+
+        def replayedDMM(query):
+            if normalizeQuery(query) not in responses:
+                return None
+            return firstLayerDMM(query)
+
+        backends["dmm (replay)"] = replayedDMM
+
+    chain = list(backends.values())
+
+    def localChain(query):
+        for backend in chain:
+            decision = backend(query)
+            if decision is not None:
+                return decision
+        return None
+
+    backends["local chain"] = localChain
+    return backends
+
+
+def evaluate(entries, backends):
+    """Run every backend over the labelled entries and return a report per backend."""
+    from .Model import funcs
+
+    reports = {}
+    for name, backend in backends.items():
+        latencies, answered, exact = [], 0, 0
+        truePositives, falsePositives, falseNegatives = Counter(), Counter(), Counter()
+
+        for entry in entries:
+            expected = entry["decision"]
+            start = time.perf_counter()
+            decision = backend(entry["query"])
+            latencies.append(time.perf_counter() - start)
+
+            expectedCategories = Counter(taskCategory(task, funcs) for task in expected)
+            predictedCategories = Counter(taskCategory(task, funcs) for task in decision or ())
+            if decision is not None:
+                answered += 1
+                if normaliseDecision(decision) == normaliseDecision(expected):
+                    exact += 1
+            matched = expectedCategories & predictedCategories
+            truePositives.update(matched)
+            falsePositives.update(predictedCategories - matched)
+            falseNegatives.update(expectedCategories - matched)
+
+        categories = {}
+        for category in sorted(set(truePositives) | set(falsePositives) | set(falseNegatives)):
+            found = truePositives[category] + falsePositives[category]
+            relevant = truePositives[category] + falseNegatives[category]
+            categories[category] = {
+                "precision": truePositives[category] / found if found else None,
+                "recall": truePositives[category] / relevant if relevant else None,
+                "support": relevant,
+            }
+
+        reports[name] = {
+            "queries": len(entries),
+            "answered": answered,
+            "exact": exact,
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "categories": categories,
+        }
+    return reports
+
+
+def printSummary(title, reports):
+    print(f"{title:<16} {'Answered':>9} {'Exact (all)':>12} {'Exact (answered)':>17} {'p50 (ms)':>10} {'p95 (ms)':>10}")
+    for name, report in reports.items():
+        answeredExact = report["exact"] / report["answered"] * 100 if report["answered"] else 0.0
+        print(
+            f"{name:<16} {report['answered'] / report['queries'] * 100:>8.1f}% "
+            f"{report['exact'] / report['queries'] * 100:>11.1f}% {answeredExact:>16.1f}% "
+            f"{report['p50'] * 1000:>10.3f} {report['p95'] * 1000:>10.3f}"
+        )
+
+
+def printCategories(reports):
+    def ratio(value):
+        return "   -" if value is None else f"{value:.2f}"
+
+    categories = sorted({category for report in reports.values() for category in report["categories"]})
+    print(f"{'Precision/recall':<16} {'Support':>7} " + " ".join(f"{name[:14]:>14}" for name in reports))
+    for category in categories:
+        support = max(report["categories"].get(category, {}).get("support", 0) for report in reports.values())
+        cells = []
+        for report in reports.values():
+            stats = report["categories"].get(category, {"precision": None, "recall": None})
+            cells.append(f"{ratio(stats['precision']) + '/' + ratio(stats['recall']):>14}")
+        print(f"{category:<16} {support:>7} " + " ".join(cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the decision backends offline on a labelled query set.")
+    parser.add_argument("transcripts", nargs="*", help="chat logs (.jsonl / .json) or Name:: transcripts to label")
+    parser.add_argument("--set", default=None, help="load the labelled set from this JSONL file")
+    parser.add_argument("--save-set", nargs="?", const=defaultEvalSet, default=None, help="write the labelled set")
+    parser.add_argument("--include-unchecked", action="store_true", help="also score transcript labels not checked by hand")
+    parser.add_argument("--responses", default=defaultResponses, help="recorded decision model responses (JSONL)")
+    parser.add_argument("--record-dmm", action="store_true", help="record the decision model's responses (needs Cohere)")
+    parser.add_argument("--backends", default=None, help="comma-separated backends to run (default: all)")
+    parser.add_argument("--limit", type=int, default=None, help="evaluate at most this many queries")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="scale the replayed response latencies")
+    args = parser.parse_args()
+
+    from .Standins import standinDecision
+
+    metrics.export = False  # keep the evaluation out of Data/Metrics.json
+    responses = loadResponses(args.responses)
+    backends = evaluationBackends(responses)
+
+    replayClient = ReplayCohereClient(responses, args.latency_scale)
+
+    if args.set:
+        entries = loadEvalSet(args.set)
+    else:
+        from .Benchmark import defaultChatLog, defaultTranscript
+
+        # Transcript turns start with the decision model's recorded answer, or the stand-in's guess
+        def label(turn):
+            return backends.get("dmm (replay)", lambda query: None)(turn) or standinDecision(turn)
+
+        with decisionModelClient(replayClient):
+            entries = buildEvalSet(args.transcripts or [defaultChatLog, defaultTranscript], label)
+
+    unchecked = sum(1 for entry in entries if not entry["checked"])
+    if args.save_set:
+        saveEvalSet(entries, args.save_set)
+        print(f"Labelled set of {len(entries)} queries saved to {args.save_set}")
+        if unchecked:
+            print(f'Correct the {unchecked} transcript labels there and set "checked": true to score them')
+
+    scored = [entry for entry in entries if entry["checked"] or args.include_unchecked]
+    if args.limit:
+        scored = scored[: args.limit]
+    if not scored:
+        parser.error("no labelled queries to evaluate")
+
+    if args.record_dmm:
+        # Recorded with the real client, before the replaying one is swapped in
+        count = recordResponses([entry["query"] for entry in scored], args.responses)
+        if not count or not os.path.exists(args.responses):
+            parser.exit(1, "No decision model responses were recorded; check COHERE_API_KEY and the connection\n")
+        print(f"Recorded {count} decision model responses in {args.responses}")
+        return
+
+    with decisionModelClient(replayClient):
+        if args.backends:
+            wanted = [name.strip() for name in args.backends.split(",")]
+            backends = {name: backend for name, backend in backends.items() if name in wanted}
+
+        seen = trainingQueries()
+        splits = {
+            "held-out": [entry for entry in scored if normalizeQuery(entry["query"]) not in seen],
+            "seen": [entry for entry in scored if normalizeQuery(entry["query"]) in seen],
+        }
+
+        print(f"{len(scored)} labelled queries: {len(splits['held-out'])} held-out, {len(splits['seen'])} seen in training")
+        if unchecked and not args.include_unchecked:
+            print(f"{unchecked} transcript turns are not scored until their labels are checked")
+        if not responses:
+            print(f"No recorded responses in {args.responses}; run --record-dmm to add the decision model")
+
+        reports = {}
+        for split, splitEntries in splits.items():
+            if not splitEntries:
+                continue
+            reports[split] = evaluate(splitEntries, backends)
+            print("")
+            printSummary(split, reports[split])
+
+        if "held-out" in reports:
+            print("")
+            printCategories(reports["held-out"])
+
+
+if __name__ == "__main__":
+    main()
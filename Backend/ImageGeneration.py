@@ -16,18 +16,21 @@ import requests
 import json
 import base64
 import os
+import itertools
+import threading
+import queue
+import time
+from collections import OrderedDict
 from PIL import Image
 from io import BytesIO
-from dotenv import dotenv_values
 from datetime import datetime
+from .Config import env_vars
+from .Metrics import metrics
+from .Tracing import trace
 
-# Load environment variables
-env_vars = dotenv_values(".env")
+# Load the API key (checked when an image is requested, not at import)
 HUGGINGFACE_API_KEY = env_vars.get("HUGGINGFACE_API_KEY")
 
-if not HUGGINGFACE_API_KEY:
-    raise ValueError("HUGGINGFACE_API_KEY not found in .env file")
-
 # Stable Diffusion API endpoint - using a free model
 API_URL = "https://api-inference.huggingface.co/models/runwayml/stable-diffusion-v1-5"
 headers = {"Authorization": f"Bearer {HUGGINGFACE_API_KEY}"}
@@ -48,6 +51,10 @@ def query_image_api(prompt, negative_prompt="blurry, low quality, distorted"):
     Returns:
         bytes: The generated image data
     """
+    if not HUGGINGFACE_API_KEY:
+        print("HUGGINGFACE_API_KEY not found in .env file")
+        return None
+
     payload = {
         "inputs": prompt,
         "parameters": {
@@ -119,31 +126,39 @@ def open_image(filepath):
         print(f"Error opening image: {e}")
 
 
-def generate_image(prompt):
+def generate_image(prompt, onProgress=None):
     """
     Main function to generate an image from text prompt
 
     Args:
         prompt (str): The text description for image generation
+        onProgress (callable): Optional onProgress(stage, detail) callback, called with
+            "requesting", "saving" and "saved" (detail is the image path)
 
     Returns:
         str: Success message with image path or error message
     """
+    onProgress = onProgress or (lambda stage, detail=None: None)
+
     try:
         print(f"Generating image for prompt: '{prompt}'")
 
         # Generate the image
+        onProgress("requesting")
         image_data = query_image_api(prompt)
 
         if image_data is None:
             return "Failed to generate image. Please check your internet connection and API key."
 
         # Save the image
+        onProgress("saving")
         filepath = save_generated_image(image_data, prompt)
 
         if filepath is None:
             return "Image generated but failed to save."
 
+        onProgress("saved", filepath)
+
         # Open the image
         open_image(filepath)
 
@@ -155,10 +170,147 @@ def generate_image(prompt):
         return error_msg
 
 
+# Maximum number of images generated at the same time
+imageWorkers = int(env_vars.get("IMAGE_WORKERS", "2"))
+
+# How many finished jobs are remembered for status lookups
+maxRememberedJobs = 100
+
+
+class ImageJob:
+    """One queued image request and its progress."""
+
+    def __init__(self, jobId, prompt):
+        self.id = jobId
+        self.prompt = prompt
+        self.status = "queued"  # queued -> running -> completed / failed
+        self.stage = None
+        self.result = None
+        self.filepath = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.done = threading.Event()
+
+    def toDict(self):
+        return {
+            "id": self.id,
+            "prompt": self.prompt,
+            "status": self.status,
+            "stage": self.stage,
+            "result": self.result,
+            "filepath": self.filepath,
+            "submitted": self.submitted,
+            "started": self.started,
+            "finished": self.finished,
+        }
+
+
+class ImageWorkerPool:
+    """
+    Long-lived worker threads around generate_image with a job queue.
+
+    Listeners are called as listener(event, job) with event one of "queued",
+    "started", "progress", "completed" or "failed".
+    """
+
+    def __init__(self, workers=imageWorkers):
+        self.workers = max(1, workers)
+        self.jobs = queue.Queue()
+        self.history = OrderedDict()
+        self.listeners = []
+        self.threads = []
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+
+    def addListener(self, listener):
+        self.listeners.append(listener)
+
+    def emit(self, event, job, onEvent=None):
+        for listener in self.listeners + ([onEvent] if onEvent else []):
+            try:
+                listener(event, job)
+            except Exception as e:
+                print(f"Error in image job listener: {e}")
+
+    def submit(self, prompt, onEvent=None):
+        """Queue an image prompt and return its ImageJob straight away."""
+        with self.lock:
+            job = ImageJob(f"img-{next(self.ids)}", prompt)
+            self.history[job.id] = job
+            while len(self.history) > maxRememberedJobs:
+                self.history.popitem(last=False)
+
+            # Start worker threads on first use, up to the configured cap
+            if len(self.threads) < self.workers:
+                thread = threading.Thread(
+                    target=self.worker, name=f"ImageWorker-{len(self.threads) + 1}", daemon=True
+                )
+                self.threads.append(thread)
+                thread.start()
+
+        self.emit("queued", job, onEvent)
+        self.jobs.put((job, onEvent))
+        return job
+
+    def getJob(self, jobId):
+        with self.lock:
+            return self.history.get(jobId)
+
+    def worker(self):
+        while True:
+            job, onEvent = self.jobs.get()
+            try:
+                self.run(job, onEvent)
+            finally:
+                self.jobs.task_done()
+
+    def run(self, job, onEvent):
+        job.status = "running"
+        job.started = time.time()
+        self.emit("started", job, onEvent)
+
+        def progress(stage, detail=None):
+            job.stage = stage
+            if stage == "saved":
+                job.filepath = detail
+            self.emit("progress", job, onEvent)
+
+        with trace("imageJob", job=job.id):
+            job.result = generate_image(job.prompt, progress)
+        job.status = "completed" if job.filepath else "failed"
+        job.finished = time.time()
+        metrics.observe("imageGeneration", job.finished - job.started)
+        if job.status == "failed":
+            metrics.count("errors", "imageGeneration")
+        job.done.set()
+        self.emit(job.status, job, onEvent)
+
+
+imagePool = None
+imagePoolLock = threading.Lock()
+
+
+def getImagePool():
+    """Return the shared image worker pool, creating it on first use."""
+    global imagePool
+    with imagePoolLock:
+        if imagePool is None:
+            imagePool = ImageWorkerPool()
+        return imagePool
+
+
+def submitImageJob(prompt, onEvent=None):
+    """Queue an image request on the shared pool; "generate image" prefixes are removed."""
+    prompt = prompt.replace("generate image", "").strip().rstrip(".")
+    return getImagePool().submit(prompt, onEvent)
+
+
 def process_image_generation_request():
     """
     Process image generation request from the data file
-    This function is called when Main.py spawns this as a subprocess
+    Kept for running this module on its own (python -m Backend.ImageGeneration);
+    Main.py uses the in-process worker pool instead
     """
     try:
         # Check if the request file exists
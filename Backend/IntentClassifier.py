@@ -0,0 +1,298 @@
+# Backend/IntentClassifier.py
+
+"""
+Offline intent classifier in front of firstLayerDMM.
+
+A softmax regression over hashed word and character n-grams, trained with NumPy
+from the example bank of Backend/Model.py plus the decisions the model
+made in use (logged to Data/DecisionLog.jsonl). The weights are stored in
+Data/IntentModel.npz as float16 and load in milliseconds; one classification is a
+sum over a few dozen weight rows and takes microseconds.
+
+The classifier learns every funcs category, plus "multiple" for queries the model
+split into several tasks. It only answers when the top category reaches
+INTENT_CONFIDENCE and the decision can be built from the query itself: general,
+realtime, exit, list reminders and list timers. Commands with arguments are left
+to Backend/Router.py and, failing that, to firstLayerDMM.
+
+    python -m Backend.IntentClassifier --train        retrain from the examples and the log
+    python -m Backend.IntentClassifier "who is akbar?"  show the scores for a query
+
+NumPy is optional; without it (or without a trained model) every query goes to
+firstLayerDMM as before.
+"""
+
+from collections import Counter
+from .Config import env_vars
+from .Metrics import metrics
+from .Speculation import normalizeQuery
+import threading
+import argparse
+import json
+import math
+import time
+import zlib
+import os
+
+# NumPy is optional and only imported once a model is used or trained
+np = None
+
+classifierEnabled = env_vars.get("INTENT_CLASSIFIER", "True") == "True"
+
+# Lowest probability of the top category for a query to be decided locally
+intentConfidence = float(env_vars.get("INTENT_CONFIDENCE", "0.9"))
+
+# Append every decision of firstLayerDMM to the training log
+decisionLogEnabled = env_vars.get("DECISION_LOG", "True") == "True"
+
+intentModelPath = os.path.join("Data", "IntentModel.npz")
+decisionLogPath = os.path.join("Data", "DecisionLog.jsonl")
+
+# Hashed feature space (a power of two)
+featureDimensions = 2**12
+
+# Categories whose decision is the category followed by the query, or a fixed text
+answerableCategories = {"general", "realtime", "exit", "list reminders", "list timers"}
+
+# Words that mark a query as (possibly) containing a command besides a question
+commandWords = {"open", "close", "play", "remind", "reminder", "timer", "search", "generate", "write", "mute", "volume"}
+
+logLock = threading.Lock()
+
+
+def importNumpy():
+    """Import NumPy on first use; returns None when it isn't installed."""
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return None
+        np = numpy
+    return np
+
+
+def featureIndices(text):
+    """Hashed word unigrams, bigrams and character trigrams of the normalised text."""
+    text = normalizeQuery(text)
+    words = text.split()
+    grams = [f"w:{word}" for word in words]
+    grams += [f"b:{first} {second}" for first, second in zip(words, words[1:])]
+    padded = f" {text} "
+    grams += [f"c:{padded[index:index + 3]}" for index in range(len(padded) - 2)]
+    return [zlib.crc32(gram.encode("utf-8")) & (featureDimensions - 1) for gram in grams]
+
+
+def featureVector(text):
+    """Unique feature indices and their L2-normalised counts."""
+    indices, counts = np.unique(np.array(featureIndices(text), dtype=np.int64), return_counts=True)
+    counts = counts.astype(np.float32)
+    return indices, counts / max(float(np.sqrt((counts * counts).sum())), 1e-6)
+
+
+def decisionCategory(decision, funcs):
+    """The training label of a decision list: its funcs category, or "multiple"."""
+    if len(decision) != 1:
+        return "multiple"
+    task = decision[0].lower()
+    matches = [func for func in funcs if task.startswith(func)]
+    return max(matches, key=len) if matches else None
+
+
+class IntentClassifier:
+    """Softmax regression over hashed n-grams; weights (dimensions x categories)."""
+
+    def __init__(self, weights, bias, labels):
+        self.weights = weights
+        self.bias = bias
+        self.labels = list(labels)
+
+    def scores(self, text):
+        """Probability of every category for the text."""
+        # Summing a row per occurrence equals the count-weighted sum of featureVector()
+        indices = featureIndices(text)
+        norm = max(math.sqrt(sum(count * count for count in Counter(indices).values())), 1e-6)
+        logits = self.weights[indices].sum(axis=0) / norm + self.bias
+        logits = np.exp(logits - logits.max())
+        return logits / logits.sum()
+
+    def predict(self, text):
+        """Return (category, probability) of the most likely category."""
+        probabilities = self.scores(text)
+        best = int(probabilities.argmax())
+        return self.labels[best], float(probabilities[best])
+
+    def save(self, path=intentModelPath):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.savez(
+            path,
+            weights=self.weights.astype(np.float16),
+            bias=self.bias.astype(np.float32),
+            labels=np.array(self.labels),
+        )
+
+    @classmethod
+    def load(cls, path=intentModelPath):
+        with np.load(path) as data:
+            if data["weights"].shape[0] != featureDimensions:
+                raise ValueError("the model was trained with other feature dimensions; retrain it")
+            return cls(data["weights"].astype(np.float32), data["bias"], [str(label) for label in data["labels"]])
+
+
+# Training ------------------------------------------------------------------
+
+
+def loadExamples():
+    """(query, category) pairs from the example bank and the decision log."""
+    from .Model import funcs, exampleBank
+
+    examples = {}
+    for user, chatbot in zip(exampleBank[::2], exampleBank[1::2]):
+        decision = [part.strip() for part in chatbot["message"].rstrip(".").split(",")]
+        examples[normalizeQuery(user["message"])] = decisionCategory(decision, funcs)
+
+    if os.path.exists(decisionLogPath):
+        with open(decisionLogPath, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                examples[normalizeQuery(entry["query"])] = decisionCategory(entry["decision"], funcs)
+
+    return [(query, category) for query, category in examples.items() if query and category]
+
+
+def train(examples, epochs=300, learningRate=2.0, regularization=1e-4):
+    """Fit the softmax regression with full-batch gradient descent."""
+    labels = sorted({category for _, category in examples})
+    labelIndex = {label: index for index, label in enumerate(labels)}
+
+    features = np.zeros((len(examples), featureDimensions), dtype=np.float32)
+    targets = np.zeros((len(examples), len(labels)), dtype=np.float32)
+    for row, (query, category) in enumerate(examples):
+        indices, values = featureVector(query)
+        features[row, indices] = values
+        targets[row, labelIndex[category]] = 1.0
+
+    weights = np.zeros((featureDimensions, len(labels)), dtype=np.float32)
+    bias = np.zeros(len(labels), dtype=np.float32)
+    for _ in range(epochs):
+        logits = features @ weights + bias
+        logits = np.exp(logits - logits.max(axis=1, keepdims=True))
+        error = logits / logits.sum(axis=1, keepdims=True) - targets
+        weights -= learningRate * (features.T @ error / len(examples) + regularization * weights)
+        bias -= learningRate * error.mean(axis=0)
+
+    return IntentClassifier(weights, bias, labels)
+
+
+def retrain(path=intentModelPath):
+    """Train on every example, save the model and return (classifier, examples, accuracy)."""
+    if importNumpy() is None:
+        raise RuntimeError("NumPy is not installed (pip install numpy)")
+    examples = loadExamples()
+    if len({category for _, category in examples}) < 2:
+        raise RuntimeError("not enough examples to train on")
+
+    classifier = train(examples)
+    correct = sum(classifier.predict(query)[0] == category for query, category in examples)
+    classifier.save(path)
+
+    global loadedClassifier
+    loadedClassifier = classifier
+    return classifier, len(examples), correct / len(examples)
+
+
+# Use from the pipeline -----------------------------------------------------
+
+loadedClassifier = None
+loadAttempted = False
+loadLock = threading.Lock()
+
+
+def getClassifier():
+    """Return the trained classifier, or None without NumPy or a model file."""
+    global loadedClassifier, loadAttempted
+    if loadAttempted or not classifierEnabled:
+        return loadedClassifier
+    with loadLock:
+        if not loadAttempted:
+            loadAttempted = True
+            if os.path.exists(intentModelPath) and importNumpy() is not None:
+                try:
+                    loadedClassifier = IntentClassifier.load()
+                except Exception as e:
+                    print(f"Error loading the intent classifier: {e}")
+    return loadedClassifier
+
+
+def localDecision(query, category):
+    if category in ("general", "realtime"):
+        return [f"{category} {query}"]
+    return [category]
+
+
+def classifyIntent(query):
+    """Return a decision list when the classifier is confident, or None to ask firstLayerDMM."""
+    classifier = getClassifier()
+    if classifier is None:
+        return None
+
+    start = time.perf_counter()
+    category, probability = classifier.predict(query)
+    metrics.observe("intentClassifier", time.perf_counter() - start)
+
+    # Questions bundled with a command need the decision model to split them
+    words = set(normalizeQuery(query).split())
+    if category not in answerableCategories or probability < intentConfidence or words & commandWords:
+        metrics.count("cacheMisses", "classifier")
+        return None
+
+    metrics.count("cacheHits", "classifier")
+    return localDecision(query, category)
+
+
+def logDecision(query, decision):
+    """Append a decision of firstLayerDMM to Data/DecisionLog.jsonl for retraining."""
+    if not decisionLogEnabled:
+        return
+    line = json.dumps({"query": query, "decision": decision, "time": time.time()}, ensure_ascii=False)
+    try:
+        with logLock:
+            os.makedirs(os.path.dirname(decisionLogPath), exist_ok=True)
+            with open(decisionLogPath, "a", encoding="utf-8") as file:
+                file.write(line + "\n")
+    except OSError as e:
+        print(f"Error logging the decision: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train or try the local intent classifier.")
+    parser.add_argument("--train", action="store_true", help="retrain from Model.py's examples and the decision log")
+    parser.add_argument("query", nargs="*", help="a query to classify")
+    args = parser.parse_args()
+
+    if importNumpy() is None:
+        parser.error("NumPy is not installed (pip install numpy)")
+
+    if args.train:
+        classifier, count, accuracy = retrain()
+        print(
+            f"Trained on {count} examples, {len(classifier.labels)} categories, "
+            f"training accuracy {accuracy * 100:.1f}%; saved to {intentModelPath}"
+        )
+
+    if args.query:
+        classifier = getClassifier()
+        if classifier is None:
+            parser.error(f"no trained model at {intentModelPath}; run with --train first")
+        query = " ".join(args.query)
+        probabilities = classifier.scores(query)
+        for index in probabilities.argsort()[::-1][:5]:
+            print(f"{classifier.labels[index]:<16} {probabilities[index]:.3f}")
+        print(f"Decision: {classifyIntent(query) or 'ask firstLayerDMM'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# Backend/LoadTest.py
+
+"""
+Load-test client for Backend/Server.py.
+
+    python -m Backend.LoadTest --requests 500 --concurrency 50 --stub
+
+With --stub a server using the offline stand-in backends is started in-process,
+otherwise --url must point at a running server.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from .Metrics import metrics, percentile
+import urllib.request
+import threading
+import argparse
+import json
+import time
+
+# Queries sent round-robin by the load test
+sampleQueries = [
+    "how are you?",
+    "what is today's news?",
+    "open chrome and tell me about Elon Musk",
+    "set a timer for 5 minutes",
+    "who is the indian prime minister?",
+    "open facebook, open instagram",
+    "what are my reminders?",
+    "tell me a joke",
+]
+
+
+def sendQuery(url, query, timeout=60):
+    """POST one query and return its latency in seconds."""
+    data = json.dumps({"query": query}).encode("utf-8")
+    request = urllib.request.Request(
+        f"{url}/query", data=data, headers={"Content-Type": "application/json"}
+    )
+    start = time.perf_counter()
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+def runLoadTest(url, totalRequests, concurrency, queries=None):
+    """Send totalRequests queries with the given concurrency and summarise the latencies."""
+    queries = queries or sampleQueries
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def worker(index):
+        try:
+            latency = sendQuery(url, queries[index % len(queries)])
+            with lock:
+                latencies.append(latency)
+        except Exception as e:
+            with lock:
+                errors.append(str(e))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(totalRequests)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "requests": totalRequests,
+        "concurrency": concurrency,
+        "errors": len(errors),
+        "elapsed": elapsed,
+        "requestsPerSecond": len(latencies) / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 50),
+        "p90": percentile(latencies, 90),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "max": max(latencies) if latencies else 0.0,
+    }
+
+
+def startStubServer(host, port, latencyScale):
+    """Start Backend/Server.py with the stand-in backends on a background thread."""
+    from .Pipeline import useBackends
+    from .Runtime import submit
+    from .Server import serve
+    from .Standins import standinBackends, configureStandins
+
+    metrics.export = False  # keep the stand-in numbers out of Data/Metrics.json
+    configureStandins(scale=latencyScale)
+    useBackends(**standinBackends)
+
+    ready = threading.Event()
+    submit(serve(host, port, ready))
+    ready.wait(10)
+
+
+def printReport(report):
+    print(f"Requests:     {report['requests']} ({report['errors']} errors)")
+    print(f"Concurrency:  {report['concurrency']}")
+    print(f"Elapsed:      {report['elapsed']:.2f} s")
+    print(f"Throughput:   {report['requestsPerSecond']:.1f} requests/s")
+    for key in ("p50", "p90", "p95", "p99", "max"):
+        print(f"{key + ':':<13} {report[key] * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the assistant server.")
+    parser.add_argument("--url", default=None, help="server to test, e.g. http://127.0.0.1:8765")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--stub", action="store_true", help="start a stand-in server in-process")
+    parser.add_argument("--stub-latency", type=float, default=1.0, help="scale the stand-in latencies")
+    parser.add_argument("--port", type=int, default=8766, help="port for the --stub server")
+    args = parser.parse_args()
+
+    url = args.url
+    if args.stub:
+        startStubServer("127.0.0.1", args.port, args.stub_latency)
+        url = url or f"http://127.0.0.1:{args.port}"
+    if not url:
+        parser.error("either --url or --stub is required")
+
+    printReport(runLoadTest(url.rstrip("/"), args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# Backend/Memory.py
+
+"""
+Memory budget for long-running sessions and periodic tracemalloc reports.
+
+With MEMORY_BUDGET=True the structures that otherwise grow for the whole session
+are capped, oldest entries first:
+    - the chat history sent to Groq (CHAT_CONTEXT_MESSAGES)
+    - the conversation journal, Data/ChatLog.jsonl (CHAT_LOG_MESSAGES)
+    - the content writer's conversation in Backend/Automation.py (CONTENT_MESSAGES)
+
+With MEMORY_REPORT_INTERVAL set, tracemalloc runs and every interval the top
+allocation sites and the growth since the previous snapshot are written to
+Data/MemoryReport.txt.
+"""
+
+from .Config import env_vars
+import tracemalloc
+import threading
+import time
+import os
+
+memoryBudget = env_vars.get("MEMORY_BUDGET", "False") == "True"
+
+# Messages of the conversation sent with each chat or search request
+chatContextMessages = int(env_vars.get("CHAT_CONTEXT_MESSAGES", "40"))
+
+# Messages kept in the conversation journal
+chatLogMessages = int(env_vars.get("CHAT_LOG_MESSAGES", "500"))
+
+# Messages kept by the content writer (prompts and the generated content)
+contentMessages = int(env_vars.get("CONTENT_MESSAGES", "6"))
+
+# Seconds between two tracemalloc reports (0 disables tracemalloc)
+memoryReportInterval = float(env_vars.get("MEMORY_REPORT_INTERVAL", "0"))
+
+memoryReportPath = os.path.join("Data", "MemoryReport.txt")
+
+# Allocation sites listed in each section of the report
+reportSites = 15
+
+
+def limitMessages(messages, limit):
+    """Return the newest messages within the limit when the memory budget is on.
+
+    The kept part starts at a user message so the model never sees an answer
+    without its question.
+    """
+    if not memoryBudget or len(messages) <= limit:
+        return messages
+    kept = messages[-limit:]
+    while kept and kept[0].get("role") != "user":
+        kept = kept[1:]
+    return kept
+
+
+class MemoryReporter:
+    """Takes a tracemalloc snapshot every interval and writes the top allocation sites."""
+
+    def __init__(self, interval=memoryReportInterval):
+        self.interval = interval
+        self.previous = None
+        self.thread = None
+
+    def start(self):
+        if self.interval <= 0 or self.thread is not None:
+            return False
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.thread = threading.Thread(target=self.run, name="MemoryReporter", daemon=True)
+        self.thread.start()
+        return True
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.writeReport()
+            except Exception as e:
+                print(f"Error writing memory report: {e}")
+
+    def report(self):
+        """Return the current allocation report as text."""
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            )
+        )
+        current, peak = tracemalloc.get_traced_memory()
+
+        lines = [
+            f"Memory report {time.strftime('%Y-%m-%d %H:%M:%S')}",
+            f"Traced: {current / 1024 / 1024:.1f} MiB (peak {peak / 1024 / 1024:.1f} MiB)",
+            "",
+            "Top allocation sites:",
+        ]
+        for stat in snapshot.statistics("lineno")[:reportSites]:
+            lines.append(f"  {stat.size / 1024:>10.1f} KiB {stat.count:>8} blocks  {stat.traceback}")
+
+        if self.previous is not None:
+            lines += ["", "Growth since the last report:"]
+            for stat in snapshot.compare_to(self.previous, "lineno")[:reportSites]:
+                lines.append(
+                    f"  {stat.size_diff / 1024:>+10.1f} KiB {stat.count_diff:>+8} blocks  {stat.traceback}"
+                )
+        self.previous = snapshot
+        return "\n".join(lines) + "\n"
+
+    def writeReport(self):
+        text = self.report()
+        os.makedirs("Data", exist_ok=True)
+        with open(memoryReportPath, "w", encoding="utf-8") as file:
+            file.write(text)
+        print(text.splitlines()[1])
+
+
+memoryReporter = MemoryReporter()
+
+
+def startMemoryReports():
+    """Start the periodic tracemalloc reports if MEMORY_REPORT_INTERVAL is set."""
+    return memoryReporter.start()
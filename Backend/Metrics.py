@@ -0,0 +1,287 @@
+# Backend/Metrics.py
+
+"""
+Latency histograms per pipeline stage plus error, retry and cache-hit counters.
+
+    from Backend.Metrics import metrics
+    with metrics.timeStage("dmm"):
+        decision = firstLayerDMM(query)
+    metrics.count("retries", "chat")
+
+The numbers are exported as Prometheus text (GET /metrics on Backend/Server.py and
+Data/Metrics.prom) and as a JSON snapshot (Data/Metrics.json) which
+
+    python -m Backend.Metrics --stats
+
+summarises with p50/p95/p99 per stage. Each process writes its own numbers, so the
+files hold the stats of the most recent run.
+"""
+
+from contextlib import contextmanager
+from collections import deque
+from .Config import env_vars
+from .Tracing import recordSpan
+import threading
+import argparse
+import atexit
+import json
+import time
+import os
+
+# Set to "False" to stop writing Data/Metrics.json and Data/Metrics.prom
+metricsExport = env_vars.get("METRICS_EXPORT", "True") != "False"
+
+# Seconds between two writes of the metrics files
+metricsInterval = float(env_vars.get("METRICS_INTERVAL", "5"))
+
+metricsJsonPath = os.path.join("Data", "Metrics.json")
+metricsTextPath = os.path.join("Data", "Metrics.prom")
+
+# Histogram bucket bounds in seconds (Prometheus "le" labels)
+latencyBuckets = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Recent samples kept per stage for the percentile summary
+sampleSize = 2048
+
+
+def percentile(values, pct):
+    """Return the pct-th percentile of values (nearest-rank)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class Histogram:
+    """Bucketed latency histogram of one stage, with a window of recent samples."""
+
+    def __init__(self):
+        self.buckets = [0] * len(latencyBuckets)
+        self.count = 0
+        self.sum = 0.0
+        self.samples = deque(maxlen=sampleSize)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.sum += seconds
+        self.samples.append(seconds)
+        for index, bound in enumerate(latencyBuckets):
+            if seconds <= bound:
+                self.buckets[index] += 1
+
+    def summary(self):
+        samples = list(self.samples)
+        return {
+            "count": self.count,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "p50": percentile(samples, 50),
+            "p95": percentile(samples, 95),
+            "p99": percentile(samples, 99),
+            "max": max(samples) if samples else 0.0,
+        }
+
+    def toDict(self):
+        return {
+            "buckets": self.buckets,
+            "count": self.count,
+            "sum": self.sum,
+            "samples": list(self.samples),
+        }
+
+
+class MetricsRegistry:
+    """All stage histograms and counters of this process."""
+
+    def __init__(self):
+        self.histograms = {}  # stage -> Histogram
+        self.counters = {}  # (name, stage) -> count
+        self.gauges = {}  # (name, stage) -> current value
+        self.lock = threading.Lock()
+        self.saveLock = threading.Lock()
+        self.lastSave = 0.0
+        self.export = metricsExport
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def observeSince(self, stage, start):
+        """Observe the time since start (time.perf_counter()) and add it to the active trace."""
+        self.observe(stage, time.perf_counter() - start)
+        recordSpan(stage, start, "stage")
+
+    def count(self, name, stage="", amount=1):
+        """Add to a counter such as "errors", "retries", "cacheHits" or "cacheMisses"."""
+        with self.lock:
+            key = (name, stage)
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def setGauge(self, name, value, stage=""):
+        """Set a current value such as "queueDepth"."""
+        with self.lock:
+            self.gauges[(name, stage)] = value
+
+    @contextmanager
+    def timeStage(self, stage):
+        """Time the with-block as one observation of stage; exceptions count as errors."""
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.count("errors", stage)
+            raise
+        finally:
+            self.observeSince(stage, start)
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+            self.counters.clear()
+            self.gauges.clear()
+
+    def summary(self):
+        """Return {stage: {count, mean, p50, p95, p99, max}} for every stage."""
+        with self.lock:
+            return {stage: histogram.summary() for stage, histogram in sorted(self.histograms.items())}
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "time": time.time(),
+                "stages": {stage: histogram.toDict() for stage, histogram in self.histograms.items()},
+                "counters": [
+                    {"name": name, "stage": stage, "value": value}
+                    for (name, stage), value in self.counters.items()
+                ],
+                "gauges": [
+                    {"name": name, "stage": stage, "value": value}
+                    for (name, stage), value in self.gauges.items()
+                ],
+            }
+
+    def prometheusText(self):
+        """Return the metrics in the Prometheus text exposition format."""
+        with self.lock:
+            histograms = sorted(self.histograms.items())
+            counters = sorted(self.counters.items())
+            gauges = sorted(self.gauges.items())
+
+        lines = [
+            "# HELP jarvis_stage_seconds Time spent in each assistant pipeline stage.",
+            "# TYPE jarvis_stage_seconds histogram",
+        ]
+        for stage, histogram in histograms:
+            for bound, value in zip(latencyBuckets, histogram.buckets):
+                lines.append(f'jarvis_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {value}')
+            lines.append(f'jarvis_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+            lines.append(f'jarvis_stage_seconds_sum{{stage="{stage}"}} {histogram.sum:.6f}')
+            lines.append(f'jarvis_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+
+        names = sorted({name for (name, _), _ in counters})
+        for name in names:
+            lines.append(f"# TYPE jarvis_{name}_total counter")
+            for (counterName, stage), value in counters:
+                if counterName == name:
+                    lines.append(f'jarvis_{name}_total{{stage="{stage}"}} {value}')
+
+        for name in sorted({name for (name, _), _ in gauges}):
+            lines.append(f"# TYPE jarvis_{name} gauge")
+            for (gaugeName, stage), value in gauges:
+                if gaugeName == name:
+                    lines.append(f'jarvis_{name}{{stage="{stage}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def save(self, force=False):
+        """Write Data/Metrics.json and Data/Metrics.prom, at most every metricsInterval seconds."""
+        if not self.export:
+            return
+        if not self.saveLock.acquire(blocking=force):
+            return  # another thread is already writing
+        try:
+            now = time.monotonic()
+            if not force and now - self.lastSave < metricsInterval:
+                return
+            self.lastSave = now
+
+            os.makedirs("Data", exist_ok=True)
+            with open(metricsJsonPath, "w", encoding="utf-8") as file:
+                json.dump(self.snapshot(), file)
+            with open(metricsTextPath, "w", encoding="utf-8") as file:
+                file.write(self.prometheusText())
+        except OSError as e:
+            print(f"Error saving metrics: {e}")
+        finally:
+            self.saveLock.release()
+
+
+metrics = MetricsRegistry()
+
+
+# Write the final numbers when the process exits normally
+def saveOnExit():
+    if metrics.histograms or metrics.counters or metrics.gauges:
+        metrics.save(force=True)
+
+
+atexit.register(saveOnExit)
+
+
+# function to format a saved or live snapshot as the --stats table
+def statsReport(snapshot):
+    lines = [
+        f"{'Stage':<22} {'Count':>7} {'Mean (ms)':>10} {'p50 (ms)':>10} {'p95 (ms)':>10} {'p99 (ms)':>10} {'Max (ms)':>10}"
+    ]
+    for stage, data in sorted(snapshot["stages"].items()):
+        histogram = Histogram()
+        histogram.count = data["count"]
+        histogram.sum = data["sum"]
+        histogram.samples.extend(data["samples"])
+        summary = histogram.summary()
+        lines.append(
+            f"{stage:<22} {summary['count']:>7} {summary['mean'] * 1000:>10.1f} {summary['p50'] * 1000:>10.1f} "
+            f"{summary['p95'] * 1000:>10.1f} {summary['p99'] * 1000:>10.1f} {summary['max'] * 1000:>10.1f}"
+        )
+
+    if snapshot["counters"]:
+        lines += ["", f"{'Counter':<22} {'Stage':<22} {'Value':>7}"]
+        for counter in sorted(snapshot["counters"], key=lambda item: (item["name"], item["stage"])):
+            lines.append(f"{counter['name']:<22} {counter['stage'] or '-':<22} {counter['value']:>7}")
+
+    if snapshot.get("gauges"):
+        lines += ["", f"{'Gauge':<22} {'Stage':<22} {'Value':>7}"]
+        for gauge in sorted(snapshot["gauges"], key=lambda item: (item["name"], item["stage"])):
+            lines.append(f"{gauge['name']:<22} {gauge['stage'] or '-':<22} {gauge['value']:>7}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the latency metrics saved by the assistant.")
+    parser.add_argument("--stats", action="store_true", help="print p50/p95/p99 per stage (default)")
+    parser.add_argument("--prometheus", action="store_true", help="print the Prometheus text export")
+    parser.add_argument("--file", default=metricsJsonPath, help="metrics snapshot to read")
+    args = parser.parse_args()
+
+    path = metricsTextPath if args.prometheus else args.file
+    if not os.path.exists(path):
+        print(f"No metrics saved yet ({path}); run the assistant or the server first.")
+        return
+
+    if args.prometheus:
+        with open(path, "r", encoding="utf-8") as file:
+            print(file.read(), end="")
+        return
+
+    with open(path, "r", encoding="utf-8") as file:
+        snapshot = json.load(file)
+
+    saved = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(snapshot["time"]))
+    print(f"Metrics saved {saved}")
+    print(statsReport(snapshot))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,28 @@
 # Backend/Model.py
 
-import cohere
 from rich import print
-from dotenv import dotenv_values
+from .Clients import getCohereClient
+from .Config import env_vars
+from .DecisionCache import createDecisionCache
+from .IntentClassifier import logDecision
+from .PromptBuilder import FewShotPromptBuilder, promptBytes
+from .Metrics import metrics
+from .Runtime import runSync
+import argparse
+import hashlib
+import asyncio
+import json
+import time
+import sys
 
-# Load environment variables from .env file
-env_vars = dotenv_values(".env")
+# Decision requests firstLayerDMMBatch() keeps in flight at once
+dmmConcurrency = int(env_vars.get("DMM_CONCURRENCY", "8"))
 
-# Retrieve the Cohere API key from environment variables
-cohere_api_key = env_vars.get("COHERE_API_KEY")
+# Extra attempts for a failed decision request
+dmmRetries = int(env_vars.get("DMM_RETRIES", "2"))
 
-if not cohere_api_key:
-    raise ValueError(
-        "COHERE_API_KEY not found in environment variables. Please check your .env file."
-    )
-
-# Initialize the Cohere client with the API key
-try:
-    co = cohere.Client(cohere_api_key)
-except Exception as e:
-    print(f"Error initializing Cohere client: {e}")
-    exit(1)
+# Seconds before the first retry; doubled for each further one
+dmmRetryDelay = float(env_vars.get("DMM_RETRY_DELAY", "0.5"))
 
 # Define a list of organized function keywords for task categorization
 funcs = [
@@ -105,60 +107,214 @@ chatHistory = [
     {"role": "CHATBOT", "message": "general chat with me."},
 ]
 
+# A larger set of examples; only the ones most similar to each query are sent
+# (see Backend/PromptBuilder.py)
+exampleBank = chatHistory + [
+    {"role": "USER", "message": "who was mahatma gandhi?"},
+    {"role": "CHATBOT", "message": "general who was mahatma gandhi?"},
+    {"role": "USER", "message": "what's the time?"},
+    {"role": "CHATBOT", "message": "general what's the time?"},
+    {"role": "USER", "message": "can you explain recursion to me?"},
+    {"role": "CHATBOT", "message": "general can you explain recursion to me?"},
+    {"role": "USER", "message": "thanks, that was helpful."},
+    {"role": "CHATBOT", "message": "general thanks, that was helpful."},
+    {"role": "USER", "message": "tell me more about him."},
+    {"role": "CHATBOT", "message": "general tell me more about him."},
+    {"role": "USER", "message": "who is the indian prime minister?"},
+    {"role": "CHATBOT", "message": "realtime who is the indian prime minister?"},
+    {"role": "USER", "message": "what is today's news?"},
+    {"role": "CHATBOT", "message": "realtime what is today's news?"},
+    {"role": "USER", "message": "who is akshay kumar?"},
+    {"role": "CHATBOT", "message": "realtime who is akshay kumar?"},
+    {"role": "USER", "message": "what's the score of the india match?"},
+    {"role": "CHATBOT", "message": "realtime what's the score of the india match?"},
+    {"role": "USER", "message": "open telegram."},
+    {"role": "CHATBOT", "message": "open telegram."},
+    {"role": "USER", "message": "launch vs code and open github."},
+    {"role": "CHATBOT", "message": "open vs code, open github."},
+    {"role": "USER", "message": "close notepad and facebook."},
+    {"role": "CHATBOT", "message": "close notepad, close facebook."},
+    {"role": "USER", "message": "play let her go."},
+    {"role": "CHATBOT", "message": "play let her go."},
+    {"role": "USER", "message": "mute the volume."},
+    {"role": "CHATBOT", "message": "system mute."},
+    {"role": "USER", "message": "volume down and unmute."},
+    {"role": "CHATBOT", "message": "system volume down, system unmute."},
+    {"role": "USER", "message": "set a reminder at 9:00pm on 25th june for my business meeting."},
+    {"role": "CHATBOT", "message": "reminder 9:00pm 25th june business meeting."},
+    {"role": "USER", "message": "timer for 30 seconds."},
+    {"role": "CHATBOT", "message": "set timer 30 seconds."},
+    {"role": "USER", "message": "what timers are running?"},
+    {"role": "CHATBOT", "message": "list timers."},
+    {"role": "USER", "message": "write an email to my manager asking for a day off."},
+    {"role": "CHATBOT", "message": "content email to my manager asking for a day off."},
+    {"role": "USER", "message": "write a python program for a calculator and a poem about rain."},
+    {"role": "CHATBOT", "message": "content python program for a calculator, content poem about rain."},
+    {"role": "USER", "message": "search google for healthy breakfast ideas."},
+    {"role": "CHATBOT", "message": "google search healthy breakfast ideas."},
+    {"role": "USER", "message": "search on youtube how to tie a tie."},
+    {"role": "CHATBOT", "message": "youtube search how to tie a tie."},
+    {"role": "USER", "message": "bye jarvis."},
+    {"role": "CHATBOT", "message": "exit"},
+    {"role": "USER", "message": "open instagram and who won the election?"},
+    {"role": "CHATBOT", "message": "open instagram, realtime who won the election?"},
+]
+
 
-def firstLayerDMM(prompt: str = "test"):
-    try:
-        # Create a streaming chat session with the Cohere model
-        stream = co.chat_stream(
-            model="command-r-plus",
-            message=prompt,
-            temperature=0.1,  # Lower temperature for more consistent responses
-            chat_history=chatHistory,
-            prompt_truncation="OFF",
-            connectors=[],
-            preamble=preamble,  # Add the preamble here
-        )
-
-        # Initialize an empty string to store the generated response
-        response = ""
-
-        # Iterate over the events in the streamed responses from the model
-        for event in stream:
-            if event.event_type == "text-generation":
-                response += event.text
-
-        # Clean and process the response
-        response = response.strip().replace("\n", "")
-
-        # Handle empty response
-        if not response:
-            return [f"general {prompt}"]
-
-        # Split by comma and clean each part
-        response_parts = [part.strip() for part in response.split(",")]
-
-        # Filter valid tasks
-        valid_tasks = []
-        for task in response_parts:
-            task_lower = task.lower()
-            for func in funcs:
-                if task_lower.startswith(func.lower()):
+promptBuilder = FewShotPromptBuilder(exampleBank)
+if promptBuilder.examples <= 0:
+    promptBuilder = FewShotPromptBuilder(chatHistory)  # the original prompt, every example
+
+
+# Decisions of repeated queries are reused (see Backend/DecisionCache.py); the
+# fingerprint drops them whenever the prompt above changes
+decisionCache = createDecisionCache(
+    hashlib.sha1(json.dumps([funcs, preamble, exampleBank, promptBuilder.examples]).encode("utf-8")).hexdigest()
+)
+
+
+# function to check a decision entry against the funcs vocabulary
+def isValidTask(task):
+    task_lower = task.lower()
+    return any(task_lower.startswith(func.lower()) for func in funcs)
+
+
+def streamTasks(prompt, history):
+    """Yield the valid tasks of the model's answer as each comma-terminated part arrives."""
+    # Create a streaming chat session with the Cohere model
+    stream = getCohereClient().chat_stream(
+        model="command-r-plus",
+        message=prompt,
+        temperature=0.1,  # Lower temperature for more consistent responses
+        chat_history=history,
+        prompt_truncation="OFF",
+        connectors=[],
+        preamble=preamble,  # Add the preamble here
+    )
+
+    # Text after the last comma, still being generated
+    pending = ""
+
+    # Iterate over the events in the streamed responses from the model
+    for event in stream:
+        if event.event_type == "text-generation":
+            pending += event.text.replace("\n", "")
+
+            # Every part before a comma is complete: hand it on right away
+            *complete, pending = pending.split(",")
+            for part in complete:
+                task = part.strip()
+                if isValidTask(task):
+                    yield task
+
+    task = pending.strip()
+    if isValidTask(task):
+        yield task
+
+
+def cachedDecision(prompt):
+    if decisionCache is None:
+        return None
+    return decisionCache.get(prompt)
+
+
+def decisionHistory(prompt):
+    """Return the examples sent with the prompt; only the ones most similar to it are sent.
+
+    The request size goes to the metrics (promptBytes) rather than stdout, which
+    --batch keeps for its JSON lines.
+    """
+    history = promptBuilder.chatHistory(prompt)
+    size = promptBytes(preamble, history, prompt)
+    metrics.setGauge("promptBytes", size, "dmm")
+    metrics.count("promptBytesTotal", "dmm", size)
+    return history
+
+
+def rememberDecision(prompt, valid_tasks):
+    # Only called with a decision the model finished; fallback answers are never cached
+    if decisionCache is not None:
+        decisionCache.put(prompt, valid_tasks)
+    # Training data for the local intent classifier (Backend/IntentClassifier.py)
+    logDecision(prompt, valid_tasks)
+
+
+def firstLayerDMMStream(prompt: str = "test", retries=None):
+    """Yield each valid task as soon as the model has streamed the comma that ends it.
+
+    A failed request is retried DMM_RETRIES times. When the model never finishes,
+    "general <prompt>" follows the tasks already yielded, so the part of the query
+    that wasn't decided is still answered.
+    """
+    retries = dmmRetries if retries is None else retries
+    cached = cachedDecision(prompt)
+    if cached is not None:
+        yield from cached
+        return
+
+    history = decisionHistory(prompt)
+
+    valid_tasks = []
+    for attempt in range(retries + 1):
+        try:
+            # A retry streams the tasks already handed on again; only new ones are yielded
+            for index, task in enumerate(streamTasks(prompt, history)):
+                if index >= len(valid_tasks):
                     valid_tasks.append(task)
-                    break
+                    yield task
+            break
 
-        # If no valid tasks found, default to general
-        if not valid_tasks:
-            valid_tasks = [f"general {prompt}"]
+        except Exception as e:
+            print(f"Error in firstLayerDMM (attempt {attempt + 1}): {e}", file=sys.stderr)
+            metrics.count("errors", "dmm")
+            if attempt == retries:
+                yield f"general {prompt}"  # Fallback response
+                return
+            metrics.count("retries", "dmm")
+            time.sleep(dmmRetryDelay * 2**attempt)
 
-        return valid_tasks
+    # If the response was empty or had no valid tasks, default to general
+    if not valid_tasks:
+        yield f"general {prompt}"
+        return
 
-    except Exception as e:
-        print(f"Error in firstLayerDMM: {e}")
-        return [f"general {prompt}"]  # Fallback response
+    rememberDecision(prompt, valid_tasks)
 
 
-# Entry point for the script
-if __name__ == "__main__":
+def firstLayerDMM(prompt: str = "test", retries=None):
+    return list(firstLayerDMMStream(prompt, retries))
+
+
+async def firstLayerDMMAsync(prompt: str = "test", retries=None):
+    """Awaitable firstLayerDMM, with the same retries and fallback.
+
+    The blocking Cohere call runs on the worker pool with the shared client, so
+    many decisions can be awaited at once on one event loop.
+    """
+    return await asyncio.to_thread(firstLayerDMM, prompt, retries)
+
+
+async def firstLayerDMMBatchAsync(queries, concurrency=None, retries=None):
+    """Decide every query with at most concurrency requests in flight; results keep the query order."""
+    semaphore = asyncio.Semaphore(max(1, concurrency or dmmConcurrency))
+
+    async def decide(query):
+        async with semaphore:
+            with metrics.timeStage("dmm"):
+                return await firstLayerDMMAsync(query, retries)
+
+    # A query repeated in the batch is only sent once
+    unique = list(dict.fromkeys(queries))
+    decisions = dict(zip(unique, await asyncio.gather(*(decide(query) for query in unique))))
+    return [list(decisions[query]) for query in queries]
+
+
+def firstLayerDMMBatch(queries, concurrency=None, retries=None):
+    """Blocking firstLayerDMMBatchAsync(), run on the backend loop (see Backend/Runtime.py)."""
+    return runSync(firstLayerDMMBatchAsync(list(queries), concurrency, retries))
+
+
+def interactive():
     print("Decision Making Model started. Type 'exit' or 'quit' to stop.")
 
     try:
@@ -181,3 +337,19 @@ if __name__ == "__main__":
         print("\nGoodbye!")
     except Exception as e:
         print(f"An error occurred: {e}")
+
+
+# Entry point for the script
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Classify queries with the decision model.")
+    parser.add_argument("--batch", help="classify every line of this file and print one JSON line per query")
+    parser.add_argument("--concurrency", type=int, default=dmmConcurrency, help="requests in flight at once")
+    args = parser.parse_args()
+
+    if args.batch:
+        with open(args.batch, "r", encoding="utf-8") as file:
+            queries = [line.strip() for line in file if line.strip()]
+        for query, decision in zip(queries, firstLayerDMMBatch(queries, args.concurrency)):
+            sys.stdout.write(json.dumps({"query": query, "decision": decision}, ensure_ascii=False) + "\n")
+    else:
+        interactive()
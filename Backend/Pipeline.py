@@ -0,0 +1,306 @@
+# Backend/Pipeline.py
+
+from Frontend.Formatting import QueryModifire
+from .Speculation import Speculation, isSpeculationEnabled, speculationReport
+from .TaskGraph import executeDecision, mergeResults
+from .Startup import lazyFunction
+from .Metrics import metrics
+from .Tracing import trace
+from .Deadline import deadlineScope, getDeadline, shouldDegrade
+from .Admission import runInBackground
+from .Router import routeQuery, routeDecision
+from .IntentClassifier import classifyIntent
+from .Config import env_vars
+import time
+
+# Start each task as soon as the decision model has streamed it, instead of after
+# the whole decision (set to "False" to wait for the complete decision)
+streamingDecisions = env_vars.get("STREAMING_DMM", "True") == "True"
+
+# Where each backend the pipeline calls lives. They are imported on first use, so
+# useBackends() can swap in the offline stand-ins from Backend/Standins.py without
+# the real modules (and their API keys) ever being loaded.
+defaultBackends = {
+    "dmm": ("Backend.Model", "firstLayerDMM"),
+    "dmmStream": ("Backend.Model", "firstLayerDMMStream"),
+    "chat": ("Backend.Chatbot", "chatBot"),
+    "draftChat": ("Backend.Chatbot", "generateAnswer"),
+    "commitChat": ("Backend.Chatbot", "commitAnswer"),
+    "search": ("Backend.RealtimeSearchEngine", "realtimeSearchEngine"),
+    "prefetchSearch": ("Backend.RealtimeSearchEngine", "googleSearch"),
+    "automation": ("Backend.Automation", "executeCommand"),
+    "image": ("Backend.Pipeline", "startImageGeneration"),
+    "tts": ("Backend.TextToSpeech", "textToSpeech"),
+}
+
+backends = {}
+
+
+def getBackend(name):
+    """Return the function registered for a pipeline stage, importing it if needed."""
+    if name not in backends:
+        backends[name] = lazyFunction(*defaultBackends[name])
+    return backends[name]
+
+
+def useBackends(**overrides):
+    """Replace pipeline backends, e.g. useBackends(**standinBackends)."""
+    backends.update(overrides)
+
+
+class PipelineResult:
+    """Everything one query produced: the decision, per-task results and the merged reply."""
+
+    def __init__(self, query, decision, results, elapsed, degradations=()):
+        self.query = query
+        self.decision = decision
+        self.results = results
+        self.answer, self.speech = mergeResults(results)
+        self.exit = any(result.task.kind == "exit" for result in results)
+        self.elapsed = elapsed
+        self.degradations = list(degradations)  # see Backend/Deadline.py
+
+    def toDict(self):
+        return {
+            "query": self.query,
+            "decision": self.decision,
+            "answer": self.answer,
+            "speech": self.speech,
+            "elapsed": round(self.elapsed, 4),
+            "degradations": self.degradations,
+            "tasks": [
+                {
+                    "query": result.task.query,
+                    "kind": result.task.kind,
+                    "text": result.text,
+                    "elapsed": round(result.elapsed, 4),
+                    "error": str(result.error) if result.error else None,
+                }
+                for result in self.results
+            ],
+        }
+
+
+# Called as listener(event, job) for every image job (Backend/ImageGeneration.py) and
+# background job (Backend/Admission.py) event; kept here so the GUI can subscribe
+# without importing requests/PIL at startup
+jobListeners = []
+
+
+def addJobListener(listener):
+    jobListeners.append(listener)
+
+
+def notifyJobListeners(event, job):
+    for listener in jobListeners:
+        listener(event, job)
+
+
+# function to queue the image on the image worker pool
+def startImageGeneration(query):
+    from .ImageGeneration import submitImageJob
+
+    try:
+        job = submitImageJob(query, notifyJobListeners)
+        return (
+            f"Image generation started! Please wait... ({job.id})",
+            "I'm generating your image! It will open automatically when ready.",
+        )
+    except Exception as e:
+        error_msg = f"Error starting image generation: {e}"
+        print(error_msg)
+        return error_msg, "Sorry, there was an error generating the image."
+
+
+# Hidden voice commands answered without asking the decision model
+hiddenCommands = {
+    "start profiling": "profiler start",
+    "start the profiler": "profiler start",
+    "stop profiling": "profiler stop",
+    "stop the profiler": "profiler stop",
+    "profiler status": "profiler status",
+}
+
+
+def hiddenDecision(query):
+    command = hiddenCommands.get(QueryModifire(query).lower().rstrip(".?!"))
+    return [command] if command else None
+
+
+def startSpeculation(query):
+    """Start the likely handlers while firstLayerDMM is still classifying the query."""
+    speculation = Speculation(QueryModifire(query))
+    if isSpeculationEnabled("general"):
+        speculation.start("general", getBackend("draftChat"), QueryModifire(query))
+    if isSpeculationEnabled("realtime"):
+        speculation.start("realtime", getBackend("prefetchSearch"), QueryModifire(query))
+    return speculation
+
+
+def runChatTask(task, speculation, onStatus, onToken):
+    onStatus("Thinking...")
+    queryFinal = task.query.replace("general", "")
+    answer = speculation.claim("general", queryFinal)
+    if answer:
+        if onToken is not None:
+            onToken(answer)
+        return getBackend("commitChat")(QueryModifire(queryFinal), answer)
+    return getBackend("chat")(QueryModifire(queryFinal), onToken=onToken)
+
+
+def runSearchTask(task, speculation, onStatus, onToken):
+    onStatus("Searching...")
+    queryFinal = task.query.replace("realtime ", "")
+    return getBackend("search")(
+        QueryModifire(queryFinal),
+        searchResults=speculation.claim("realtime", queryFinal),
+        onToken=onToken,
+    )
+
+
+def runAutomationTask(task):
+    result = getBackend("automation")(task.query)
+    # Reminders and timers return a text response, other commands just confirm
+    if isinstance(result, str):
+        return result
+    return "Command executed!", "Done!"
+
+
+def runContentTask(task):
+    topic = task.query.replace("content ", "", 1)
+
+    def write():
+        getBackend("automation")(task.query)
+        return f"Content for '{topic}' is ready."
+
+    # Writing can take a while; it runs off the interactive path so the next command isn't blocked
+    job = runInBackground(task.query, write, onEvent=notifyJobListeners)
+    return (
+        f"Writing content for '{topic}' in the background... ({job.id})",
+        "I'm writing that now, it will open when it's ready.",
+    )
+
+
+def runImageTask(task, onStatus):
+    onStatus("Generating Image...")
+    return getBackend("image")(task.query)
+
+
+def runProfilerTask(task):
+    from .Profiler import profilerCommand
+
+    return profilerCommand(task.query)
+
+
+def runExitTask(task):
+    return getBackend("chat")(QueryModifire("Okay, Bye!"))
+
+
+def executeQuery(query, decision, speculation=None, onStatus=None, onToken=None, started=None):
+    """Run a classified decision and return a PipelineResult.
+
+    decision is a list or a stream of entries; each task starts when its entry
+    arrives. started (a time.perf_counter() value, by default now) is when the
+    query began, for the firstDispatch metric.
+    """
+    start = time.perf_counter()
+    started = started or start
+    speculation = speculation or Speculation(query)
+    onStatus = onStatus or (lambda status: None)
+    decided = []
+
+    def tokenSink(task):
+        if onToken is None:
+            return None
+        return lambda text: onToken(task.index, text)
+
+    def dispatch():
+        for entry in decision:
+            if not decided:
+                metrics.observeSince("firstDispatch", started)
+            decided.append(entry)
+            yield entry
+
+        print("")
+        print(f"Decision {decided}")
+        print("")
+
+    # Run every task of the decision concurrently; dependent ones wait for each other
+    handlers = {
+        "chat": lambda task: runChatTask(task, speculation, onStatus, tokenSink(task)),
+        "search": lambda task: runSearchTask(task, speculation, onStatus, tokenSink(task)),
+        "automation": runAutomationTask,
+        "reminder": runAutomationTask,
+        "content": runContentTask,
+        "image": lambda task: runImageTask(task, onStatus),
+        "exit": runExitTask,
+        "profiler": runProfilerTask,
+    }
+    results = executeDecision(dispatch(), handlers)
+    for result in results:
+        metrics.observe(f"task.{result.task.kind}", result.elapsed)
+        if result.error is not None:
+            metrics.count("errors", f"task.{result.task.kind}")
+
+    deadline = getDeadline()
+    degradations = deadline.degradations if deadline is not None else ()
+    return PipelineResult(query, decided, results, time.perf_counter() - start, degradations)
+
+
+def classifyQuery(query):
+    """Ask the decision model, or guess locally when the deadline leaves no time for it."""
+    if shouldDegrade("localDecision", "dmm", "chatFirstToken", "ttsSynthesis"):
+        # The router's command rules, and a chat answer for everything else
+        return routeDecision(query) or [f"general {query}"]
+
+    if streamingDecisions:
+        return streamDecision(query)
+
+    with metrics.timeStage("dmm"):
+        return getBackend("dmm")(query)
+
+
+def streamDecision(query):
+    """Yield the decision model's tasks as they are streamed; the whole stream is timed as dmm."""
+    with metrics.timeStage("dmm"):
+        yield from getBackend("dmmStream")(query)
+
+
+def processQuery(query, onStatus=None, onToken=None):
+    """Classify a text query with firstLayerDMM and execute every task it contains.
+
+    onStatus(status) receives status lines such as "Searching...", and
+    onToken(taskIndex, text) receives answer text as it is streamed. text is None
+    when the task's answer starts over (a retry after a failed completion) and the
+    text received for it so far should be discarded.
+    """
+    if onStatus is not None:
+        onStatus("Thinking...")
+
+    decision = hiddenDecision(query)
+    if decision is not None:
+        return executeQuery(query, decision, onStatus=onStatus)
+
+    with deadlineScope(), trace("processQuery", query=query):
+        # Plain commands and queries the local intent classifier is confident about
+        # are decided locally, with no decision model call or speculation
+        decision = routeQuery(query)
+        if decision is None:
+            decision = classifyIntent(query)
+        if decision is not None:
+            with metrics.timeStage("query"):
+                result = executeQuery(query, decision, onStatus=onStatus, onToken=onToken)
+            metrics.save()
+            return result
+
+        speculation = startSpeculation(query)
+        try:
+            with metrics.timeStage("query"):
+                started = time.perf_counter()
+                decision = classifyQuery(query)
+                return executeQuery(query, decision, speculation, onStatus, onToken, started)
+        finally:
+            speculation.discard()
+            metrics.save()
+            if isSpeculationEnabled():
+                print(speculationReport())
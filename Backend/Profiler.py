@@ -0,0 +1,199 @@
+# Backend/Profiler.py
+
+"""
+Sampling profiler that can be switched on while the assistant is running.
+
+A daemon thread reads the stack of every thread (GUI thread, FirstThread, backend
+loop and worker threads, reminder and timer workers) with sys._current_frames()
+every PROFILER_INTERVAL milliseconds and counts identical stacks. Stopping it
+writes Data/Profiles/profile-<time>.collapsed in the collapsed-stack format read by
+flamegraph.pl, speedscope and Perfetto:
+
+    MainThread;Main.py:FirstThread;Pipeline.py:processQuery;Model.py:firstLayerDMM 42
+
+Ways to turn it on and off:
+    - PROFILER=True in .env starts it with the assistant (PROFILER_SECONDS limits the run)
+    - the hidden voice commands "start profiling" / "stop profiling"
+    - the profiler signal (SIGUSR1, or Ctrl+Break / SIGBREAK on Windows) toggles it
+    - python -m Backend.Profiler --pid <pid> sends that signal to a running assistant
+    - GET /profiler/start and /profiler/stop on Backend/Server.py
+"""
+
+from .Config import env_vars
+import threading
+import argparse
+import signal
+import time
+import sys
+import os
+
+profilerEnabled = env_vars.get("PROFILER", "False") == "True"
+
+# Milliseconds between two samples (10 ms costs well under 1% CPU for a few threads)
+profilerInterval = float(env_vars.get("PROFILER_INTERVAL", "10")) / 1000
+
+# Stop automatically after this many seconds (0 runs until stopped)
+profilerSeconds = float(env_vars.get("PROFILER_SECONDS", "0"))
+
+profileDirectory = os.path.join("Data", "Profiles")
+
+# Deepest stack recorded, counted from the thread's entry point
+maxStackDepth = 128
+
+# Signal that toggles the profiler (SIGUSR1 on Linux/macOS, SIGBREAK on Windows)
+profilerSignal = getattr(signal, "SIGUSR1", None) or getattr(signal, "SIGBREAK", None)
+
+
+def frameName(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class SamplingProfiler:
+    """Counts the collapsed stacks of every thread at a fixed interval."""
+
+    def __init__(self, interval=profilerInterval):
+        self.interval = interval
+        self.stacks = {}  # "Thread;frame;frame" -> samples
+        self.samples = 0
+        self.started = None
+        self.thread = None
+        self.stopEvent = threading.Event()
+        self.lock = threading.RLock()  # also taken by the signal handler on the main thread
+
+    def isRunning(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, seconds=None):
+        """Start sampling; returns False if it was already running."""
+        with self.lock:
+            if self.isRunning():
+                return False
+            self.stacks = {}
+            self.samples = 0
+            self.started = time.time()
+            self.stopEvent.clear()
+            self.thread = threading.Thread(
+                target=self.run, args=(seconds or None,), name="SamplingProfiler", daemon=True
+            )
+            self.thread.start()
+        print("Sampling profiler started.")
+        return True
+
+    def stop(self):
+        """Stop sampling and write the collapsed stacks; returns the file path or None."""
+        with self.lock:
+            thread = self.thread
+            if thread is None:
+                return None
+            self.stopEvent.set()
+            self.thread = None
+        if thread is not threading.current_thread():
+            thread.join()
+        return self.write()
+
+    def toggle(self):
+        if self.isRunning():
+            return self.stop()
+        self.start(profilerSeconds)
+        return None
+
+    def run(self, seconds):
+        ownIdent = threading.get_ident()
+        deadline = time.monotonic() + seconds if seconds else None
+
+        while not self.stopEvent.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == ownIdent:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < maxStackDepth:
+                    stack.append(frameName(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"Thread-{ident}"))
+                key = ";".join(reversed(stack))
+                self.stacks[key] = self.stacks.get(key, 0) + 1
+            self.samples += 1
+
+            if deadline is not None and time.monotonic() >= deadline:
+                # Timed runs write their own file
+                with self.lock:
+                    if self.thread is threading.current_thread():
+                        self.thread = None
+                self.write()
+                return
+
+    def collapsed(self):
+        """Return the samples in collapsed-stack format, one stack per line."""
+        stacks = dict(self.stacks)
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items()))
+
+    def write(self):
+        if not self.samples:
+            return None
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started))
+        path = os.path.join(profileDirectory, f"profile-{stamp}.collapsed")
+        try:
+            os.makedirs(profileDirectory, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(self.collapsed())
+        except OSError as e:
+            print(f"Error writing profile: {e}")
+            return None
+        print(f"Profile with {self.samples} samples written to {path}")
+        return path
+
+
+profiler = SamplingProfiler()
+
+
+# function to run "profiler start" / "profiler stop" / "profiler status" commands
+def profilerCommand(command):
+    action = command.replace("profiler", "").strip()
+    if action == "start":
+        if profiler.start(profilerSeconds):
+            return "Profiler started.", "Profiling started."
+        return "The profiler is already running.", "The profiler is already running."
+    if action == "stop":
+        path = profiler.stop()
+        if path is None:
+            return "The profiler is not running.", "The profiler is not running."
+        return f"Profile saved to {path}", "Profile saved."
+    if profiler.isRunning():
+        return f"Profiler running, {profiler.samples} samples so far.", "The profiler is running."
+    return "The profiler is not running.", "The profiler is not running."
+
+
+def installProfilerSignal():
+    """Toggle the profiler on the profiler signal; call from the main thread."""
+    if profilerSignal is None:
+        return False
+    try:
+        signal.signal(profilerSignal, lambda signum, frame: profiler.toggle())
+    except ValueError:  # not the main thread
+        return False
+    return True
+
+
+def startFromSettings():
+    """Start the profiler if PROFILER=True in .env."""
+    if profilerEnabled:
+        profiler.start(profilerSeconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Toggle the sampling profiler of a running assistant.")
+    parser.add_argument("--pid", type=int, required=True, help="process id of Main.py or the server")
+    args = parser.parse_args()
+
+    # On Windows only console control events can be sent to another process
+    toggleSignal = signal.CTRL_BREAK_EVENT if os.name == "nt" else profilerSignal
+    if toggleSignal is None:
+        parser.error("this platform has no profiler signal; use the voice command or PROFILER=True")
+    os.kill(args.pid, toggleSignal)
+    print(f"Sent the profiler toggle signal to process {args.pid}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+# Backend/PromptBuilder.py
+
+"""
+Few-shot prompt builder for firstLayerDMM.
+
+Instead of sending every example turn with each request, the decision model gets
+the FEWSHOT_EXAMPLES examples of a larger bank (exampleBank in Backend/Model.py)
+that are most similar to the query. Similarity is the cosine of hashed word and
+character n-gram vectors (the features of Backend/IntentClassifier.py), looked up
+through an inverted index, which takes well under a millisecond. At least one
+multi-task example is always kept so compound queries are still split.
+
+The size of every request is recorded (promptBytes in Backend/Metrics.py), and
+
+    python -m Backend.PromptBuilder --compare
+
+runs a held-out query set through Cohere with the full and the selected examples
+and prints exact-match accuracy, latency and payload side by side.
+"""
+
+from collections import defaultdict
+from .Config import env_vars
+from .IntentClassifier import featureIndices
+import argparse
+import heapq
+import json
+import math
+import time
+
+# Examples sent with each decision request (0 sends the whole few-shot history).
+# Off by default until --compare has shown no accuracy drop against the full
+# history; 8 is the size to try first.
+fewShotExamples = int(env_vars.get("FEWSHOT_EXAMPLES", "0"))
+
+# Queries the selected prompt is checked against; none of them is in the example bank
+heldOutExamples = [
+    ("how is your day going?", ["general how is your day going?"]),
+    ("what is the capital of france?", ["general what is the capital of france?"]),
+    ("who won yesterday's cricket match?", ["realtime who won yesterday's cricket match?"]),
+    ("what's the price of bitcoin right now?", ["realtime what's the price of bitcoin right now?"]),
+    ("open spotify.", ["open spotify"]),
+    ("open notepad and calculator.", ["open notepad", "open calculator"]),
+    ("close chrome and spotify.", ["close chrome", "close spotify"]),
+    ("play shape of you.", ["play shape of you"]),
+    ("play the song believer on youtube.", ["play believer"]),
+    ("play chess with me.", ["general play chess with me."]),
+    ("play catch with my dog.", ["general play catch with my dog."]),
+    ("turn the volume up.", ["system volume up"]),
+    ("set a timer for 10 minutes.", ["set timer 10 minutes"]),
+    ("remind me at 7pm to take my medicine.", ["reminder 7pm take my medicine"]),
+    ("what timers do i have?", ["list timers"]),
+    ("write a leave application for tomorrow.", ["content leave application for tomorrow"]),
+    ("search google for python decorators.", ["google search python decorators"]),
+    ("search youtube for lofi music.", ["youtube search lofi music"]),
+    ("generate an image of a dragon.", ["generate image dragon"]),
+    ("open youtube and tell me about the latest iphone.", ["open youtube", "realtime tell me about the latest iphone"]),
+    ("goodbye, see you later.", ["exit"]),
+]
+
+
+def sparseVector(text):
+    """L2-normalised hashed n-gram counts of the text, as {feature: weight}."""
+    counts = defaultdict(float)
+    for index in featureIndices(text):
+        counts[index] += 1.0
+    norm = math.sqrt(sum(value * value for value in counts.values())) or 1.0
+    return {index: value / norm for index, value in counts.items()}
+
+
+def turnsToPairs(history):
+    return [(user["message"], chatbot["message"]) for user, chatbot in zip(history[::2], history[1::2])]
+
+
+def pairsToTurns(pairs):
+    turns = []
+    for query, decision in pairs:
+        turns.append({"role": "USER", "message": query})
+        turns.append({"role": "CHATBOT", "message": decision})
+    return turns
+
+
+def promptBytes(preamble, history, message):
+    """Size of the text a decision request sends."""
+    return len(json.dumps({"preamble": preamble, "chat_history": history, "message": message}).encode("utf-8"))
+
+
+class FewShotPromptBuilder:
+    """Picks the examples of a bank most similar to a query through an inverted index."""
+
+    def __init__(self, history, examples=fewShotExamples):
+        self.history = history
+        self.pairs = turnsToPairs(history)
+        self.examples = examples
+        self.index = defaultdict(list)  # feature -> [(example number, weight)]
+        for number, (query, _) in enumerate(self.pairs):
+            for feature, weight in sparseVector(query).items():
+                self.index[feature].append((number, weight))
+        # Examples answered with several tasks teach the model to split compound queries
+        self.compound = [number for number, (_, decision) in enumerate(self.pairs) if "," in decision]
+
+    def similarities(self, query):
+        scores = defaultdict(float)
+        for feature, weight in sparseVector(query).items():
+            for number, exampleWeight in self.index.get(feature, ()):
+                scores[number] += weight * exampleWeight
+        return scores
+
+    def select(self, query, examples=None):
+        """Numbers of the most similar examples, least similar first."""
+        examples = self.examples if examples is None else examples
+        scores = self.similarities(query)
+        chosen = heapq.nlargest(examples, range(len(self.pairs)), key=lambda number: scores.get(number, 0.0))
+        if self.compound and chosen and not any(number in self.compound for number in chosen):
+            chosen[-1] = max(self.compound, key=lambda number: scores.get(number, 0.0))
+        # The most similar example goes last, right before the query
+        return sorted(chosen, key=lambda number: scores.get(number, 0.0))
+
+    def chatHistory(self, query):
+        """The few-shot turns to send with the query."""
+        if self.examples <= 0 or self.examples >= len(self.pairs):
+            return self.history
+        return pairsToTurns([self.pairs[number] for number in self.select(query)])
+
+
+def compare(queries=heldOutExamples, examples=None):
+    """Run the held-out queries with the full and the selected examples (needs Cohere)."""
+    from .Model import streamTasks, chatHistory, preamble, exampleBank
+    from .Metrics import percentile
+
+    # With FEWSHOT_EXAMPLES off, try the size it would be turned on with
+    examples = examples or fewShotExamples or 8
+    selected = FewShotPromptBuilder(exampleBank, examples)
+    variants = {
+        "full": lambda query: chatHistory,
+        f"top {examples}": selected.chatHistory,
+    }
+    normalise = lambda tasks: [task.lower().rstrip(".").strip() for task in tasks]
+
+    print(f"{'Prompt':<10} {'Exact match':>12} {'p50 (ms)':>10} {'p95 (ms)':>10} {'Bytes':>8}")
+    for name, history in variants.items():
+        matches, latencies, sizes = 0, [], []
+        for query, expected in queries:
+            turns = history(query)
+            start = time.perf_counter()
+            try:
+                decision = list(streamTasks(query, turns))
+            except Exception as e:
+                print(f"Error classifying {query!r}: {e}")
+                decision = []
+            latencies.append(time.perf_counter() - start)
+            sizes.append(promptBytes(preamble, turns, query))
+            if normalise(decision) == normalise(expected):
+                matches += 1
+            else:
+                print(f"  {name}: {query!r} -> {decision} (expected {expected})")
+        print(
+            f"{name:<10} {matches / len(queries) * 100:>11.1f}% {percentile(latencies, 50) * 1000:>10.0f} "
+            f"{percentile(latencies, 95) * 1000:>10.0f} {sum(sizes) // len(sizes):>8}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show or check the few-shot examples sent to the decision model.")
+    parser.add_argument("--compare", action="store_true", help="compare full and selected examples on the held-out set")
+    parser.add_argument("--examples", type=int, default=None, help="examples to select for --compare (default 8 when off)")
+    parser.add_argument("query", nargs="*", help="show the examples selected for a query")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(examples=args.examples)
+    if args.query:
+        from .Model import promptBuilder, preamble, chatHistory
+
+        query = " ".join(args.query)
+        history = promptBuilder.chatHistory(query)
+        for turn in history:
+            print(f"{turn['role']:>8}: {turn['message']}")
+        print(
+            f"{len(history) // 2} examples, {promptBytes(preamble, history, query)} bytes "
+            f"(all {len(chatHistory) // 2} original examples: {promptBytes(preamble, chatHistory, query)} bytes)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,29 @@
 # Backend\RealtimeSearchEngine.py
 
 from googlesearch import search
-from json import dump, load
-from groq import Groq
 import datetime
-from dotenv import dotenv_values
+import time
+from .Config import env_vars
+from .Clients import getGroqClient
+from .Metrics import metrics
+from .Memory import limitMessages, chatContextMessages
+from .Deadline import shouldDegrade
+from .Conversation import conversation, contextMessages
 
-cnv_vars = dotenv_values(".env")
-
-userName = cnv_vars.get("USERNAME", "User")
-assistantName = cnv_vars.get("ASSISTANT_NAME", "Assistant")
-groqAPIKey = cnv_vars.get("GROQ_API_KEY")
-
-client = Groq(api_key=groqAPIKey)
+userName = env_vars.get("USERNAME", "User")
+assistantName = env_vars.get("ASSISTANT_NAME", "Assistant")
 
 system = f"""Hello, I am {userName}, You are a very accurate and advanced AI chatbot named {assistantName} which has real-time up-to-date information from the internet.
 *** Provide Answers In a Professional Way, make sure to add full stops, commas, question marks, and use proper grammar.***
 *** Just answer the question from the provided data in a professional way. ***"""
 
 
-# try to load the chat Log from json file
-try:
-    with open(r"Data\ChatLog.json", "r") as file:
-        messages = load(file)
-except:
-    with open(r"Data\ChatLog.json", "w") as file:
-        dump([], file)
-
 # function to perform Google search and format the results
 def googleSearch(query):
-    results = list(search(query, advanced=True, num_results=5))
+    # fewer results come back faster when the query is short on time
+    numResults = 2 if shouldDegrade("fewerSearchResults", "googleSearch", "searchFirstToken", "ttsSynthesis") else 5
+    with metrics.timeStage("googleSearch"):
+        results = list(search(query, advanced=True, num_results=numResults))
     answer = f"The search results for '{query}' are:\n[start]\n"
 
     for i in results:
@@ -71,23 +65,27 @@ def information():
     return data
 
 # function to handle realtime search and response generation
-def realtimeSearchEngine(prompt):
-    global systemChatBot, messages
+# searchResults can carry a googleSearch(prompt) result that was fetched ahead of time
+# onToken, if given, is called with each streamed piece of the answer
+def realtimeSearchEngine(prompt, searchResults=None, onToken=None):
 
-    # load the chat log from json file
-    with open(r"Data\ChatLog.json", "r") as f:
-        messages = load(f)
+    # the conversation so far (see Backend/Conversation.py)
+    messages = contextMessages()
     messages.append({"role": "user", "content": f"{prompt}"})
 
-    # add the Google search results to the system chatbot messages
-    systemChatBot.append({"role": "system", "content":googleSearch(prompt)})
+    # add the Google search results to a copy of the system chatbot messages
+    if searchResults is None:
+        searchResults = googleSearch(prompt)
+    searchMessages = systemChatBot + [{"role": "system", "content": searchResults}]
 
     # generate the response using Groq client
-    completion = client.chat.completions.create(
+    maxTokens = 512 if shouldDegrade("shortAnswer", "searchCompletion", "ttsSynthesis") else 2048
+    start = time.perf_counter()
+    completion = getGroqClient().chat.completions.create(
         model="llama3-70b-8192",
-        messages=systemChatBot + [{"role": "system", "content": information()}] + messages,
+        messages=searchMessages + [{"role": "system", "content": information()}] + limitMessages(messages, chatContextMessages),
         temperature=0.7,
-        max_tokens=2048,
+        max_tokens=maxTokens,
         top_p=1,
         stream=True,
         stop=None
@@ -98,18 +96,20 @@ def realtimeSearchEngine(prompt):
     # concatenate the response chunks from the streaming output
     for chunk in completion:
         if chunk.choices[0].delta.content:
+            if not answer:
+                metrics.observeSince("searchFirstToken", start)
             answer += chunk.choices[0].delta.content
+            if onToken is not None:
+                onToken(chunk.choices[0].delta.content)
+
+    metrics.observeSince("searchCompletion", start)
 
     # clean up the response
     answer = answer.strip().replace("</s>", "")
-    messages.append({"role": "assistant", "content": answer})
 
-    # save the updated chat log to json file
-    with open(r"Data\ChatLog.json", "w") as file:
-        dump(messages, file, indent=4)
+    # append the turn to the conversation journal
+    conversation.append({"role": "user", "content": f"{prompt}"}, {"role": "assistant", "content": answer})
 
-    # remoove the most recent system message from the chat log
-    systemChatBot.pop()
     return answerModifier(answer=answer)
 
 # main entry point for testing the realtime search engine
@@ -1,9 +1,14 @@
 import threading
 from datetime import datetime, timedelta
+import itertools
+import heapq
 import time
 import re
 import os
 import json
+from .Tracing import trace
+from .Runtime import runInThread
+from .Snapshot import registerSection, isRestored
 
 # Global storage for active reminders and timers
 active_reminders = []
@@ -16,6 +21,44 @@ TIMERS_FILE = os.path.join(os.getcwd(), "Data", "timers.json")
 # Ensure Data directory exists
 os.makedirs(os.path.dirname(REMINDERS_FILE), exist_ok=True)
 
+# One scheduler thread waits for every reminder and timer (instead of one sleeping
+# thread, and its stack, per reminder). Due notifications are spoken on the backend
+# worker pool, so a long or failing announcement never holds up the next one.
+scheduled = []  # heap of (due timestamp, sequence, worker, item)
+schedule_condition = threading.Condition()
+schedule_sequence = itertools.count()
+scheduler_thread = None
+
+
+def schedule_notification(due_time, worker, item):
+    """Run worker(item) on the backend worker pool once due_time (a datetime) is reached"""
+    global scheduler_thread
+    with schedule_condition:
+        heapq.heappush(scheduled, (due_time.timestamp(), next(schedule_sequence), worker, item))
+        if scheduler_thread is None:
+            scheduler_thread = threading.Thread(
+                target=scheduler_loop, name="ReminderScheduler", daemon=True
+            )
+            scheduler_thread.start()
+        schedule_condition.notify()
+
+
+def scheduler_loop():
+    """Wait for the earliest scheduled reminder or timer and hand it to its worker"""
+    while True:
+        with schedule_condition:
+            while True:
+                if scheduled:
+                    wait_seconds = scheduled[0][0] - time.time()
+                    if wait_seconds <= 0:
+                        break
+                    schedule_condition.wait(wait_seconds)
+                else:
+                    schedule_condition.wait()
+            _, _, worker, item = heapq.heappop(scheduled)
+
+        runInThread(worker, item)
+
 
 # JSON Storage Functions
 def save_reminders():
@@ -52,10 +95,8 @@ def load_reminders():
                     reminder_data["time"] = reminder_time
                     active_reminders.append(reminder_data)
 
-                    # Restart the reminder worker thread
-                    threading.Thread(
-                        target=reminder_worker, args=(reminder_data,), daemon=True
-                    ).start()
+                    # Schedule the reminder again
+                    schedule_notification(reminder_time, reminder_worker, reminder_data)
 
             # Save cleaned up reminders (remove past ones)
             save_reminders()
@@ -107,10 +148,8 @@ def load_timers():
                         timer_data["duration"] = int(remaining_seconds)
                         active_timers.append(timer_data)
 
-                        # Restart the timer worker thread
-                        threading.Thread(
-                            target=timer_worker, args=(timer_data,), daemon=True
-                        ).start()
+                        # Schedule the timer again
+                        schedule_notification(end_time, timer_worker, timer_data)
 
             # Save cleaned up timers (remove expired ones)
             save_timers()
@@ -120,10 +159,32 @@ def load_timers():
 
 def initialize_storage():
     """Initialize storage by loading existing reminders and timers"""
+    # Already rescheduled from Data/Snapshot.bin (see Backend/Snapshot.py)
+    if isRestored("scheduler"):
+        return
     load_reminders()
     load_timers()
 
 
+def capture_schedule():
+    """State of the scheduler queue for the warm-restart snapshot"""
+    return {"reminders": list(active_reminders), "timers": list(active_timers)}
+
+
+def restore_schedule(state):
+    """Reschedule the reminders and timers of the snapshot that are still due"""
+    global active_reminders, active_timers
+    current_time = datetime.now()
+    active_reminders = [r for r in state["reminders"] if r["time"] > current_time]
+    active_timers = [t for t in state["timers"] if t["end_time"] > current_time]
+
+    for reminder in active_reminders:
+        schedule_notification(reminder["time"], reminder_worker, reminder)
+    for timer in active_timers:
+        schedule_notification(timer["end_time"], timer_worker, timer)
+
+
+
 # Function to speak reminder/timer notifications
 def speak_notification(message):
     """Function to trigger text-to-speech for notifications"""
@@ -322,8 +383,8 @@ def set_reminder(command):
         # Save to JSON file
         save_reminders()
 
-        # Start reminder thread
-        threading.Thread(target=reminder_worker, args=(reminder,), daemon=True).start()
+        # Schedule the reminder
+        schedule_notification(target_time, reminder_worker, reminder)
 
         time_str = target_time.strftime("%I:%M %p on %B %d")
         return f"Reminder set! I'll remind you '{reminder_text}' at {time_str}"
@@ -361,8 +422,8 @@ def set_timer(command):
         # Save to JSON file
         save_timers()
 
-        # Start timer thread
-        threading.Thread(target=timer_worker, args=(timer,), daemon=True).start()
+        # Schedule the timer
+        schedule_notification(timer["end_time"], timer_worker, timer)
 
         # Format duration for response
         hours = duration_seconds // 3600
@@ -385,28 +446,26 @@ def set_timer(command):
 
 # Worker function for reminders
 def reminder_worker(reminder):
-    """Background worker that waits for reminder time and triggers notification"""
+    """Called by the scheduler at reminder time to trigger the notification"""
     try:
-        current_time = datetime.now()
-        wait_seconds = (reminder["time"] - current_time).total_seconds()
+        # Skip reminders that were cancelled in the meantime
+        if reminder not in active_reminders:
+            return
 
-        if wait_seconds > 0:
-            time.sleep(wait_seconds)
+        # Get username from environment
+        username = os.environ.get("USERNAME", "User")
 
-            # Get username from environment
-            username = os.environ.get("USERNAME", "User")
+        # Create notification message
+        time_str = reminder["time"].strftime("%I:%M %p")
+        message = f"{username}, it's {time_str}. {reminder['message']}"
 
-            # Create notification message
-            time_str = reminder["time"].strftime("%I:%M %p")
-            message = f"{username}, it's {time_str}. {reminder['message']}"
-
-            # Trigger notification
+        # Trigger notification
+        with trace("reminderWorker", reminder=reminder["message"]):
             speak_notification(message)
 
-            # Remove from active reminders
-            if reminder in active_reminders:
-                active_reminders.remove(reminder)
-                save_reminders()  # Update JSON file
+        # Remove from active reminders
+        if reminder in active_reminders:
+            active_reminders.remove(reminder)
 
         # Save reminders to JSON file
         save_reminders()
@@ -417,17 +476,19 @@ def reminder_worker(reminder):
 
 # Worker function for timers
 def timer_worker(timer):
-    """Background worker that waits for timer duration and triggers notification"""
+    """Called by the scheduler when the timer ends to trigger the notification"""
     try:
-        time.sleep(timer["duration"])
+        # Skip timers that were cancelled in the meantime
+        if timer not in active_timers:
+            return
 
         # Trigger notification
-        speak_notification("Your timer is up!")
+        with trace("timerWorker"):
+            speak_notification("Your timer is up!")
 
         # Remove from active timers
         if timer in active_timers:
             active_timers.remove(timer)
-            save_timers()  # Update JSON file
 
         # Save timers to JSON file
         save_timers()
@@ -505,5 +566,5 @@ def cancel_timer(timer_id=None):
         return f"All {count} timers cancelled."
 
 
-# Initialize storage when module is imported
-initialize_storage()
+# Keep the scheduler queue in the warm-restart snapshot (see Backend/Snapshot.py)
+registerSection("scheduler", capture_schedule, restore_schedule, sources=(REMINDERS_FILE, TIMERS_FILE))
@@ -0,0 +1,253 @@
+# Backend/Router.py
+
+"""
+Local fast path in front of firstLayerDMM.
+
+Plainly worded commands ("open telegram", "set a timer for 5 minutes", "mute",
+"list reminders", "remind me to call mom at 5:30pm") are recognised with a word
+trie over commandPhrases (the funcs of Backend/Model.py, worded as they are
+usually asked for) and a few compiled patterns, and answered in the
+decision-list format of firstLayerDMM without a network call. A query is only
+routed when every clause of it is recognised; anything else (questions, chat,
+unknown wording) still goes to the decision model. Apps are only opened or
+closed by a known name (knownApps, plus ROUTER_APPS), and "play" is only routed
+when the query says it is a song ("play the song believer", "play believer on
+youtube"); "play chess with me" or "play dead" go to the model.
+
+Routed and fallen-back queries are counted as cacheHits / cacheMisses for the
+"router" stage, and the decision-model time saved is recorded as routerSaved.
+ROUTER=False turns the fast path off.
+"""
+
+from .Config import env_vars
+from .Metrics import metrics
+from .Deadline import expectedSeconds
+import time
+import re
+
+routerEnabled = env_vars.get("ROUTER", "True") == "True"
+
+assistantName = str(env_vars.get("ASSISTANT_NAME") or "Jarvis").lower()
+
+# Command phrases -> (decision template, argument kind). Argument kinds:
+#   None       nothing may follow the phrase
+#   "names"    one or more known app or website names ("facebook and instagram")
+#   "song"     a title marked as a song ("the song let her go", "let her go on youtube")
+#   "text"     any non-empty text (search topic, image prompt)
+#   "duration" a timer duration such as "5 minutes" or "1 hour 30 minutes"
+#   "farewell" nothing but the assistant's name may follow
+commandPhrases = {
+    "open": ("open {}", "names"),
+    "launch": ("open {}", "names"),
+    "close": ("close {}", "names"),
+    "play": ("play {}", "song"),
+    "generate image": ("generate image {}", "text"),
+    "create image": ("generate image {}", "text"),
+    "create picture": ("generate image {}", "text"),
+    "make image": ("generate image {}", "text"),
+    "google search": ("google search {}", "text"),
+    "search google": ("google search {}", "text"),
+    "youtube search": ("youtube search {}", "text"),
+    "search youtube": ("youtube search {}", "text"),
+    "set timer": ("set timer {}", "duration"),
+    "start timer": ("set timer {}", "duration"),
+    "timer": ("set timer {}", "duration"),
+    "list reminders": ("list reminders", None),
+    "show reminders": ("list reminders", None),
+    "give reminders": ("list reminders", None),
+    "what are reminders": ("list reminders", None),
+    "list timers": ("list timers", None),
+    "show timers": ("list timers", None),
+    "what timers are running": ("list timers", None),
+    "mute": ("system mute", None),
+    "unmute": ("system unmute", None),
+    "volume up": ("system volume up", None),
+    "volume down": ("system volume down", None),
+    "increase volume": ("system volume up", None),
+    "decrease volume": ("system volume down", None),
+    "bye": ("exit", "farewell"),
+    "goodbye": ("exit", "farewell"),
+}
+
+# Words skipped inside a command phrase and in front of its argument
+fillerWords = {"a", "an", "the", "me", "my", "for", "of", "on", "showing", "all"}
+
+# Polite openings and endings around a command
+politeWords = {"please", "hey", "ok", "okay", "can", "could", "would", "will", "you", "jarvis", assistantName}
+
+# Apps and websites that "open" and "close" are routed for; other names go to the model
+knownApps = {
+    "chrome", "google chrome", "firefox", "edge", "microsoft edge", "brave", "opera",
+    "notepad", "calculator", "paint", "word", "excel", "powerpoint", "outlook", "teams",
+    "vs code", "vscode", "visual studio code", "file explorer", "settings", "control panel",
+    "task manager", "command prompt", "cmd", "powershell", "terminal", "camera", "photos",
+    "calendar", "clock", "spotify", "vlc", "zoom", "skype", "discord", "slack", "steam",
+    "telegram", "whatsapp", "facebook", "instagram", "twitter", "linkedin", "reddit",
+    "youtube", "gmail", "google", "google maps", "netflix", "amazon", "github",
+    "wikipedia", "chatgpt", "notion", "figma", "pycharm", "obs",
+}
+knownApps.update(
+    name.strip().lower() for name in str(env_vars.get("ROUTER_APPS") or "").split(",") if name.strip()
+)
+
+# Words that mark what follows "play" as a song, at the start or end of it
+songMarkers = {"song", "track"}
+
+# Words that start or end the rest of a sentence, not a song title ("play the song with me")
+notSongWords = {
+    "with", "it", "this", "that", "them", "him", "her", "us", "something", "anything",
+    "again", "along", "around", "outside", "game", "games", "music", "songs",
+}
+
+durationPattern = re.compile(r"^(?:\d+\s*(?:hours?|minutes?|mins?|seconds?|secs?)\s*(?:and\s*)?)+$")
+
+timePattern = r"\d{1,2}(?::\d{2})?\s*(?:am|pm)"
+reminderPatterns = [
+    re.compile(rf"^remind me (?:to )?(?P<message>.+?) at (?P<time>{timePattern})$"),
+    re.compile(rf"^remind me at (?P<time>{timePattern}) (?:to )?(?P<message>.+)$"),
+]
+
+
+# function to build the word trie of the command phrases
+def buildTrie(phrases):
+    root = {}
+    for phrase, command in phrases.items():
+        node = root
+        for word in phrase.split():
+            node = node.setdefault(word, {})
+        node["$"] = command
+    return root
+
+
+commandTrie = buildTrie(commandPhrases)
+
+def normalize(text):
+    text = re.sub(r"[^\w\s:']", " ", str(text).lower())
+    return text.split()
+
+
+def stripPolite(words):
+    start, end = 0, len(words)
+    while start < end and words[start] in politeWords:
+        start += 1
+    while end > start and words[end - 1] in politeWords:
+        end -= 1
+    return words[start:end]
+
+
+def matchPhrase(words):
+    """Walk the trie from the first word; returns (command, remaining words) or None."""
+    node, found = commandTrie, None
+    for index, word in enumerate(words):
+        if word in node:
+            node = node[word]
+            if "$" in node:
+                found = (node["$"], words[index + 1:])
+        elif word not in fillerWords:
+            break
+    return found
+
+
+def argumentWords(words):
+    while words and words[0] in fillerWords:
+        words = words[1:]
+    return words
+
+
+def songTitle(words):
+    """The title in "song let her go", "let her go song" or "let her go on youtube", else None."""
+    marked = False
+    if words[-2:] == ["on", "youtube"]:
+        words, marked = words[:-2], True
+    if words and words[0] in songMarkers:
+        words, marked = argumentWords(words[1:]), True
+    elif words and words[-1] in songMarkers:
+        words, marked = words[:-1], True
+    if not marked or not words or words[0] in notSongWords or words[-1] in notSongWords:
+        return None
+    return words
+
+
+def routeClause(words):
+    """Return the decisions of one clause, or None when it isn't confidently recognised."""
+    text = " ".join(words)
+    for pattern in reminderPatterns:
+        match = pattern.match(text)
+        if match:
+            return [f"reminder {match.group('time')} {match.group('message')}"]
+
+    found = matchPhrase(words)
+    if found is None:
+        return None
+    (template, kind), rest = found
+    argument = argumentWords(rest)
+
+    if kind is None:
+        return [template] if not argument else None
+    if kind == "farewell":
+        return [template] if set(rest) <= politeWords else None
+    if not argument:
+        return None
+    if kind == "text":
+        return [template.format(" ".join(argument))]
+    if kind == "song":
+        title = songTitle(argument)
+        return [template.format(" ".join(title))] if title else None
+    if kind == "duration":
+        duration = " ".join(argument)
+        return [template.format(duration)] if durationPattern.match(duration) else None
+
+    # "names": split "facebook and instagram" into one command per name
+    names = [" ".join(name.split()) for name in re.split(r"\band\b", " ".join(argument))]
+    if any(name not in knownApps for name in names):
+        return None
+    return [template.format(name) for name in names]
+
+
+def splitClauses(words):
+    """Split on commas (already removed) and on "and" when a new command follows it."""
+    clauses, current = [], []
+    for index, word in enumerate(words):
+        if word == "and" and index + 1 < len(words) and words[index + 1] in commandTrie and current:
+            clauses.append(current)
+            current = []
+        else:
+            current.append(word)
+    if current:
+        clauses.append(current)
+    return clauses
+
+
+def routeDecision(query):
+    """Return the decision list for a plainly worded command, or None to ask firstLayerDMM."""
+    decision = []
+    for part in str(query).split(","):
+        words = stripPolite(normalize(part))
+        if not words:
+            continue
+        for clause in splitClauses(words):
+            routed = routeClause(stripPolite(clause))
+            if routed is None:
+                return None
+            decision.extend(routed)
+    return decision or None
+
+
+def routeQuery(query):
+    """Route the query locally if possible, recording the hit rate and the time saved."""
+    if not routerEnabled:
+        return None
+
+    start = time.perf_counter()
+    decision = routeDecision(query)
+    elapsed = time.perf_counter() - start
+    metrics.observe("router", elapsed)
+
+    if decision is None:
+        metrics.count("cacheMisses", "router")
+        return None
+
+    saved = max(0.0, expectedSeconds("dmm") - elapsed)
+    metrics.count("cacheHits", "router")
+    metrics.observe("routerSaved", saved)
+    return decision
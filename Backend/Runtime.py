@@ -0,0 +1,90 @@
+# Backend/Runtime.py
+
+"""
+One long-lived asyncio event loop for the whole backend.
+
+The loop runs on its own daemon thread ("BackendLoop") and hosts the task graph,
+speculative requests, automation, TTS synthesis and the server. Other threads
+(the GUI, FirstThread, reminder workers) hand work to it with submit() or
+runSync() instead of creating and tearing down a loop per call with asyncio.run().
+Blocking SDK calls (Groq, Cohere, Selenium, ...) run on the loop's shared worker
+pool through asyncio.to_thread, so I/O from different subsystems overlaps.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from .Config import env_vars
+import contextvars
+import threading
+import asyncio
+
+# Worker threads used by asyncio.to_thread / run_in_executor on the backend loop
+runtimeThreads = int(env_vars.get("RUNTIME_THREADS", "32"))
+
+loop = None
+loopThread = None
+loopLock = threading.Lock()
+
+
+def getLoop():
+    """Return the backend event loop, starting its thread on first use."""
+    global loop, loopThread
+    with loopLock:
+        if loop is None:
+            newLoop = asyncio.new_event_loop()
+            newLoop.set_default_executor(
+                ThreadPoolExecutor(max_workers=runtimeThreads, thread_name_prefix="BackendWorker")
+            )
+            ready = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(newLoop)
+                newLoop.call_soon(ready.set)
+                newLoop.run_forever()
+
+            loopThread = threading.Thread(target=run, name="BackendLoop", daemon=True)
+            loopThread.start()
+            ready.wait()
+            loop = newLoop
+        return loop
+
+
+def isLoopThread():
+    """Return True when called from the backend loop's own thread."""
+    return loopThread is not None and threading.current_thread() is loopThread
+
+
+async def inContext(coroutine, context):
+    # Tasks created from another thread start with the loop's context; copy the
+    # caller's context variables (e.g. the active trace) into this task's own copy
+    for variable, value in context.items():
+        variable.set(value)
+    return await coroutine
+
+
+def submit(coroutine):
+    """Schedule a coroutine on the backend loop from any thread.
+
+    The coroutine sees the caller's context variables. Returns a
+    concurrent.futures.Future; cancelling it cancels the coroutine.
+    """
+    return asyncio.run_coroutine_threadsafe(
+        inContext(coroutine, contextvars.copy_context()), getLoop()
+    )
+
+
+def runSync(coroutine, timeout=None):
+    """Run a coroutine on the backend loop and block the calling thread for its result."""
+    if isLoopThread():
+        coroutine.close()
+        raise RuntimeError("runSync() called from the backend loop; await the coroutine instead")
+    return submit(coroutine).result(timeout)
+
+
+def callSoon(callback, *args):
+    """Call a plain function on the backend loop thread."""
+    return getLoop().call_soon_threadsafe(callback, *args)
+
+
+def runInThread(func, *args):
+    """Run a blocking function on the backend worker pool; returns a concurrent Future."""
+    return submit(asyncio.to_thread(func, *args))
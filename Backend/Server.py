@@ -0,0 +1,312 @@
+# Backend/Server.py
+
+"""
+Headless server exposing the query pipeline (firstLayerDMM -> automation / search / chat).
+
+    python -m Backend.Server [--host 127.0.0.1] [--port 8765] [--stub]
+
+HTTP:
+    POST /query      {"query": "open chrome and tell me about Elon Musk"}
+                     -> {"decision": [...], "answer": "...", "tasks": [...]}
+    GET  /health     -> {"status": "ok"}
+    GET  /metrics    -> per-stage latency histograms and counters (Prometheus text)
+    GET  /profiler/start, /profiler/stop, /profiler/status -> control the sampling profiler
+    GET  /images/<id> -> status of an image job started by a query
+    GET  /warmup     -> readiness of the warm-up components
+
+WebSocket (GET /ws):
+    send    {"id": "1", "query": "..."}   (or the bare query text)
+    receive {"type": "status", ...}, {"type": "token", ...} and finally {"type": "result", ...}
+            {"type": "reset", "task": n} means the tokens of task n so far are void (the
+            answer is being generated again)
+
+Each query runs on its own worker thread, so requests don't queue behind each other.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from .Config import env_vars
+from .Pipeline import processQuery, useBackends
+from .Metrics import metrics
+from .Profiler import installProfilerSignal, startFromSettings
+from .Memory import startMemoryReports
+from .Warmup import startWarmup, configuredComponents, warmup
+from .Runtime import submit
+import argparse
+import asyncio
+import base64
+import hashlib
+import itertools
+import json
+import struct
+
+serverHost = env_vars.get("SERVER_HOST", "127.0.0.1")
+serverPort = int(env_vars.get("SERVER_PORT", "8765"))
+serverWorkers = int(env_vars.get("SERVER_WORKERS", "64"))
+
+# Magic string from RFC 6455 used to answer the WebSocket handshake
+websocketGUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+statusMessages = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    500: "Internal Server Error",
+}
+
+# Worker threads that run the blocking pipeline (separate from the backend loop's
+# own pool, which the task graph uses, so queries can't starve their own tasks)
+executor = ThreadPoolExecutor(max_workers=serverWorkers, thread_name_prefix="Server")
+
+requestIds = itertools.count(1)
+
+
+async def runQuery(query, onStatus=None, onToken=None):
+    """Run processQuery on a worker thread and return its PipelineResult."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, processQuery, query, onStatus, onToken)
+
+
+async def readRequest(reader):
+    """Read one HTTP request; returns (method, path, headers, body) or None."""
+    requestLine = await reader.readline()
+    if not requestLine:
+        return None
+
+    method, path, _ = requestLine.decode("latin-1").split(" ", 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    body = b""
+    length = int(headers.get("content-length", "0"))
+    if length:
+        body = await reader.readexactly(length)
+    return method, path.split("?", 1)[0], headers, body
+
+
+async def sendResponse(writer, status, payload, contentType="application/json"):
+    if isinstance(payload, str):
+        body = payload.encode("utf-8")
+    else:
+        body = json.dumps(payload).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status} {statusMessages[status]}\r\n"
+        f"Content-Type: {contentType}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        "Connection: close\r\n\r\n"
+    )
+    writer.write(head.encode("latin-1") + body)
+    await writer.drain()
+
+
+def parseQuery(payload):
+    """Accept either {"query": "...", "id": ...} or the bare query text."""
+    text = payload.decode("utf-8") if isinstance(payload, bytes) else payload
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return text.strip(), None
+    if isinstance(data, dict):
+        return str(data.get("query", "")).strip(), data.get("id")
+    return str(data).strip(), None
+
+
+# WebSocket framing (RFC 6455)
+async def readFrame(reader):
+    header = await reader.readexactly(2)
+    opcode = header[0] & 0x0F
+    masked = header[1] & 0x80
+    length = header[1] & 0x7F
+
+    if length == 126:
+        length = struct.unpack("!H", await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack("!Q", await reader.readexactly(8))[0]
+
+    mask = await reader.readexactly(4) if masked else b""
+    payload = await reader.readexactly(length)
+    if masked:
+        payload = bytes(byte ^ mask[index % 4] for index, byte in enumerate(payload))
+    return opcode, payload
+
+
+def encodeFrame(payload, opcode=0x1):
+    header = bytes([0x80 | opcode])
+    length = len(payload)
+    if length < 126:
+        header += bytes([length])
+    elif length < 65536:
+        header += bytes([126]) + struct.pack("!H", length)
+    else:
+        header += bytes([127]) + struct.pack("!Q", length)
+    return header + payload
+
+
+async def handleWebSocket(reader, writer, headers):
+    key = headers.get("sec-websocket-key", "")
+    accept = base64.b64encode(hashlib.sha1((key + websocketGUID).encode()).digest()).decode()
+    writer.write(
+        (
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n"
+        ).encode("latin-1")
+    )
+    await writer.drain()
+
+    loop = asyncio.get_running_loop()
+    sendLock = asyncio.Lock()
+    running = set()
+
+    async def send(message):
+        async with sendLock:
+            writer.write(encodeFrame(json.dumps(message).encode("utf-8")))
+            await writer.drain()
+
+    def sendFromThread(message):
+        asyncio.run_coroutine_threadsafe(send(message), loop)
+
+    async def answer(query, requestId):
+        try:
+            await send({"type": "accepted", "id": requestId, "query": query})
+            result = await runQuery(
+                query,
+                onStatus=lambda status: sendFromThread({"type": "status", "id": requestId, "status": status}),
+                onToken=lambda task, text: sendFromThread(
+                    {"type": "reset", "id": requestId, "task": task}
+                    if text is None
+                    else {"type": "token", "id": requestId, "task": task, "text": text}
+                ),
+            )
+            await send({"type": "result", "id": requestId, **result.toDict()})
+        except ConnectionError:
+            pass
+        except Exception as e:
+            await send({"type": "error", "id": requestId, "error": str(e)})
+
+    try:
+        while True:
+            opcode, payload = await readFrame(reader)
+            if opcode == 0x8:  # close
+                writer.write(encodeFrame(b"", 0x8))
+                break
+            if opcode == 0x9:  # ping
+                writer.write(encodeFrame(payload, 0xA))
+                continue
+            if opcode != 0x1:
+                continue
+
+            query, requestId = parseQuery(payload)
+            requestId = requestId or str(next(requestIds))
+            if not query:
+                await send({"type": "error", "id": requestId, "error": "Empty query"})
+                continue
+
+            # Several queries can be in flight on one socket
+            task = asyncio.create_task(answer(query, requestId))
+            running.add(task)
+            task.add_done_callback(running.discard)
+    finally:
+        for task in running:
+            task.cancel()
+
+
+async def handleConnection(reader, writer):
+    try:
+        request = await readRequest(reader)
+        if request is None:
+            return
+        method, path, headers, body = request
+
+        if path == "/ws" and headers.get("upgrade", "").lower() == "websocket":
+            await handleWebSocket(reader, writer, headers)
+        elif path == "/health":
+            await sendResponse(writer, 200, {"status": "ok"})
+        elif path == "/warmup":
+            await sendResponse(writer, 200, warmup.status())
+        elif path == "/metrics":
+            await sendResponse(writer, 200, metrics.prometheusText(), "text/plain; version=0.0.4")
+        elif path.startswith("/profiler/"):
+            from .Profiler import profilerCommand
+
+            text, _ = profilerCommand("profiler " + path[len("/profiler/"):])
+            await sendResponse(writer, 200, {"profiler": text})
+        elif path.startswith("/images/"):
+            from .ImageGeneration import getImagePool
+
+            job = getImagePool().getJob(path[len("/images/"):])
+            if job is None:
+                await sendResponse(writer, 404, {"error": "Unknown image job"})
+            else:
+                await sendResponse(writer, 200, job.toDict())
+        elif path == "/query":
+            if method != "POST":
+                await sendResponse(writer, 405, {"error": "Use POST"})
+                return
+            query, _ = parseQuery(body)
+            if not query:
+                await sendResponse(writer, 400, {"error": "Missing query"})
+                return
+            result = await runQuery(query)
+            await sendResponse(writer, 200, result.toDict())
+        else:
+            await sendResponse(writer, 404, {"error": f"Unknown path {path}"})
+
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    except Exception as e:
+        print(f"Error handling request: {e}")
+        try:
+            await sendResponse(writer, 500, {"error": str(e)})
+        except Exception:
+            pass
+    finally:
+        writer.close()
+
+
+async def serve(host=serverHost, port=serverPort, ready=None):
+    """Run the server forever; ready (a threading.Event) is set once it is listening."""
+    server = await asyncio.start_server(handleConnection, host, port, limit=2**20)
+    print(f"Server listening on http://{host}:{port} (WebSocket: ws://{host}:{port}/ws)")
+    if ready is not None:
+        ready.set()
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the assistant pipeline as an HTTP/WebSocket server.")
+    parser.add_argument("--host", default=serverHost)
+    parser.add_argument("--port", type=int, default=serverPort)
+    parser.add_argument("--stub", action="store_true", help="use the offline stand-in backends")
+    parser.add_argument("--stub-latency", type=float, default=1.0, help="scale the stand-in latencies")
+    args = parser.parse_args()
+
+    installProfilerSignal()
+    startFromSettings()
+    startMemoryReports()
+
+    if args.stub:
+        from .Standins import standinBackends, configureStandins
+
+        configureStandins(scale=args.stub_latency)
+        useBackends(**standinBackends)
+    else:
+        # The server neither listens nor speaks, so only the network side is warmed
+        startWarmup([name for name in configuredComponents() if name not in ("speech", "audio")])
+
+    try:
+        # Serve on the shared backend event loop instead of a separate one
+        submit(serve(args.host, args.port)).result()
+    except KeyboardInterrupt:
+        print("\nServer stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+# Backend/Snapshot.py
+
+"""
+Warm-restart snapshot of in-memory state.
+
+Modules register the state they rebuild on every start as a section:
+
+    registerSection("scheduler", captureSchedule, restoreSchedule, sources=(REMINDERS_FILE, TIMERS_FILE))
+
+On shutdown every section is captured into Data/Snapshot.bin (one pickle). On
+start the file is memory-mapped and each section handed back to its restore
+function, so the JSON parsing and rebuilding is skipped. A section is only
+restored when its source files still have the size and modification time they
+had when it was captured; otherwise the module rebuilds it from the files as
+before. Sections of modules that are imported later (lazily) are restored when
+they register. SNAPSHOT=False turns this off.
+"""
+
+from .Config import env_vars
+from .Metrics import metrics
+import threading
+import atexit
+import pickle
+import mmap
+import time
+import os
+
+snapshotEnabled = env_vars.get("SNAPSHOT", "True") == "True"
+
+snapshotPath = os.path.join("Data", "Snapshot.bin")
+
+# File header; bump the version when a section changes its state layout
+snapshotMagic = b"JARVIS-SNAPSHOT-2\n"
+
+
+class SnapshotSection:
+    """Capture and restore functions for one piece of state and the files it is built from."""
+
+    def __init__(self, name, capture, restore, sources):
+        self.name = name
+        self.capture = capture
+        self.restore = restore
+        self.sources = tuple(sources)
+
+
+sections = {}
+pendingEntries = {}  # read from the snapshot, for sections not registered yet
+restoredSections = set()
+snapshotLock = threading.Lock()
+
+
+def fileSignature(path):
+    """(modification time, size) of a file, or None when it doesn't exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def sourcesSignature(sources):
+    return tuple(fileSignature(path) for path in sources)
+
+
+def applyEntry(section, entry):
+    if entry["signature"] != sourcesSignature(section.sources):
+        metrics.count("snapshotStale", section.name)
+        return False
+    try:
+        section.restore(entry["state"])
+    except Exception as e:
+        print(f"Error restoring {section.name} from the snapshot: {e}")
+        return False
+    restoredSections.add(section.name)
+    return True
+
+
+def registerSection(name, capture, restore, sources=()):
+    """Register state for the snapshot; restores it at once if the snapshot is already loaded."""
+    section = SnapshotSection(name, capture, restore, sources)
+    with snapshotLock:
+        sections[name] = section
+        entry = pendingEntries.pop(name, None)
+    if entry is not None:
+        applyEntry(section, entry)
+
+
+def isRestored(name):
+    """True when the section's state came from the snapshot."""
+    return name in restoredSections
+
+
+def saveSnapshot():
+    """Capture every section into Data/Snapshot.bin; returns the path or None."""
+    if not snapshotEnabled:
+        return None
+    with snapshotLock:
+        registered = list(sections.values())
+        # Sections whose module wasn't imported this run keep their previous state
+        entries = dict(pendingEntries)
+
+    for section in registered:
+        try:
+            signature = sourcesSignature(section.sources)
+            state = section.capture()
+            if state is not None:  # None: nothing current to save
+                entries[section.name] = {"signature": signature, "state": state}
+        except Exception as e:
+            print(f"Error capturing {section.name} for the snapshot: {e}")
+
+    temporaryPath = snapshotPath + ".tmp"
+    try:
+        os.makedirs(os.path.dirname(snapshotPath), exist_ok=True)
+        with open(temporaryPath, "wb") as file:
+            file.write(snapshotMagic)
+            pickle.dump(entries, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporaryPath, snapshotPath)
+    except Exception as e:
+        print(f"Error writing the snapshot: {e}")
+        return None
+    return snapshotPath
+
+
+def loadEntries():
+    with open(snapshotPath, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if mapped[: len(snapshotMagic)] != snapshotMagic:
+                return {}
+            with memoryview(mapped) as view, view[len(snapshotMagic):] as body:
+                return pickle.loads(body)
+
+
+def restoreSnapshot():
+    """Load Data/Snapshot.bin and restore the registered sections; returns their names."""
+    if not snapshotEnabled or not os.path.exists(snapshotPath):
+        return set()
+
+    start = time.perf_counter()
+    try:
+        entries = loadEntries()
+    except Exception as e:
+        print(f"Error reading the snapshot: {e}")
+        return set()
+
+    with snapshotLock:
+        ready = []
+        for name, entry in entries.items():
+            if name in sections:
+                ready.append((sections[name], entry))
+            else:
+                pendingEntries[name] = entry
+    for section, entry in ready:
+        applyEntry(section, entry)
+
+    metrics.observeSince("snapshotRestore", start)
+    return set(restoredSections)
+
+
+def installSnapshot():
+    """Restore the snapshot now and write a new one when the process exits."""
+    restored = restoreSnapshot()
+    atexit.register(saveSnapshot)
+    return restored
@@ -0,0 +1,113 @@
+# Backend/Speculation.py
+
+from .Config import env_vars
+from .Runtime import runInThread
+from .Metrics import metrics
+from .Tracing import span
+import threading
+import re
+
+# Which handlers to start before firstLayerDMM has decided: "general", "realtime",
+# "general,realtime" (or "True" for both). Anything else disables speculation.
+speculativeSetting = str(env_vars.get("SPECULATIVE_EXECUTION", "False")).lower()
+
+if speculativeSetting == "true":
+    speculativeKinds = {"general", "realtime"}
+else:
+    speculativeKinds = {
+        kind.strip() for kind in speculativeSetting.split(",")
+        if kind.strip() in ("general", "realtime")
+    }
+
+# Counters used to tune the speculative mode
+speculationStats = {
+    "started": 0,  # speculative requests submitted
+    "hits": 0,  # results used for the final answer
+    "misses": 0,  # decision matched the kind but not the query, or the request failed
+    "wasted": 0,  # requests that ran but whose result was thrown away
+    "cancelled": 0,  # requests cancelled before they started
+}
+statsLock = threading.Lock()
+
+
+def countStat(name, amount=1):
+    with statsLock:
+        speculationStats[name] += amount
+
+
+# function to normalise a query so the DMM's echo of it compares equal
+def normalizeQuery(query):
+    query = re.sub(r"[^\w\s']", " ", str(query).lower())
+    return " ".join(query.split())
+
+
+def isSpeculationEnabled(kind=None):
+    if kind is None:
+        return bool(speculativeKinds)
+    return kind in speculativeKinds
+
+
+class Speculation:
+    """Handlers started for one utterance while firstLayerDMM is still classifying it."""
+
+    def __init__(self, query):
+        self.query = normalizeQuery(query)
+        self.futures = {}
+
+    def start(self, kind, func, *args):
+        """Submit func(*args) as the speculative result for the given decision kind."""
+        if not isSpeculationEnabled(kind) or kind in self.futures:
+            return
+        started = threading.Event()
+
+        def run():
+            started.set()
+            with span(f"speculative.{kind}", "speculation"):
+                return func(*args)
+
+        # Runs on the backend loop's worker pool; cancelling drops it if not yet started
+        self.futures[kind] = (runInThread(run), started)
+        countStat("started")
+
+    def claim(self, kind, query):
+        """Return the speculative result for kind if it was computed for this query."""
+        if kind not in self.futures:
+            return None
+
+        if normalizeQuery(query) != self.query:
+            countStat("misses")
+            metrics.count("cacheMisses", f"speculative.{kind}")
+            return None
+
+        future, _ = self.futures.pop(kind)
+        try:
+            result = future.result()
+        except Exception as e:
+            print(f"Speculative {kind} request failed: {e}")
+            countStat("misses")
+            metrics.count("cacheMisses", f"speculative.{kind}")
+            return None
+
+        countStat("hits")
+        metrics.count("cacheHits", f"speculative.{kind}")
+        return result
+
+    def discard(self):
+        """Cancel or drop every speculative result that was not claimed."""
+        for kind, (future, started) in self.futures.items():
+            future.cancel()
+            countStat("wasted" if started.is_set() else "cancelled")
+        self.futures.clear()
+
+
+# function to summarise the hit rate and wasted requests
+def speculationReport():
+    with statsLock:
+        stats = dict(speculationStats)
+
+    hitRate = stats["hits"] / stats["started"] * 100 if stats["started"] else 0.0
+    return (
+        f"Speculation: {stats['hits']}/{stats['started']} hits ({hitRate:.1f}%), "
+        f"{stats['misses']} misses, {stats['wasted']} wasted, "
+        f"{stats['cancelled']} cancelled"
+    )
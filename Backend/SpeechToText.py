@@ -5,14 +5,24 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from webdriver_manager.chrome import ChromeDriverManager
-from dotenv import dotenv_values
+from .Config import env_vars
+from .AssistantState import assistantState
+import threading
 import os
 import mtranslate as mt
 
-env_vars = dotenv_values(".env")
 # Get the input language setting from the environment variables
 inputLanguage = env_vars.get("INPUT_LANGUAGE")
 
+# Keep recognising while the answer is spoken and stop it when the user talks
+bargeIn = env_vars.get("BARGE_IN", "False") == "True"
+
+# Seconds between two reads of the recognised text during playback
+bargeInPoll = 0.02
+
+# Share of recognised words found in the spoken answer for it to count as its echo
+echoOverlap = 0.6
+
 # Define the html code for a speech recognition interface
 htmlCode = """<!DOCTYPE html>
 <html lang="en">
@@ -56,10 +66,6 @@ htmlCode = str(htmlCode).replace(
     "recognition.lang = '';", f"recognition.lang = '{inputLanguage}';"
 )
 
-# Write the modified html code to a file
-with open(r"Data\Voice.html", "w") as f:
-    f.write(htmlCode)
-
 # get The current working directory
 currentDirectory = os.getcwd()
 # Generate the file path for html file
@@ -75,25 +81,51 @@ chromeOptions.add_argument("--headless-new")
 
 # Global variable to hold the driver
 driver = None
+driverLock = threading.RLock()
+
+# True when Voice.html was loaded ahead of time by the warm-up
+pageLoaded = False
+
+# True while the page is recognising (it keeps running from barge-in into the next query)
+listening = False
+
+# The thread watching the page during playback and its stop event
+bargeInWatcher = None
+
+
+# Function to write the speech recognition page used by the driver
+def writeVoiceHtml():
+    os.makedirs("Data", exist_ok=True)
+    with open(r"Data\Voice.html", "w") as f:
+        f.write(htmlCode)
 
 
 # Function to initialize the Chrome WebDriver only when needed
 def initialize_driver():
     global driver
-    if driver is None:
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=chromeOptions)
-    return driver
+    with driverLock:
+        if driver is None:
+            writeVoiceHtml()
+            service = Service(ChromeDriverManager().install())
+            driver = webdriver.Chrome(service=service, options=chromeOptions)
+        return driver
+
+
+# Function to launch Chrome and load the recognition page before the first query
+def warmUp():
+    global pageLoaded
+    with driverLock:
+        initialize_driver().get("file:///" + link)
+        pageLoaded = True
 
 
 # Define the path for temporary files
 temDirPath = rf"{currentDirectory}/Frontend/Files"
 
 
-# Function to set the assistant's status writing it to a file
+# Function to set the assistant's status shown in the GUI
 def setAssistantStatus(status):
-    with open(rf"{temDirPath}/Status.data", "w", encoding="utf-8") as f:
-        f.write(status)
+    assistantState.setStatus(status)
 
 
 # Function to modify a query To ensure proper punctuation and formatting
@@ -154,15 +186,88 @@ def universalTranslator(text):
     return englishTranslation.capitalize()
 
 
+# Function to open the recognition page and start recognising
+def startListening(current_driver):
+    global listening, pageLoaded
+    # Open the HTML file in the Chrome WebDriver (unless the warm-up already did)
+    if not pageLoaded:
+        current_driver.get("file:///" + link)
+    pageLoaded = False
+    # start the speech recognition process By clicking the start button
+    current_driver.find_element(by=By.ID, value="start").click()
+    listening = True
+
+
+# Function to tell the recognised text apart from the assistant hearing its own answer
+def isEcho(text, spokenText):
+    words = text.lower().split()
+    spokenWords = set(spokenText.lower().replace(".", " ").replace(",", " ").split())
+    if not words:
+        return True
+    return sum(word.strip(".,?!") in spokenWords for word in words) / len(words) >= echoOverlap
+
+
+# Function to listen while an answer is spoken; the user's speech interrupts playback
+def startBargeInListener(spokenText):
+    global bargeInWatcher
+    if not bargeIn or bargeInWatcher is not None:
+        return False
+
+    current_driver = initialize_driver()
+    if not listening:
+        startListening(current_driver)
+    stopEvent = threading.Event()
+
+    def watch():
+        while not stopEvent.wait(bargeInPoll):
+            try:
+                text = current_driver.find_element(by=By.ID, value="output").text
+            except Exception:
+                continue
+            if not text:
+                continue
+            if isEcho(text, spokenText):
+                current_driver.execute_script("document.getElementById('output').textContent = '';")
+                continue
+            # The text stays on the page and becomes the next query
+            captured.set()
+            assistantState.interruptSpeech("speech")
+            return
+
+    captured = threading.Event()
+    thread = threading.Thread(target=watch, name="BargeInListener", daemon=True)
+    bargeInWatcher = (thread, stopEvent, captured)
+    thread.start()
+    return True
+
+
+# Function to stop watching the page once playback is over; recognition only keeps
+# running when the user's speech was captured, so it becomes the next query at once
+def stopBargeInListener():
+    global bargeInWatcher, listening
+    if bargeInWatcher is None:
+        return
+    thread, stopEvent, captured = bargeInWatcher
+    stopEvent.set()
+    thread.join()
+    bargeInWatcher = None
+    if not captured.is_set():
+        try:
+            driver.find_element(by=By.ID, value="end").click()
+        except Exception as e:
+            print(f"Error stopping barge-in recognition: {e}")
+        listening = False
+
+
 # Function to perform speech recognition using the Chrome WebDriver
 def speechRecognition():
+    global listening
     # Initialize the driver if not already done
     current_driver = initialize_driver()
 
-    # Open the HTML file in the Chrome WebDriver
-    current_driver.get("file:///" + link)
-    # start the speech recognition process By clicking the start button
-    current_driver.find_element(by=By.ID, value="start").click()
+    # Reuse the page if it has been recognising since the last answer (barge-in)
+    if not listening:
+        startListening(current_driver)
 
     while True:
         try:
@@ -172,6 +277,7 @@ def speechRecognition():
             if text:
                 # Stop recognising by clicking the stop button
                 current_driver.find_element(by=By.ID, value="end").click()
+                listening = False
 
                 # If the input language is English, return the modified query
                 if inputLanguage.lower() == "en" or "en" in inputLanguage.lower():
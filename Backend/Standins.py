@@ -0,0 +1,181 @@
+# Backend/Standins.py
+
+"""
+Offline stand-ins for the network backends (Cohere, Groq, Google search, edge-tts,
+Hugging Face and the automation side effects), with configurable latency and jitter.
+They record the same metrics stages as the real backends (see Backend/Metrics.py).
+
+Use them through Backend/Pipeline.py:
+
+    from Backend.Pipeline import useBackends
+    from Backend.Standins import standinBackends
+    useBackends(**standinBackends)
+"""
+
+from .Metrics import metrics
+import random
+import time
+import re
+
+# Base latency in seconds for each stand-in stage
+standinLatency = {
+    "dmm": 0.35,
+    "chat": 0.8,
+    "search": 0.4,
+    "automation": 0.05,
+    "image": 0.1,
+    "tts": 0.3,
+}
+
+# Relative jitter applied to every delay (0.2 means +/- 20%)
+standinJitter = 0.2
+
+# Delay between streamed tokens, as a share of the stage latency
+tokenShare = 0.5
+
+
+def configureStandins(latency=None, jitter=None, scale=None):
+    """Change stand-in latencies (seconds per stage), jitter, or scale them all."""
+    global standinJitter
+    if latency:
+        standinLatency.update(latency)
+    if jitter is not None:
+        standinJitter = jitter
+    if scale is not None:
+        for stage in standinLatency:
+            standinLatency[stage] *= scale
+
+
+def standinDelay(stage):
+    """Return a jittered delay for the stage."""
+    base = standinLatency.get(stage, 0.0)
+    return max(0.0, base * (1 + random.uniform(-standinJitter, standinJitter)))
+
+
+# Keyword rules the stand-in decision model uses to answer like firstLayerDMM
+standinRules = [
+    (r"^(?:please )?open (.+)", "open {0}"),
+    (r"^(?:please )?close (.+)", "close {0}"),
+    (r"^(?:please )?play (.+)", "play {0}"),
+    (r"^(?:please )?(mute|unmute|volume up|volume down|shutdown)\b", "system {0}"),
+    (r"\btimer (?:for )?(.+)", "set timer {0}"),
+    (r"\bremind me (?:to )?(.+)", "reminder {0}"),
+    (r"\b(?:list|show|what are) (?:me )?(?:my )?reminders", "list reminders"),
+    (r"\b(?:list|show|what) (?:my )?timers", "list timers"),
+    (r"\b(?:generate|create|make) (?:an? )?(?:image|picture) (?:of |showing )?(.+)", "generate image {0}"),
+    (r"\b(?:write|draft) (?:an? )?(.+)", "content {0}"),
+    (r"^(?:search|google) (?:google )?(?:for )?(.+)", "google search {0}"),
+    (r"\b(?:bye|goodbye)\b", "exit"),
+    (r"\b(?:who is|news|latest|today's|current|price of|weather)\b", "realtime {query}"),
+]
+compiledRules = [(re.compile(pattern), template) for pattern, template in standinRules]
+
+
+def standinDecision(prompt):
+    """Classify a query with the stand-in keyword rules (no delay)."""
+    decision = []
+    for part in re.split(r",| and (?=open|close|play|set|remind|tell|generate)", prompt.lower()):
+        part = part.strip().rstrip(".?!")
+        if not part:
+            continue
+        for pattern, template in compiledRules:
+            match = pattern.search(part)
+            if match:
+                decision.append(template.format(*match.groups(), query=part).strip())
+                break
+        else:
+            decision.append(f"general {part}")
+    return decision or [f"general {prompt}"]
+
+
+def standinFirstLayerDMM(prompt="test"):
+    time.sleep(standinDelay("dmm"))
+    return standinDecision(prompt)
+
+
+def standinFirstLayerDMMStream(prompt="test"):
+    """Yield the stand-in decision task by task, spread over the decision model's latency."""
+    decision = standinDecision(prompt)
+    total = standinDelay("dmm")
+    for task in decision:
+        time.sleep(total / len(decision))
+        yield task
+
+
+def standinStream(stage, answer, onToken=None, metricName="chat"):
+    """Sleep for the stage latency, streaming the answer word by word on the way."""
+    words = answer.split(" ")
+    total = standinDelay(stage)
+    firstToken = total * (1 - tokenShare)
+    perToken = total * tokenShare / max(len(words), 1)
+
+    start = time.perf_counter()
+    time.sleep(firstToken)
+    for index, word in enumerate(words):
+        time.sleep(perToken)
+        if index == 0:
+            metrics.observeSince(f"{metricName}FirstToken", start)
+        if onToken is not None:
+            onToken(word if index == 0 else " " + word)
+    metrics.observeSince(f"{metricName}Completion", start)
+    return answer
+
+
+def standinGenerateAnswer(query, onToken=None):
+    return standinStream("chat", f"This is a stand-in answer to: {query.strip()}", onToken)
+
+
+def standinCommitAnswer(query, answer):
+    return answer
+
+
+def standinChatBot(query, max_retries=3, onToken=None):
+    return standinGenerateAnswer(query, onToken)
+
+
+def standinGoogleSearch(query):
+    with metrics.timeStage("googleSearch"):
+        time.sleep(standinDelay("search"))
+    return f"The search results for '{query}' are:\n[start]\nTitle: Stand-in result\nDescription: {query}\n\n[end]"
+
+
+def standinRealtimeSearchEngine(prompt, searchResults=None, onToken=None):
+    if searchResults is None:
+        searchResults = standinGoogleSearch(prompt)
+    return standinStream("chat", f"This is a stand-in search answer to: {prompt.strip()}", onToken, "search")
+
+
+def standinExecuteCommand(command):
+    time.sleep(standinDelay("automation"))
+    # Reminder and timer commands reply with text like the real ones do
+    if command.startswith(("reminder", "remind me", "set timer", "timer for")):
+        return f"Stand-in: {command} scheduled."
+    if command.startswith(("list reminders", "list timers")):
+        return "You have no active reminders."
+    return True
+
+
+def standinImageGeneration(query):
+    time.sleep(standinDelay("image"))
+    return "Image generation started! Please wait...", "I'm generating your image!"
+
+
+def standinTextToSpeech(text, func=lambda r=None: True):
+    with metrics.timeStage("ttsSynthesis"):
+        time.sleep(standinDelay("tts"))
+    return True
+
+
+# Pipeline backends backed by the stand-ins (see Backend/Pipeline.py)
+standinBackends = {
+    "dmm": standinFirstLayerDMM,
+    "dmmStream": standinFirstLayerDMMStream,
+    "chat": standinChatBot,
+    "draftChat": standinGenerateAnswer,
+    "commitChat": standinCommitAnswer,
+    "search": standinRealtimeSearchEngine,
+    "prefetchSearch": standinGoogleSearch,
+    "automation": standinExecuteCommand,
+    "image": standinImageGeneration,
+    "tts": standinTextToSpeech,
+}
@@ -0,0 +1,171 @@
+# Backend/Startup.py
+
+"""
+Lazy loading of backend functions and the --profile-startup report.
+
+lazyFunction("Backend.Model", "firstLayerDMM") returns a callable that imports the
+module on its first call, so heavy dependencies (cohere, groq, selenium, pygame,
+edge_tts, ...) are only loaded when a feature is actually used.
+
+With the profiler enabled every import is timed, and the first call of each lazy
+function is recorded, so the cost of reaching "Available..." can be measured.
+"""
+
+import importlib
+import threading
+import time
+import sys
+
+
+class TimedLoader:
+    """Wraps a module loader to time how long executing the module takes."""
+
+    def __init__(self, loader, profiler, name):
+        self._loader = loader
+        self._profiler = profiler
+        self._name = name
+
+    def __getattr__(self, attribute):
+        return getattr(self._loader, attribute)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._profiler.enterImport(self._name)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler.exitImport(self._name)
+
+
+class StartupProfiler:
+    """Collects per-module import times, first-use costs and startup milestones."""
+
+    def __init__(self):
+        self.enabled = False
+        self.started = time.perf_counter()
+        self.imports = {}  # module -> [total seconds, self seconds]
+        self.firstUses = {}  # "module.function" -> (import seconds, first call seconds)
+        self.milestones = {}  # name -> seconds since start
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    # import hook (sys.meta_path finder)
+    def find_spec(self, name, path=None, target=None):
+        if getattr(self.local, "finding", False):
+            return None
+
+        self.local.finding = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(name, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self.local.finding = False
+
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = TimedLoader(spec.loader, self, name)
+        return spec
+
+    def enterImport(self, name):
+        stack = self.local.__dict__.setdefault("stack", [])
+        stack.append([name, time.perf_counter(), 0.0])
+
+    def exitImport(self, name):
+        stack = self.local.stack
+        _, start, childTime = stack.pop()
+        total = time.perf_counter() - start
+        if stack:
+            stack[-1][2] += total
+        with self.lock:
+            self.imports[name] = [total, total - childTime]
+
+    def enable(self):
+        """Start timing imports; call this before the modules of interest are imported."""
+        if not self.enabled:
+            self.enabled = True
+            sys.meta_path.insert(0, self)
+
+    def recordFirstUse(self, name, importSeconds, callSeconds):
+        with self.lock:
+            self.firstUses[name] = (importSeconds, callSeconds)
+        if self.enabled:
+            print(
+                f"[startup] first use of {name}: import {importSeconds * 1000:.1f} ms, "
+                f"first call {callSeconds * 1000:.1f} ms"
+            )
+
+    def mark(self, milestone):
+        """Record the time since process start at which a milestone was reached."""
+        with self.lock:
+            if milestone not in self.milestones:
+                self.milestones[milestone] = time.perf_counter() - self.started
+
+    def report(self, limit=25):
+        """Return the import-time, first-use and milestone tables as text."""
+        with self.lock:
+            imports = sorted(self.imports.items(), key=lambda item: item[1][0], reverse=True)
+            firstUses = sorted(self.firstUses.items(), key=lambda item: sum(item[1]), reverse=True)
+            milestones = sorted(self.milestones.items(), key=lambda item: item[1])
+
+        lines = ["", "Startup profile", f"{'Module':<45} {'Import (ms)':>12} {'Self (ms)':>10}"]
+        for name, (total, own) in imports[:limit]:
+            lines.append(f"{name:<45} {total * 1000:>12.1f} {own * 1000:>10.1f}")
+
+        if firstUses:
+            lines += ["", f"{'First use':<45} {'Import (ms)':>12} {'Call (ms)':>10}"]
+            for name, (importSeconds, callSeconds) in firstUses:
+                lines.append(f"{name:<45} {importSeconds * 1000:>12.1f} {callSeconds * 1000:>10.1f}")
+
+        if milestones:
+            lines += ["", f"{'Milestone':<45} {'Since start (ms)':>23}"]
+            for name, seconds in milestones:
+                lines.append(f"{name:<45} {seconds * 1000:>23.1f}")
+
+        return "\n".join(lines)
+
+
+startupProfiler = StartupProfiler()
+
+
+def lazyFunction(moduleName, attribute):
+    """Return a stand-in for moduleName.attribute that imports the module on first call."""
+    state = {"function": None}
+    lock = threading.Lock()
+
+    def loader(*args, **kwargs):
+        function = state["function"]
+        if function is not None:
+            return function(*args, **kwargs)
+
+        with lock:
+            if state["function"] is None:
+                start = time.perf_counter()
+                module = importlib.import_module(moduleName)
+                state["function"] = getattr(module, attribute)
+                importSeconds = time.perf_counter() - start
+                firstCall = True
+            else:
+                firstCall = False
+
+        if not firstCall:
+            return state["function"](*args, **kwargs)
+
+        start = time.perf_counter()
+        try:
+            return state["function"](*args, **kwargs)
+        finally:
+            startupProfiler.recordFirstUse(
+                f"{moduleName}.{attribute}", importSeconds, time.perf_counter() - start
+            )
+
+    loader.__name__ = attribute
+    loader.__qualname__ = attribute
+    loader.__doc__ = f"Lazily imported {moduleName}.{attribute}."
+    return loader
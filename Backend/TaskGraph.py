@@ -0,0 +1,227 @@
+# Backend/TaskGraph.py
+
+from .Config import env_vars
+from .Runtime import callSoon
+from .Tracing import span
+from .Admission import admission, taskPriority
+import contextvars
+import threading
+import asyncio
+import time
+
+# Upper bound on tasks from one decision that run at the same time. Tasks run on the
+# backend loop's shared worker pool (Backend/Runtime.py), so concurrent queries
+# (server mode) don't queue behind each other; each graph enforces its own limit.
+maxParallelTasks = int(env_vars.get("MAX_PARALLEL_TASKS", "4"))
+
+# Decision prefixes handled by Backend/Automation.py
+automationPrefixes = [
+    "open",
+    "close",
+    "play",
+    "system",
+    "content",
+    "google search",
+    "youtube search",
+]
+
+# Decision prefixes that read or change the reminder and timer lists
+reminderPrefixes = [
+    "reminder",
+    "remind me",
+    "set timer",
+    "timer for",
+    "list reminders",
+    "list timers",
+    "cancel reminder",
+    "cancel timer",
+]
+
+# Task kinds that share the conversation (Backend/Conversation.py) and must see each other's turns
+conversationKinds = {"chat", "search"}
+
+
+# function to decide which handler runs a single decision entry
+def taskKind(query):
+    if query.startswith("general"):
+        return "chat"
+    if query.startswith("realtime"):
+        return "search"
+    if query.startswith("exit"):
+        return "exit"
+    if query.startswith("profiler"):
+        return "profiler"
+    if query.startswith("content"):
+        return "content"
+    if "generate" in query:
+        return "image"
+    if any(query.startswith(prefix) for prefix in reminderPrefixes):
+        return "reminder"
+    if any(query.startswith(prefix) for prefix in automationPrefixes):
+        return "automation"
+    return None
+
+
+class Task:
+    """One entry of a decision list together with the tasks it has to wait for."""
+
+    def __init__(self, index, kind, query, dependsOn=()):
+        self.index = index
+        self.kind = kind
+        self.query = query
+        self.dependsOn = set(dependsOn)
+
+    def __repr__(self):
+        return f"Task({self.index}, {self.kind!r}, {self.query!r}, dependsOn={sorted(self.dependsOn)})"
+
+
+class TaskResult:
+    """Output of a finished task: the text to show and the text to speak."""
+
+    def __init__(self, task, text="", speech=None, error=None, elapsed=0.0):
+        self.task = task
+        self.text = text
+        self.speech = text if speech is None else speech
+        self.error = error
+        self.elapsed = elapsed
+
+
+class TaskGraphBuilder:
+    """Turns decision entries into tasks, adding the edges between dependent ones."""
+
+    def __init__(self):
+        self.index = 0
+        self.lastByGroup = {}
+        self.allTasks = []
+
+    def add(self, query):
+        """Create the task for one decision entry, or None if nothing handles it."""
+        kind = taskKind(query)
+        if kind is None:
+            print(f"No task found for {query}")
+            return None
+
+        dependsOn = set()
+        if kind == "exit":
+            # Say goodbye only after everything else has finished
+            dependsOn.update(self.allTasks)
+        else:
+            # Chat and search both append to the chat log and reminders share one list,
+            # so tasks in those groups run in decision order
+            group = "conversation" if kind in conversationKinds else kind
+            if group in ("conversation", "reminder") and group in self.lastByGroup:
+                dependsOn.add(self.lastByGroup[group])
+            self.lastByGroup[group] = self.index
+
+        task = Task(self.index, kind, query, dependsOn)
+        self.allTasks.append(self.index)
+        self.index += 1
+        return task
+
+
+# function to turn a whole decision list into tasks
+def buildTaskGraph(decision):
+    builder = TaskGraphBuilder()
+    tasks = [builder.add(query) for query in decision]
+    return [task for task in tasks if task is not None]
+
+
+class TaskGraphExecutor:
+    """Runs tasks on the backend event loop as soon as the tasks they depend on are done."""
+
+    def __init__(self, handlers, onResult=None, maxWorkers=None):
+        self.handlers = handlers
+        self.onResult = onResult
+        self.maxWorkers = maxWorkers or maxParallelTasks
+        self.condition = threading.Condition()
+        self.semaphore = None
+        self.futures = {}  # task index -> asyncio.Task, only touched on the loop thread
+        self.added = 0
+        self.results = {}
+
+    def add(self, task):
+        """Schedule a task from any thread; it starts once all of its dependencies have finished."""
+        with self.condition:
+            self.added += 1
+        # Run the task in the caller's context so context variables follow it
+        callSoon(contextvars.copy_context().run, self._schedule, task)
+
+    def _schedule(self, task):
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.maxWorkers)
+        self.futures[task.index] = asyncio.ensure_future(self._run(task))
+
+    async def _run(self, task):
+        dependencies = [self.futures[index] for index in task.dependsOn if index in self.futures]
+        if dependencies:
+            await asyncio.wait(dependencies)
+
+        try:
+            # The graph's own limit, then a slot shared by all queries (system commands first)
+            async with self.semaphore, admission.slot(taskPriority(task.kind, task.query)):
+                result = await asyncio.to_thread(self._execute, task)
+        except asyncio.CancelledError:
+            result = TaskResult(task, "", error=asyncio.CancelledError("cancelled"))
+
+        with self.condition:
+            self.results[task.index] = result
+            self.condition.notify_all()
+
+    def _execute(self, task):
+        start = time.perf_counter()
+        try:
+            handler = self.handlers[task.kind]
+            with span(f"task.{task.kind}", "task", query=task.query, index=task.index):
+                output = handler(task)
+            if isinstance(output, tuple):
+                text, speech = output
+            else:
+                text, speech = output, None
+            result = TaskResult(task, text or "", speech, elapsed=time.perf_counter() - start)
+        except Exception as e:
+            print(f"Error running {task.query}: {e}")
+            result = TaskResult(
+                task,
+                f"Sorry, I couldn't complete '{task.query}'.",
+                error=e,
+                elapsed=time.perf_counter() - start,
+            )
+
+        if self.onResult is not None:
+            try:
+                self.onResult(result)
+            except Exception as e:
+                print(f"Error in task result callback: {e}")
+
+        return result
+
+    def wait(self, timeout=None):
+        """Block until every added task has finished and return results in decision order."""
+        with self.condition:
+            self.condition.wait_for(lambda: len(self.results) == self.added, timeout)
+            return [self.results[index] for index in sorted(self.results)]
+
+
+# function to run a decision and return the ordered results; the decision may be a
+# stream of entries (see firstLayerDMMStream), each task starts as soon as it arrives
+def executeDecision(decision, handlers, onResult=None, maxWorkers=None):
+    graph = TaskGraphExecutor(handlers, onResult, maxWorkers)
+    builder = TaskGraphBuilder()
+    for query in decision:
+        task = builder.add(query)
+        if task is not None:
+            graph.add(task)
+    return graph.wait()
+
+
+# function to merge ordered task results into one response to show and one to speak
+def mergeResults(results):
+    texts = []
+    speeches = []
+    for result in results:
+        if result.text and result.text not in texts:
+            texts.append(result.text)
+        if result.speech and result.speech not in speeches:
+            speeches.append(result.speech)
+
+    return "\n".join(texts), " ".join(speeches)
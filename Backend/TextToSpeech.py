@@ -2,14 +2,21 @@
 
 import pygame 
 import random
-import asyncio
+import time
 import edge_tts
 import os
-from dotenv import dotenv_values
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from .Config import env_vars
+from .Runtime import submit
+from .Metrics import metrics
+from .Deadline import shouldDegrade
+from .AssistantState import assistantState
 
-env_vars = dotenv_values(".env")
 assistantVoice = env_vars.get("ASSISTANT_VOICE")
 
+# Seconds between two checks for a barge-in while synthesising or playing
+interruptPoll = 0.02
+
 # Asynchronous function to convert text into audio file
 async def textToAudioFile(text) -> None:
     filePath = r"Data\speech.mp3" # Define the path where speech file will be saved
@@ -21,41 +28,79 @@ async def textToAudioFile(text) -> None:
     communicate = edge_tts.Communicate(text, assistantVoice, pitch='+5Hz', rate='+13%')
     await communicate.save(r'Data\speech.mp3') # Save the generated speech as mp3 file
 
+# Function to initialise the mixer before the first answer (see Backend/Warmup.py)
+def warmUp():
+    pygame.mixer.init()
+
+
+# Function to wait for the speech file; a barge-in cancels the synthesis
+def synthesise(text):
+    synthesis = submit(textToAudioFile(text))
+    while True:
+        try:
+            synthesis.result(timeout=interruptPoll)
+            return True
+        except FutureTimeoutError:
+            if assistantState.isInterrupted():
+                synthesis.cancel()
+                return False
+
+
 # Function to manage text to speech functionality
 def tts(text, func=lambda r=None: True):
     while True:
         try:
-            # Convert text to an audio file asynchronously
-            asyncio.run(textToAudioFile(text))
+            # Convert text to an audio file on the shared backend event loop
+            with metrics.timeStage("ttsSynthesis"):
+                if not synthesise(text):
+                    return False
             
-            # Initialize Pygame Mixer for audio playback
+            # Initialize Pygame Mixer for audio playback (a no-op once it is running)
             pygame.mixer.init()
 
             # Load generated speech file Into pygame mixture
             pygame.mixer.music.load(r"Data\speech.mp3")
             pygame.mixer.music.play()
+            playbackStart = time.perf_counter()
 
-            # loop until the audio is done playing or the function stops
+            # loop until the audio is done playing, the function stops or the user barges in
             while pygame.mixer.music.get_busy():
-                if func() == False: # Checks if the external function returns false
+                if func() == False or assistantState.isInterrupted():
                     break
-                pygame.time.Clock().tick(10) # Limit the loop to 10 ticks per second
+                assistantState.waitForInterrupt(interruptPoll) # Wakes at once on a barge-in
+
+            metrics.observeSince("ttsPlayback", playbackStart)
             
-            return True # Return true if the audio played successfully
+            return not assistantState.isInterrupted() # Return true if the audio played to the end
         
         except Exception as e:
             print(f"Eroor in TTS: {e}")
+            metrics.count("errors", "tts")
 
         finally:
             try:
                 func(False)
-                pygame.mixer.music.stop()
-                pygame.mixer.quit()
+                if pygame.mixer.get_init():
+                    pygame.mixer.music.stop()
+                    # Release Data\speech.mp3 but keep the mixer open for the next answer
+                    pygame.mixer.music.unload()
 
             except Exception as e:
                 print(f"Error in finally block: {e}")
 
 def textToSpeech(text, func=lambda r=None: True):
+    assistantState.setSpeaking(True)
+    try:
+        return speak(text, func)
+    finally:
+        assistantState.setSpeaking(False)
+        # Clear the barge-in with the utterance it stopped, whoever was speaking
+        interrupt = assistantState.takeInterrupt()
+        if interrupt is not None:
+            # Barge-in to silence: playback stopped and the mixer released
+            metrics.observeSince("bargeInStop", interrupt[0])
+
+def speak(text, func):
     data = str(text).split(".")
 
     responses = [
@@ -82,10 +127,14 @@ def textToSpeech(text, func=lambda r=None: True):
     ]
 
     if len(data) > 4 and len(text) >= 250:
-        tts(text.split(".")[0] + ". " + random.choice(responses), func)
+        return tts(text.split(".")[0] + ". " + random.choice(responses), func)
+
+    # Out of time: speak only the first sentence, the rest is on the chat screen
+    elif len(data) > 2 and shouldDegrade("shortSpeech", "ttsSynthesis"):
+        return tts(text.split(".")[0] + ". " + random.choice(responses), func)
 
     else:
-        tts(text, func)
+        return tts(text, func)
 
 if __name__ == "__main__":
     while True:
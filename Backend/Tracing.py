@@ -0,0 +1,149 @@
+# Backend/Tracing.py
+
+"""
+Per-query trace spans written as Chrome trace-event JSON (open them in
+https://ui.perfetto.dev or chrome://tracing).
+
+    with trace("MainExecution", query=query):   # starts a sampled trace
+        with span("dmm"):                        # child span, on any thread
+            ...
+
+The active trace travels in a context variable, so spans opened on worker threads
+started through Backend/Runtime.py or the task graph land in the same file. Only
+TRACE_SAMPLE_RATE of the traces (0.0 - 1.0) are recorded; the rest cost one
+context-variable lookup per span.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from .Config import env_vars
+import threading
+import itertools
+import random
+import json
+import time
+import os
+
+# Share of queries traced, from 0 (off) to 1 (every query)
+traceSampleRate = float(env_vars.get("TRACE_SAMPLE_RATE", "0"))
+
+traceDirectory = env_vars.get("TRACE_DIR", os.path.join("Data", "Traces"))
+
+currentTrace = ContextVar("currentTrace", default=None)
+
+traceIds = itertools.count(1)
+
+
+def setSampleRate(rate):
+    global traceSampleRate
+    traceSampleRate = max(0.0, min(1.0, rate))
+
+
+class Trace:
+    """The events of one traced query; written to a file when the root span ends."""
+
+    def __init__(self, name):
+        self.name = name
+        self.id = next(traceIds)
+        self.events = []
+        self.threads = {}
+        self.finished = False
+        self.lock = threading.Lock()
+
+    def add(self, event):
+        thread = threading.current_thread()
+        event["pid"] = os.getpid()
+        event["tid"] = thread.ident
+        with self.lock:
+            if self.finished:
+                return  # work that outlived its query (e.g. a discarded speculation)
+            self.threads[thread.ident] = thread.name
+            self.events.append(event)
+
+    def finish(self):
+        with self.lock:
+            self.finished = True
+            events = list(self.events)
+            threads = dict(self.threads)
+
+        # Thread names so Perfetto shows "BackendWorker_3" instead of a number
+        for ident, name in threads.items():
+            events.append(
+                {"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": ident, "args": {"name": name}}
+            )
+
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(traceDirectory, f"{self.name}-{stamp}-{self.id}.json")
+        try:
+            os.makedirs(traceDirectory, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as file:
+                json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+        except OSError as e:
+            print(f"Error writing trace: {e}")
+            return None
+        return path
+
+
+def now():
+    return time.perf_counter() * 1_000_000  # trace timestamps are microseconds
+
+
+@contextmanager
+def span(name, category="backend", **args):
+    """Record the with-block as a span of the active trace (a no-op when untraced)."""
+    activeTrace = currentTrace.get()
+    if activeTrace is None:
+        yield
+        return
+
+    start = now()
+    try:
+        yield
+    finally:
+        activeTrace.add(
+            {"name": name, "cat": category, "ph": "X", "ts": start, "dur": now() - start, "args": args}
+        )
+
+
+@contextmanager
+def trace(name, **args):
+    """Start a sampled trace, or just a span when a trace is already active."""
+    if currentTrace.get() is not None:
+        with span(name, "query", **args):
+            yield
+        return
+
+    if traceSampleRate <= 0 or random.random() >= traceSampleRate:
+        yield
+        return
+
+    newTrace = Trace(name)
+    token = currentTrace.set(newTrace)
+    try:
+        with span(name, "query", **args):
+            yield
+    finally:
+        currentTrace.reset(token)
+        path = newTrace.finish()
+        if path:
+            print(f"Trace written to {path}")
+
+
+def recordSpan(name, start, category="backend", **args):
+    """Record a span that began at start (a time.perf_counter() value) and ends now."""
+    activeTrace = currentTrace.get()
+    if activeTrace is not None:
+        begin = start * 1_000_000
+        activeTrace.add(
+            {"name": name, "cat": category, "ph": "X", "ts": begin, "dur": now() - begin, "args": args}
+        )
+
+
+def traced(name, func):
+    """Wrap func so each call is recorded as a span (for handing to worker threads)."""
+
+    def run(*args, **kwargs):
+        with span(name):
+            return func(*args, **kwargs)
+
+    return run
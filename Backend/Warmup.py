@@ -0,0 +1,128 @@
+# Backend/Warmup.py
+
+"""
+Background warm-up started while the GUI paints, so the first query runs on the
+warm path.
+
+Each component runs on the backend worker pool, in parallel with the others:
+
+    groq     create the Groq client and open its TLS connection
+    cohere   create the Cohere client and open its TLS connection
+    speech   launch Chrome (ChromeDriverManager().install() included) and load Voice.html
+    audio    initialise the pygame mixer
+    modules  import the lazily loaded backends (decision model, chat, search, automation)
+
+WARMUP=False turns it off, or WARMUP=groq,speech picks components. Readiness and
+time taken are kept per component (warmup.status()), recorded as warmup.<component>
+in Backend/Metrics.py and as milestones in the --profile-startup report.
+"""
+
+from .Config import env_vars
+from .Metrics import metrics
+from .Runtime import runInThread
+from .Startup import startupProfiler
+import importlib
+import threading
+import time
+
+# component -> (module, function)
+warmupComponents = {
+    "groq": ("Backend.Clients", "warmGroq"),
+    "cohere": ("Backend.Clients", "warmCohere"),
+    "speech": ("Backend.SpeechToText", "warmUp"),
+    "audio": ("Backend.TextToSpeech", "warmUp"),
+    "modules": ("Backend.Warmup", "importBackends"),
+}
+
+# Modules behind the pipeline's lazy backends
+backendModules = ("Backend.Model", "Backend.Chatbot", "Backend.RealtimeSearchEngine", "Backend.Automation")
+
+
+def configuredComponents():
+    setting = env_vars.get("WARMUP", "True")
+    if setting == "False":
+        return []
+    if setting == "True":
+        return list(warmupComponents)
+    return [name.strip() for name in setting.split(",") if name.strip() in warmupComponents]
+
+
+def importBackends():
+    for module in backendModules:
+        importlib.import_module(module)
+
+
+class ComponentState:
+    """Readiness of one warm-up component."""
+
+    def __init__(self, name):
+        self.name = name
+        self.state = "pending"  # pending -> warming -> ready / failed
+        self.seconds = None
+        self.error = None
+        self.ready = threading.Event()
+
+    def toDict(self):
+        return {"state": self.state, "seconds": self.seconds, "error": self.error}
+
+
+class Warmup:
+    """Runs the warm-up components in parallel and tracks when each is ready."""
+
+    def __init__(self):
+        self.components = {}
+        self.lock = threading.Lock()
+
+    def start(self, components=None):
+        """Warm the components (the WARMUP setting by default) that haven't been started yet."""
+        components = configuredComponents() if components is None else components
+        started = []
+        with self.lock:
+            for name in components:
+                if name in self.components:
+                    continue
+                self.components[name] = ComponentState(name)
+                started.append(name)
+        for name in started:
+            runInThread(self.run, self.components[name])
+        return started
+
+    def run(self, component):
+        moduleName, attribute = warmupComponents[component.name]
+        component.state = "warming"
+        start = time.perf_counter()
+        try:
+            getattr(importlib.import_module(moduleName), attribute)()
+            component.state = "ready"
+        except Exception as e:
+            component.state = "failed"
+            component.error = str(e)
+            print(f"Warm-up of {component.name} failed: {e}")
+        component.seconds = time.perf_counter() - start
+        metrics.observe(f"warmup.{component.name}", component.seconds)
+        startupProfiler.mark(f"warm-up {component.name} {component.state}")
+        component.ready.set()
+
+    def isReady(self, name):
+        component = self.components.get(name)
+        return component is not None and component.state == "ready"
+
+    def waitFor(self, name, timeout=None):
+        """Block until a started component has finished warming; True if it is ready."""
+        component = self.components.get(name)
+        if component is None:
+            return False
+        component.ready.wait(timeout)
+        return component.state == "ready"
+
+    def status(self):
+        with self.lock:
+            return {name: component.toDict() for name, component in self.components.items()}
+
+
+warmup = Warmup()
+
+
+def startWarmup(components=None):
+    """Start warming the configured components in the background."""
+    return warmup.start(components)
@@ -0,0 +1,75 @@
+# Frontend/Formatting.py
+
+
+def AnswerModifire(Answer):
+    lines = Answer.split("\n")
+    non_empty_lines = [line for line in lines if line.strip()]
+    modified_answer = "\n".join(non_empty_lines)
+    return modified_answer
+
+
+def QueryModifire(Query):
+    new_query = Query.lower().strip()
+    query_words = new_query.split()
+    question_words = [
+        "what",
+        "who",
+        "where",
+        "when",
+        "why",
+        "how",
+        "is",
+        "are",
+        "do",
+        "does",
+        "did",
+        "can",
+        "could",
+        "should",
+        "would",
+        "will",
+        "may",
+        "might",
+        "shall",
+        "has",
+        "have",
+        "had",
+        "am",
+        "isn't",
+        "aren't",
+        "wasn't",
+        "weren't",
+        "won't",
+        "can't",
+        "couldn't",
+        "shouldn't",
+        "wouldn't",
+        "must",
+        "need",
+        "ought",
+        "used",
+        "to",
+        "if",
+        "that",
+        "which",
+        "who's",
+        "whose",
+        "whom",
+        "what's",
+        "where's",
+        "when's",
+        "why's",
+        "how's",
+    ]
+
+    if any(word + " " in new_query for word in question_words):
+        if query_words[-1][-1] in [".", "?", "!"]:
+            new_query = new_query[:-1] + "?"
+        else:
+            new_query += "?"
+    else:
+        if query_words[-1][-1] in [".", "?", "!"]:
+            new_query = new_query[:-1] + "."
+        else:
+            new_query += "."
+    return new_query.capitalize()
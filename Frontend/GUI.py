@@ -24,11 +24,12 @@ from PyQt5.QtGui import (
     QTextBlockFormat,
 )
 from PyQt5.QtCore import Qt, QSize, QTimer
-from dotenv import dotenv_values
+from Backend.Config import env_vars
+from Backend.AssistantState import assistantState
+from Frontend.Formatting import AnswerModifire, QueryModifire
 import sys
 import os
 
-env_vars = dotenv_values(".env")
 assistant_name = env_vars.get("ASSISTANT_NAME", "Assistant")
 current_dir = os.getcwd()
 old_chat_message = ""
@@ -36,94 +37,16 @@ TempDirpath = rf"{current_dir}\Frontend\Files"
 GraphicsDirpath = rf"{current_dir}\Frontend\Graphics"
 
 
-def AnswerModifire(Answer):
-    lines = Answer.split("\n")
-    non_empty_lines = [line for line in lines if line.strip()]
-    modified_answer = "\n".join(non_empty_lines)
-    return modified_answer
-
-
-def QueryModifire(Query):
-    new_query = Query.lower().strip()
-    query_words = new_query.split()
-    question_words = [
-        "what",
-        "who",
-        "where",
-        "when",
-        "why",
-        "how",
-        "is",
-        "are",
-        "do",
-        "does",
-        "did",
-        "can",
-        "could",
-        "should",
-        "would",
-        "will",
-        "may",
-        "might",
-        "shall",
-        "has",
-        "have",
-        "had",
-        "am",
-        "isn't",
-        "aren't",
-        "wasn't",
-        "weren't",
-        "won't",
-        "can't",
-        "couldn't",
-        "shouldn't",
-        "wouldn't",
-        "must",
-        "need",
-        "ought",
-        "used",
-        "to",
-        "if",
-        "that",
-        "which",
-        "who's",
-        "whose",
-        "whom",
-        "what's",
-        "where's",
-        "when's",
-        "why's",
-        "how's",
-    ]
-
-    if any(word + " " in new_query for word in question_words):
-        if query_words[-1][-1] in [".", "?", "!"]:
-            new_query = new_query[:-1] + "?"
-        else:
-            new_query += "?"
-    else:
-        if query_words[-1][-1] in [".", "?", "!"]:
-            new_query = new_query[:-1] + "."
-        else:
-            new_query += "."
-    return new_query.capitalize()
-
-
 def SetMicrophoneStatus(Command):
     try:
-        os.makedirs(os.path.dirname(TempDirpath), exist_ok=True)
-        with open(rf"{TempDirpath}\Mic.data", "w", encoding="utf-8") as file:
-            file.write(Command)
+        assistantState.setMicrophone(str(Command) == "True")
     except Exception as e:
         print(f"Error setting microphone status: {e}")
 
 
 def GetMicrophoneStatus():
     try:
-        with open(rf"{TempDirpath}\Mic.data", "r", encoding="utf-8") as file:
-            Status = file.read()
-        return Status
+        return "True" if assistantState.isMicrophoneOn() else "False"
     except Exception as e:
         print(f"Error getting microphone status: {e}")
         return "False"
@@ -131,18 +54,14 @@ def GetMicrophoneStatus():
 
 def SetAssistantStatus(Status):
     try:
-        os.makedirs(os.path.dirname(TempDirpath), exist_ok=True)
-        with open(rf"{TempDirpath}\Status.data", "w", encoding="utf-8") as file:
-            file.write(Status)
+        assistantState.setStatus(Status)
     except Exception as e:
         print(f"Error setting assistant status: {e}")
 
 
 def GetAssistantStatus():
     try:
-        with open(rf"{TempDirpath}\Status.data", "r", encoding="utf-8") as file:
-            Status = file.read()
-        return Status
+        return assistantState.getStatus()
     except Exception as e:
         print(f"Error getting assistant status: {e}")
         return ""
@@ -297,9 +216,7 @@ class ChatSection(QWidget):
     # Fixed: Method name consistency
     def speechRecogText(self):
         try:
-            with open(TempDirectoryPath("Status.data"), "r", encoding="utf-8") as file:
-                messages = file.read()
-            self.label.setText(messages)
+            self.label.setText(GetAssistantStatus())
         except Exception as e:
             print(f"Error reading speech recognition text: {e}")
 
@@ -398,9 +315,7 @@ class InitialScreen(QWidget):
     # Fixed: Method name consistency
     def speechRecogText(self):
         try:
-            with open(TempDirectoryPath("Status.data"), "r", encoding="utf-8") as file:
-                messages = file.read()
-            self.label.setText(messages)
+            self.label.setText(GetAssistantStatus())
         except Exception as e:
             print(f"Error reading speech recognition text: {e}")
 
@@ -1,3 +1,11 @@
+import sys
+from Backend.Startup import startupProfiler, lazyFunction
+
+# Time every import from here on when started with --profile-startup
+ProfileStartup = "--profile-startup" in sys.argv
+if ProfileStartup:
+    startupProfiler.enable()
+
 from Frontend.GUI import (
     GraphicalUserInterface,
     SetAssistantStatus,
@@ -5,82 +13,69 @@ from Frontend.GUI import (
     TempDirectoryPath,
     SetMicrophoneStatus,
     AnswerModifire,
-    QueryModifire,
     GetMicrophoneStatus,
     GetAssistantStatus,
 )
-from Backend.Model import firstLayerDMM
-from Backend.RealtimeSearchEngine import realtimeSearchEngine
-from Backend.Automation import translateAndExecute
-from Backend.SpeechToText import speechRecognition
-from Backend.Chatbot import chatBot
-from Backend.TextToSpeech import textToSpeech
-from Backend.ReminderTimer import initialize_storage
-from dotenv import dotenv_values
-from asyncio import run
-from time import sleep
-import subprocess
+from Backend.Pipeline import processQuery, addJobListener
+from Backend.AssistantState import assistantState
+from Backend.Config import env_vars
+from Backend.Metrics import metrics
+from Backend.Tracing import trace
+from Backend.Profiler import installProfilerSignal, startFromSettings
+from Backend.Memory import startMemoryReports
+from Backend.Deadline import deadlineScope
+from Backend.Warmup import startWarmup
+from Backend.Snapshot import registerSection, installSnapshot, isRestored, saveSnapshot
+from Backend.Conversation import conversation, journalPath
+from Backend.DecisionCache import saveDecisionCaches
 import threading
-import json
 import os
 
-env_vars = dotenv_values(".env")
+# Selenium, pygame and edge-tts are only imported when first needed
+speechRecognition = lazyFunction("Backend.SpeechToText", "speechRecognition")
+textToSpeech = lazyFunction("Backend.TextToSpeech", "textToSpeech")
+startBargeInListener = lazyFunction("Backend.SpeechToText", "startBargeInListener")
+stopBargeInListener = lazyFunction("Backend.SpeechToText", "stopBargeInListener")
 username = env_vars.get("USERNAME")
 Assistantname = env_vars.get("ASSISTANT_NAME")
 DefaultMessage = f"""{username}: Hello {Assistantname}, How are you?
 {Assistantname}: Welcome {username}. I am doing well. How may i help you?"""
 
-Functions = [
-    "open",
-    "close",
-    "play",
-    "system",
-    "content",
-    "google search",
-    "youtube search",
-    "reminder",
-    "remind me",
-    "set timer",
-    "timer for",
-    "list reminders",
-    "list timers",
-    "cancel reminder",
-    "cancel timer",
-    "generate image",
-]
-
-
 def ShowDefaultChatIfNoChats():
-    with open(r"Data\ChatLog.json", "r", encoding="utf-8") as file:
-        if len(file.read()) < 5:
-            with open(
-                TempDirectoryPath("Database.data"), "w", encoding="utf-8"
-            ) as file:
-                file.write("")
-            with open(
-                TempDirectoryPath("Responses.data"), "w", encoding="utf-8"
-            ) as file:
-                file.write(DefaultMessage)
-
-
-def ReadChatLogJson():
-    with open(r"Data\ChatLog.json", "r", encoding="utf-8") as file:
-        chatlog_data = json.load(file)
-        return chatlog_data
-
-
-def ChatLogIntegration():
-    json_data = ReadChatLogJson()
+    if not len(conversation):
+        with open(
+            TempDirectoryPath("Database.data"), "w", encoding="utf-8"
+        ) as file:
+            file.write("")
+        with open(
+            TempDirectoryPath("Responses.data"), "w", encoding="utf-8"
+        ) as file:
+            file.write(DefaultMessage)
+
+
+def FormatChatLog():
     formatted_chatlog = ""
-    for entry in json_data:
+    for entry in conversation.all():
         if entry["role"] == "user":
             formatted_chatlog += f"User: {entry['content']}\n"
         elif entry["role"] == "assistant":
             formatted_chatlog += f"Assistant: {entry['content']}\n"
     formatted_chatlog = formatted_chatlog.replace("User", username + ":")
     formatted_chatlog = formatted_chatlog.replace("Assistant", Assistantname + ":")
+    return AnswerModifire(formatted_chatlog)
+
+
+def WriteChatContext(text):
     with open(TempDirectoryPath("Database.data"), "w", encoding="utf-8") as file:
-        file.write(AnswerModifire(formatted_chatlog))
+        file.write(text)
+
+
+def ChatLogIntegration():
+    WriteChatContext(FormatChatLog())
+
+
+# The formatted chat log is kept in the warm-restart snapshot (Backend/Snapshot.py)
+registerSection("chatContext", FormatChatLog, WriteChatContext, sources=(journalPath,))
 
 
 def ShowChatsOnGUI():
@@ -98,9 +93,10 @@ def ShowChatsOnGUI():
 def InitialExecution():
     SetMicrophoneStatus("False")
     ShowTextToScreen("")
+
+    # Restore the conversation, chat context and scheduler queue of the last run (Data/Snapshot.bin)
+    installSnapshot()
     ShowDefaultChatIfNoChats()
-    ChatLogIntegration()
-    ShowChatsOnGUI()
 
     # Initialize reminder and timer system
     try:
@@ -110,167 +106,99 @@ def InitialExecution():
     except Exception as e:
         print(f"Error initializing reminder system: {e}")
 
+    if not isRestored("chatContext"):
+        ChatLogIntegration()
+    ShowChatsOnGUI()
+
+    # Open connections, launch Chrome and initialise audio while the GUI paints
+    startWarmup()
+
 
 InitialExecution()
+startupProfiler.mark("InitialExecution")
 
 
-def MainExecution():
-    TaskExecution = False
-    ImageExecution = False
-    ImageGenerationQuery = ""
+# The barge-in that cut the last answer short, as (time.perf_counter(), reason)
+PendingInterrupt = None
+
 
+def MainExecution():
+    global PendingInterrupt
     SetAssistantStatus("Listening...")
-    Query = speechRecognition()
+    if PendingInterrupt is not None:
+        # Time from the barge-in until the assistant listens again
+        metrics.observeSince("interruptToListen", PendingInterrupt[0])
+        PendingInterrupt = None
+    with metrics.timeStage("speechRecognition"):
+        Query = speechRecognition()
     ShowTextToScreen(f" {username} : {Query}")
-    SetAssistantStatus("Thinking...")
-    Decision = firstLayerDMM(Query)
-
-    print("")
-    print(f"Decision {Decision}")
-    print("")
-    G = any([i for i in Decision if i.startswith("general")])
-    R = any([i for i in Decision if i.startswith("realtime")])
-    Mearged_query = "".join(
-        [
-            "".join(i.split()[1:])
-            for i in Decision
-            if i.startswith("general") or i.startswith("realtime")
-        ]
-    )
-
-    # Check for image generation requests
-    for queries in Decision:
-        if "generate" in queries:
-            ImageGenerationQuery = str(queries)
-            ImageExecution = True
-
-    for queries in Decision:
-        if TaskExecution == False:
-            if any(queries.startswith(func) for func in Functions):
-                # Use translateAndExecute for ALL automation tasks
-                from Backend.Automation import translateAndExecute
-                import asyncio
-
-                async def get_automation_result():
-                    results = []
-                    async for result in translateAndExecute(list(Decision)):
-                        if result and isinstance(result, str):
-                            results.append(result)
-                    return results
-
-                # Get the result from automation
-                results = run(get_automation_result())
-
-                # Check if it's a command that returns a response (like reminders/timers)
-                if any(
-                    queries.startswith(response_func)
-                    for response_func in [
-                        "reminder",
-                        "remind me",
-                        "set timer",
-                        "timer for",
-                        "list reminders",
-                        "list timers",
-                    ]
-                ):
-                    # These commands return text responses
-                    if results:
-                        for result in results:
-                            ShowTextToScreen(f" {Assistantname} : {result}")
-                            SetAssistantStatus("Answering...")
-                            textToSpeech(result)
-                else:
-                    # System commands (mute, unmute, etc.) don't return text but still need confirmation
-                    ShowTextToScreen(f" {Assistantname} : Command executed!")
-                    SetAssistantStatus("Answering...")
-                    textToSpeech("Done!")
-
-                TaskExecution = True
-                break
-
-    # Handle image generation requests
-    if ImageExecution and not TaskExecution:
-        SetAssistantStatus("Generating Image...")
-        ShowTextToScreen(f" {Assistantname} : Creating your image...")
-
-        # Write image generation request to file
-        os.makedirs("Frontend/Files", exist_ok=True)
-        with open(r"Frontend\Files\ImageGeneratoion.data", "w") as file:
-            file.write(f" {ImageGenerationQuery}, True")
-
-        try:
-            # Start image generation subprocess
-            subprocess.Popen(
-                ["python", r"Backend\ImageGeneration.py"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                stdin=subprocess.PIPE,
-                shell=False,
-            )
-            ShowTextToScreen(
-                f" {Assistantname} : Image generation started! Please wait..."
-            )
-            SetAssistantStatus("Answering...")
-            textToSpeech(
-                "I'm generating your image! It will open automatically when ready."
-            )
-            TaskExecution = True
-        except Exception as e:
-            error_msg = f"Error starting image generation: {e}"
-            print(error_msg)
-            ShowTextToScreen(f" {Assistantname} : {error_msg}")
-            textToSpeech("Sorry, there was an error generating the image.")
-            TaskExecution = True
-
-    # Handle realtime search queries
-    if G and R and not TaskExecution:
-        SetAssistantStatus("Searching...")
-        Answer = realtimeSearchEngine(QueryModifire(Mearged_query))
-        ShowTextToScreen(f" {Assistantname} : {Answer}")
+
+    # The latency budget (QUERY_DEADLINE) runs from here to the first spoken word
+    with deadlineScope() as Deadline:
+        Result = processQuery(Query, onStatus=SetAssistantStatus)
+        if not Result.results:
+            return False
+
+        ShowTextToScreen(f" {Assistantname} : {Result.answer}")
         SetAssistantStatus("Answering...")
-        textToSpeech(Answer)
-        TaskExecution = True
-    elif not TaskExecution:
-        # Handle general chat queries
-        for Queries in Decision:
-            if "general" in Queries:
-                SetAssistantStatus("Thinking...")
-                QueryFinal = Queries.replace("general", "")
-                Answer = chatBot(QueryModifire(QueryFinal))
-                ShowTextToScreen(f" {Assistantname} : {Answer}")
-                SetAssistantStatus("Answering...")
-                textToSpeech(Answer)
-                TaskExecution = True
-                break
-            elif "realtime" in Queries:
-                SetAssistantStatus("Searching...")
-                QueryFinal = Queries.replace("realtime ", "")
-                Answer = realtimeSearchEngine(QueryModifire(QueryFinal))
-                ShowTextToScreen(f" {Assistantname} : {Answer}")
-                SetAssistantStatus("Answering...")
-                textToSpeech(Answer)
-                return True
-            elif "exit" in Queries:
-                QueryFinal = "Okay, Bye!"
-                Answer = chatBot(QueryModifire(QueryFinal))
-                ShowTextToScreen(f" {Assistantname} : {Answer}")
-                SetAssistantStatus("Answering...")
-                textToSpeech(Answer)
-                SetAssistantStatus("Answering...")
-                os._exit(1)
+        with metrics.timeStage("textToSpeech"):
+            # With BARGE_IN=True the recogniser keeps listening and talking stops the answer
+            startBargeInListener(Result.speech)
+            try:
+                textToSpeech(Result.speech)
+            finally:
+                stopBargeInListener()
+        PendingInterrupt = assistantState.lastInterrupt
+    metrics.save()
+
+    if Deadline is not None and Deadline.degradations:
+        print(f"Degraded to meet the deadline: {', '.join(Deadline.degradations)}")
+
+    if Result.exit:
+        # os._exit skips the atexit handlers, so save what they would have
+        metrics.save(force=True)
+        saveDecisionCaches()
+        saveSnapshot()
+        os._exit(1)
+
+    return True
+
+
+def BackgroundJobEvent(event, job):
+    if event == "progress" and job.stage:
+        SetAssistantStatus(f"Generating Image ({job.stage})...")
+    elif event in ("completed", "failed"):
+        ShowTextToScreen(f" {Assistantname} : {job.result}")
+        SetAssistantStatus("Available...")
+
+
+addJobListener(BackgroundJobEvent)
+
+
+# The profiler signal toggles sampling; PROFILER=True starts it right away
+installProfilerSignal()
+startFromSettings()
+startMemoryReports()
 
 
 def FirstThread():
+    global PendingInterrupt
     while True:
         CurrentStatus = GetMicrophoneStatus()
         if CurrentStatus == "True":
-            MainExecution()
+            with trace("MainExecution"):
+                MainExecution()
         else:
             AIStatus = GetAssistantStatus()
-            if "Available..." in AIStatus:
-                sleep(0.1)
-            else:
+            if "Available..." not in AIStatus:
                 SetAssistantStatus("Available...")
+                if ProfileStartup and "Available..." not in startupProfiler.milestones:
+                    startupProfiler.mark("Available...")
+                    print(startupProfiler.report())
+            # A barge-in that switched the microphone off is not followed by listening
+            PendingInterrupt = None
+            # Sleep until the GUI switches the microphone on (no polling)
+            assistantState.waitForMicrophone()
 
 
 def SecondThread():